@@ -1,13 +1,20 @@
 from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, Field
 from typing import Dict, List, Optional
 from app.services.sql_generator import get_generator
 from app.services.schema_reader import SchemaReader
 from app.services.voice_service import get_voice_service
+from app.services.database_manager import get_db_manager
+from app.services.metrics import metrics
+from app.services.query_control import QueryCancelledError, QueryTimeoutError
+from app.services.cost_gate import QueryCostError
+from app.services.spill import ResultTooLargeError
+from config.database_config import MULTI_QUERY_SETTINGS, QUERY_PAGINATION_SETTINGS
 import time
 from datetime import datetime, timedelta
+import json
 import uvicorn
 
 app = FastAPI(
@@ -28,6 +35,7 @@ app.add_middleware(
 # Initialize services
 sql_generator = get_generator()
 schema_reader = SchemaReader()
+db_manager = get_db_manager()
 
 # Rate limiting
 RATE_LIMIT_WINDOW = 60  # 1 minute
@@ -36,11 +44,25 @@ request_history = {}
 
 class QueryRequest(BaseModel):
     question: str = Field(..., min_length=1, max_length=500)
+    page_size: Optional[int] = Field(None, ge=1, le=QUERY_PAGINATION_SETTINGS["max_page_size"])
+    query_id: Optional[str] = Field(None, min_length=1, max_length=64)
+    timeout: Optional[float] = Field(None, gt=0)
+    progressive: bool = False
+
+class BatchQueryRequest(BaseModel):
+    questions: List[str] = Field(..., min_length=1, max_length=MULTI_QUERY_SETTINGS["max_questions"])
+    page_size: Optional[int] = Field(None, ge=1, le=QUERY_PAGINATION_SETTINGS["max_page_size"])
+    timeout: Optional[float] = Field(None, gt=0)
+
+class NextPageRequest(BaseModel):
+    cursor: str = Field(..., min_length=1)
 
 class QueryResponse(BaseModel):
     sql: str
     results: List[Dict]
     execution_time: float
+    has_more: bool = False
+    next_cursor: Optional[str] = None
 
 class VoiceQueryResponse(BaseModel):
     query: str
@@ -91,7 +113,13 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "/schema": "Get database schema",
-            "/query": "Convert natural language to SQL and execute",
+            "/stats": "Get cache, read routing and connection pool statistics",
+            "/metrics": "Pool, statement and model timing metrics in Prometheus text format",
+            "/query": "Convert natural language to SQL and execute (first page of results, optionally preceded by a preview)",
+            "/query/next": "Fetch the next page of a /query result by cursor",
+            "/query/{query_id}/cancel": "Cancel a running /query or /query/stream request",
+            "/query/stream": "Convert natural language to SQL and stream results as NDJSON",
+            "/query/batch": "Run several questions concurrently, streaming each result as NDJSON when it completes",
             "/voice-query": "Process a voice query and convert it to SQL"
         },
         "rate_limit": {
@@ -114,32 +142,238 @@ async def get_schema():
             detail=f"Failed to retrieve schema: {str(e)}"
         )
 
+@app.get("/stats")
+async def get_stats():
+    """Get cache, read routing and connection pool statistics."""
+    return {
+        **db_manager.get_cache_stats(),
+        "routing": db_manager.get_routing_stats(),
+        "pools": db_manager.get_pool_stats(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+@app.get("/metrics")
+async def get_metrics():
+    """Pool, statement and model timing metrics in Prometheus text format."""
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+def error_status(error: Exception) -> int:
+    """HTTP status code reported for a query error."""
+    if isinstance(error, QueryTimeoutError):
+        return 504
+    if isinstance(error, QueryCancelledError):
+        return 409
+    if isinstance(error, QueryCostError):
+        return 422
+    if isinstance(error, ResultTooLargeError):
+        return 413
+    if isinstance(error, ValueError):
+        return 400
+    return 500
+
+def query_http_error(error: Exception, invalid: str = "Invalid query") -> HTTPException:
+    """
+    HTTP error reported for a failed query, with the status from ``error_status()``.
+
+    Args:
+        error (Exception): Error raised by the query
+        invalid (str): Detail prefix for invalid requests (status 400)
+
+    Returns:
+        HTTPException: Exception to raise
+    """
+    status = error_status(error)
+    prefix = {
+        504: "Query timed out",
+        409: "Query cancelled",
+        422: "Query rejected",
+        413: "Result too large",
+        400: invalid,
+    }.get(status, "Query execution failed")
+    return HTTPException(status_code=status, detail=f"{prefix}: {str(error)}")
+
+async def progressive_lines(phases, first, start_time: float):
+    """NDJSON lines for the phases of a progressive answer, starting with ``first``."""
+    phase = first
+    try:
+        while phase is not None:
+            yield json.dumps({
+                "sql": phase.sql,
+                "preview": phase.preview,
+                "results": phase.page.rows,
+                "has_more": phase.page.has_more,
+                "next_cursor": phase.page.next_cursor,
+                "execution_time": time.time() - start_time
+            }, default=str) + "\n"
+            phase = await anext(phases, None)
+    except Exception as e:
+        # The preview was already sent; report the failure of the full query in-band
+        yield json.dumps({"status": error_status(e), "error": str(e)}) + "\n"
+    finally:
+        await phases.aclose()
+
 @app.post("/query", response_model=QueryResponse)
 async def process_query(
     request: QueryRequest,
     rate_limit: None = Depends(check_rate_limit)
 ):
-    """Convert natural language to SQL and execute the query."""
+    """
+    Convert natural language to SQL and execute the query.
+    
+    With ``progressive`` set the response is NDJSON: a line flagged as a
+    preview, computed over sampled tables, when it is ready before the full
+    query, then a line with the full first page.
+    """
     start_time = time.time()
     try:
-        sql, results = sql_generator.generate_and_execute(request.question)
+        cancel_handle = db_manager.new_cancel_handle(timeout=request.timeout, query_id=request.query_id)
+        if request.progressive:
+            phases = sql_generator.generate_and_execute_progressive_async(
+                request.question,
+                page_size=request.page_size,
+                cancel_handle=cancel_handle
+            )
+            first = await anext(phases)
+            return StreamingResponse(
+                progressive_lines(phases, first, start_time),
+                media_type="application/x-ndjson"
+            )
+        page = await sql_generator.generate_and_execute_page_async(
+            request.question,
+            page_size=request.page_size,
+            cancel_handle=cancel_handle
+        )
         execution_time = time.time() - start_time
         
         return QueryResponse(
-            sql=sql,
-            results=results,
-            execution_time=execution_time
+            sql=page.sql,
+            results=page.rows,
+            execution_time=execution_time,
+            has_more=page.has_more,
+            next_cursor=page.next_cursor
         )
-    except ValueError as e:
+    except Exception as e:
+        raise query_http_error(e)
+
+@app.post("/query/{query_id}/cancel")
+async def cancel_query(query_id: str):
+    """Cancel an in-flight /query request that was started with this query_id."""
+    if not db_manager.cancel_query(query_id):
         raise HTTPException(
-            status_code=400,
-            detail=f"Invalid query: {str(e)}"
+            status_code=404,
+            detail=f"No running query with id '{query_id}'"
+        )
+    return {
+        "query_id": query_id,
+        "cancelled": True,
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+@app.post("/query/next", response_model=QueryResponse)
+async def process_next_page(
+    request: NextPageRequest,
+    rate_limit: None = Depends(check_rate_limit)
+):
+    """Fetch the next page of a previous /query result using its cursor."""
+    start_time = time.time()
+    try:
+        page = await db_manager.fetch_next_page_async(request.cursor)
+        execution_time = time.time() - start_time
+        
+        return QueryResponse(
+            sql=page.sql,
+            results=page.rows,
+            execution_time=execution_time,
+            has_more=page.has_more,
+            next_cursor=page.next_cursor
         )
     except Exception as e:
+        raise query_http_error(e, invalid="Invalid cursor")
+
+@app.post("/query/stream")
+async def stream_query(
+    request: QueryRequest,
+    rate_limit: None = Depends(check_rate_limit)
+):
+    """
+    Convert natural language to SQL and stream the results as NDJSON.
+    
+    The first line carries the SQL and column names, each following line is a
+    batch of rows, and the last line reports the total row count.
+    """
+    try:
+        cancel_handle = db_manager.new_cancel_handle(timeout=request.timeout, query_id=request.query_id)
+        sql, stream = await sql_generator.generate_and_stream_async(request.question, cancel_handle=cancel_handle)
+    except Exception as e:
+        raise query_http_error(e)
+    
+    async def ndjson_lines():
+        start_time = time.time()
+        async with stream:
+            yield json.dumps({"sql": sql, "columns": stream.columns}) + "\n"
+            async for batch in stream:
+                yield json.dumps({"rows": batch}, default=str) + "\n"
+            yield json.dumps({
+                "row_count": stream.rows_fetched,
+                "execution_time": time.time() - start_time
+            }) + "\n"
+    
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+@app.post("/query/batch")
+async def process_query_batch(
+    request: BatchQueryRequest,
+    rate_limit: None = Depends(check_rate_limit)
+):
+    """
+    Convert several independent questions to SQL and run them concurrently.
+    
+    Results are streamed as NDJSON, one line per question in completion order,
+    each carrying the question's index in the request. A failed question
+    reports its own status and error; the others are unaffected.
+    """
+    if any(not question.strip() or len(question) > 500 for question in request.questions):
         raise HTTPException(
-            status_code=500,
-            detail=f"Query execution failed: {str(e)}"
+            status_code=400,
+            detail="Each question must be between 1 and 500 characters"
+        )
+    
+    async def ndjson_lines():
+        start_time = time.time()
+        outcomes = sql_generator.generate_and_execute_many_async(
+            request.questions,
+            page_size=request.page_size,
+            timeout=request.timeout
         )
+        failed = 0
+        try:
+            async for outcome in outcomes:
+                line = {
+                    "index": outcome.index,
+                    "question": outcome.question,
+                    "sql": outcome.sql,
+                    "execution_time": outcome.execution_time
+                }
+                if outcome.ok:
+                    line.update(
+                        status=200,
+                        results=outcome.page.rows,
+                        has_more=outcome.page.has_more,
+                        next_cursor=outcome.page.next_cursor
+                    )
+                else:
+                    failed += 1
+                    line.update(status=error_status(outcome.error), error=str(outcome.error))
+                yield json.dumps(line, default=str) + "\n"
+        finally:
+            await outcomes.aclose()
+        yield json.dumps({
+            "completed": len(request.questions) - failed,
+            "failed": failed,
+            "execution_time": time.time() - start_time
+        }) + "\n"
+    
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
 
 @app.post("/voice-query", response_model=VoiceQueryResponse)
 async def process_voice_query(
@@ -176,16 +410,10 @@ async def process_voice_query(
             results=results,
             execution_time=execution_time
         )
-    except ValueError as e:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Invalid query: {str(e)}"
-        )
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Query execution failed: {str(e)}"
-        )
+        raise query_http_error(e)
 
 if __name__ == "__main__":
     uvicorn.run(
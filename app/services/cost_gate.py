@@ -0,0 +1,396 @@
+"""
+EXPLAIN-based cost gate for generated SQL.
+
+Before a generated statement runs, the database's own planner is asked what
+it intends to do. Estimated rows and cost (PostgreSQL, MySQL) and full table
+scans (all of those plus SQLite's ``EXPLAIN QUERY PLAN``) are compared with
+configurable thresholds, and a statement over budget is rejected, capped with
+a LIMIT or rewritten to read a table sample. Plans are cached per SQL hash so
+repeated questions only pay for the EXPLAIN once.
+"""
+
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from app.services.pagination import apply_row_cap
+
+COST_ACTIONS = ("reject", "limit", "sample")
+
+# SQLite plan line for a full scan; the name may be a table, alias or CTE
+_SQLITE_SCAN = re.compile(r"^SCAN (?:TABLE )?(?P<name>[\w$]+)(?: AS (?P<alias>[\w$]+))?", re.IGNORECASE)
+
+_ALIAS_STOPWORDS = (
+    "WHERE|JOIN|INNER|LEFT|RIGHT|FULL|CROSS|OUTER|NATURAL|ON|USING|GROUP|ORDER|HAVING|LIMIT|OFFSET|"
+    "FETCH|UNION|EXCEPT|INTERSECT|WINDOW|TABLESAMPLE|LATERAL|FOR"
+)
+_TABLE_REFERENCE = re.compile(
+    r"(?P<head>\b(?:FROM|JOIN)\s+)(?P<table>(?:[\w$]+\.)?[\w$]+|\"[^\"]+\")"
+    r"(?P<alias>\s+(?:AS\s+)?(?!(?:" + _ALIAS_STOPWORDS + r")\b)[A-Za-z_][\w$]*)?",
+    re.IGNORECASE
+)
+
+
+class QueryCostError(ValueError):
+    """Raised when a statement's estimated cost exceeds the configured budget."""
+
+
+class QueryPlan:
+    """
+    Planner estimates for one statement.
+
+    Attributes:
+        supported (bool): False when the dialect has no usable EXPLAIN here
+        estimated_rows (Optional[float]): Rows the planner expects to return
+        estimated_cost (Optional[float]): Planner cost in the dialect's own units
+        full_scans (Dict[str, Optional[float]]): Fully scanned tables and their
+            estimated row counts (None when unknown)
+    """
+
+    __slots__ = ("supported", "estimated_rows", "estimated_cost", "full_scans")
+
+    def __init__(self, supported: bool = True, estimated_rows: Optional[float] = None,
+                 estimated_cost: Optional[float] = None,
+                 full_scans: Optional[Dict[str, Optional[float]]] = None):
+        self.supported = supported
+        self.estimated_rows = estimated_rows
+        self.estimated_cost = estimated_cost
+        self.full_scans = full_scans or {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "supported": self.supported,
+            "estimated_rows": self.estimated_rows,
+            "estimated_cost": self.estimated_cost,
+            "full_scans": dict(self.full_scans),
+        }
+
+
+class CostVerdict:
+    """
+    Outcome of checking a statement against a ``CostPolicy``.
+
+    Attributes:
+        sql (str): Statement to execute; rewritten for the ``limit`` / ``sample`` actions
+        plan (QueryPlan): Planner estimates the decision was based on
+        reasons (List[str]): Thresholds the statement exceeded
+        action (Optional[str]): Action taken, or None when within budget
+    """
+
+    __slots__ = ("sql", "plan", "reasons", "action")
+
+    def __init__(self, sql: str, plan: QueryPlan, reasons: List[str], action: Optional[str]):
+        self.sql = sql
+        self.plan = plan
+        self.reasons = reasons
+        self.action = action
+
+    @property
+    def rejected(self) -> bool:
+        return self.action == "reject"
+
+
+def explain_statement(sql: str, dialect: str) -> Optional[str]:
+    """EXPLAIN statement for ``sql`` on ``dialect``, or None when not supported."""
+    sql = sql.strip().rstrip(";")
+    if dialect == "sqlite":
+        return f"EXPLAIN QUERY PLAN {sql}"
+    if dialect == "postgresql":
+        return f"EXPLAIN (FORMAT JSON) {sql}"
+    if dialect == "mysql":
+        return f"EXPLAIN FORMAT=JSON {sql}"
+    # SQL Server needs SHOWPLAN in its own batch and Oracle writes to PLAN_TABLE
+    return None
+
+
+def table_aliases(sql: str) -> Dict[str, str]:
+    """Map of lower-cased aliases (and bare names) to the tables they refer to."""
+    aliases = {}
+    for match in _TABLE_REFERENCE.finditer(sql):
+        table = match.group("table").strip('"').split(".")[-1]
+        aliases[table.lower()] = table
+        alias = match.group("alias")
+        if alias:
+            aliases[alias.split()[-1].lower()] = table
+    return aliases
+
+
+def _json_payload(value: Any) -> Any:
+    if isinstance(value, (bytes, bytearray)):
+        value = value.decode()
+    if isinstance(value, str):
+        return json.loads(value)
+    return value
+
+
+def _float(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_sqlite_plan(sql: str, rows: List[Any]) -> QueryPlan:
+    aliases = table_aliases(sql)
+    full_scans = {}
+    for row in rows:
+        match = _SQLITE_SCAN.match(str(row[-1]))
+        if match is None:
+            continue
+        name = match.group("name")
+        table = aliases.get(name.lower())
+        # CTEs, subqueries and constant rows have no alias entry
+        if table is not None:
+            full_scans[table] = None
+    return QueryPlan(full_scans=full_scans)
+
+
+def _parse_postgresql_plan(rows: List[Any]) -> QueryPlan:
+    document = _json_payload(rows[0][0])
+    root = document[0]["Plan"]
+    full_scans = {}
+    nodes = [root]
+    while nodes:
+        node = nodes.pop()
+        if node.get("Node Type") == "Seq Scan" and node.get("Relation Name"):
+            relation = node["Relation Name"]
+            full_scans[relation] = max(full_scans.get(relation) or 0, _float(node.get("Plan Rows")) or 0)
+        nodes.extend(node.get("Plans", []))
+    return QueryPlan(
+        estimated_rows=_float(root.get("Plan Rows")),
+        estimated_cost=_float(root.get("Total Cost")),
+        full_scans=full_scans
+    )
+
+
+def _parse_mysql_plan(rows: List[Any]) -> QueryPlan:
+    document = _json_payload(rows[0][0])
+    block = document.get("query_block", {})
+    full_scans = {}
+    estimated_rows = None
+    nodes = [block]
+    while nodes:
+        node = nodes.pop()
+        if isinstance(node, list):
+            nodes.extend(node)
+            continue
+        if not isinstance(node, dict):
+            continue
+        if "table_name" in node and "access_type" in node:
+            produced = _float(node.get("rows_produced_per_join"))
+            if produced is not None:
+                estimated_rows = max(estimated_rows or 0, produced)
+            if node["access_type"] == "ALL":
+                full_scans[node["table_name"]] = _float(node.get("rows_examined_per_scan"))
+        nodes.extend(value for value in node.values() if isinstance(value, (dict, list)))
+    return QueryPlan(
+        estimated_rows=estimated_rows,
+        estimated_cost=_float(block.get("cost_info", {}).get("query_cost")),
+        full_scans=full_scans
+    )
+
+
+def parse_plan(sql: str, dialect: str, rows: List[Any]) -> QueryPlan:
+    """
+    Extract estimates from the rows returned by ``explain_statement()``.
+
+    SQLite plans carry no row estimates; full-scan sizes are left as None for
+    the caller to fill in.
+    """
+    if dialect == "sqlite":
+        return _parse_sqlite_plan(sql, rows)
+    if dialect == "postgresql":
+        return _parse_postgresql_plan(rows)
+    if dialect == "mysql":
+        return _parse_mysql_plan(rows)
+    return QueryPlan(supported=False)
+
+
+def add_table_sample(sql: str, tables: List[str], percent: float) -> Optional[str]:
+    """
+    Rewrite references to ``tables`` to read a PostgreSQL ``TABLESAMPLE SYSTEM``.
+
+    Returns:
+        Optional[str]: Rewritten statement, or None if no reference was found
+    """
+    targets = {table.lower() for table in tables}
+    sampled = False
+
+    def _sample(match):
+        nonlocal sampled
+        table = match.group("table").strip('"').split(".")[-1].lower()
+        if table not in targets:
+            return match.group()
+        sampled = True
+        return f"{match.group()} TABLESAMPLE SYSTEM ({percent:g})"
+
+    rewritten = _TABLE_REFERENCE.sub(_sample, sql)
+    return rewritten if sampled else None
+
+
+def limit_table_reads(sql: str, tables: List[str], dialect: str, rows: int) -> Optional[str]:
+    """
+    Rewrite references to ``tables`` to read at most ``rows`` rows of each table.
+
+    Each reference becomes a row-capped derived table under the same alias.
+    Used where ``TABLESAMPLE`` is unavailable; the rows read are simply the
+    first the database returns rather than a random sample.
+
+    Returns:
+        Optional[str]: Rewritten statement, or None if no reference was found
+    """
+    targets = {table.lower() for table in tables}
+    limited = False
+
+    def _limit(match):
+        nonlocal limited
+        table = match.group("table")
+        if table.strip('"').split(".")[-1].lower() not in targets:
+            return match.group()
+        limited = True
+        alias = match.group("alias")
+        name = alias.split()[-1] if alias else table.split(".")[-1]
+        return f"{match.group('head')}({apply_row_cap(f'SELECT * FROM {table}', dialect, rows)}) {name}"
+
+    rewritten = _TABLE_REFERENCE.sub(_limit, sql)
+    return rewritten if limited else None
+
+
+class CostPolicy:
+    """
+    Thresholds for the pre-flight check and what to do when one is exceeded.
+
+    Args:
+        max_estimated_rows (float): Largest estimated result size; 0 disables the check
+        max_estimated_cost (float): Largest planner cost; 0 disables the check
+        max_scan_rows (float): Largest table that may be scanned in full; 0 disables the check
+        action (str): ``reject``, ``limit`` or ``sample``
+        limit_rows (int): Row cap applied by the ``limit`` action
+        sample_percent (float): Table sample size used by the ``sample`` action
+    """
+
+    def __init__(self, max_estimated_rows: float = 0, max_estimated_cost: float = 0,
+                 max_scan_rows: float = 0, action: str = "reject", limit_rows: int = 1000,
+                 sample_percent: float = 1.0):
+        if action not in COST_ACTIONS:
+            raise ValueError(f"Unknown cost gate action '{action}'; expected one of {', '.join(COST_ACTIONS)}")
+        self.max_estimated_rows = max_estimated_rows
+        self.max_estimated_cost = max_estimated_cost
+        self.max_scan_rows = max_scan_rows
+        self.action = action
+        self.limit_rows = limit_rows
+        self.sample_percent = sample_percent
+
+    def violations(self, plan: QueryPlan) -> List[str]:
+        """Human-readable list of the thresholds ``plan`` exceeds."""
+        reasons = []
+        if self.max_estimated_rows and (plan.estimated_rows or 0) > self.max_estimated_rows:
+            reasons.append(f"estimated {plan.estimated_rows:,.0f} rows exceeds {self.max_estimated_rows:,.0f}")
+        if self.max_estimated_cost and (plan.estimated_cost or 0) > self.max_estimated_cost:
+            reasons.append(f"estimated cost {plan.estimated_cost:,.0f} exceeds {self.max_estimated_cost:,.0f}")
+        if self.max_scan_rows:
+            for table, rows in plan.full_scans.items():
+                if rows is not None and rows > self.max_scan_rows:
+                    reasons.append(f"full scan of {table} ({rows:,.0f} rows) exceeds {self.max_scan_rows:,.0f}")
+        return reasons
+
+    def evaluate(self, sql: str, plan: QueryPlan, dialect: str) -> CostVerdict:
+        """
+        Decide whether and how ``sql`` may run.
+
+        Args:
+            sql (str): Statement that was explained
+            plan (QueryPlan): Its planner estimates
+            dialect (str): SQLAlchemy dialect name
+
+        Returns:
+            CostVerdict: Statement to run and the action taken
+        """
+        reasons = self.violations(plan)
+        if not reasons:
+            return CostVerdict(sql, plan, reasons, None)
+
+        if self.action == "sample":
+            large_tables = [
+                table for table, rows in plan.full_scans.items()
+                if rows is None or not self.max_scan_rows or rows > self.max_scan_rows
+            ]
+            sampled = add_table_sample(sql, large_tables, self.sample_percent) if dialect == "postgresql" else None
+            if sampled is not None:
+                return CostVerdict(sampled, plan, reasons, "sample")
+            # No TABLESAMPLE support for this dialect or query shape; cap the result instead
+            return CostVerdict(apply_row_cap(sql, dialect, self.limit_rows), plan, reasons, "limit")
+        if self.action == "limit":
+            return CostVerdict(apply_row_cap(sql, dialect, self.limit_rows), plan, reasons, "limit")
+        return CostVerdict(sql, plan, reasons, "reject")
+
+
+class PlanCache:
+    """
+    Thread-safe LRU of ``QueryPlan`` objects keyed by a hash of the SQL text
+    and its bound parameters.
+
+    Literals lifted into bind parameters still steer the planner (e.g. a
+    selective versus a catch-all filter value), so a plan is only reused for
+    the same parameter values.
+
+    Args:
+        max_size (int): Maximum number of cached plans
+    """
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._plans: "OrderedDict[str, QueryPlan]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(sql: str, connection_id: str = "", params: Optional[Dict] = None) -> str:
+        params_repr = repr(sorted((params or {}).items()))
+        return hashlib.sha256(f"{connection_id}\0{sql}\0{params_repr}".encode()).hexdigest()
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._plans
+
+    def get(self, key: str) -> Optional[QueryPlan]:
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is None:
+                self.misses += 1
+                return None
+            self._plans.move_to_end(key)
+            self.hits += 1
+            return plan
+
+    def peek(self, key: str) -> Optional[QueryPlan]:
+        """Cached plan for ``key`` without counting a hit or miss or refreshing its position."""
+        with self._lock:
+            return self._plans.get(key)
+
+    def put(self, key: str, plan: QueryPlan):
+        with self._lock:
+            self._plans[key] = plan
+            self._plans.move_to_end(key)
+            if len(self._plans) > self.max_size:
+                self._plans.popitem(last=False)
+
+    def clear(self):
+        """Drop every cached plan."""
+        with self._lock:
+            self._plans.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._plans),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
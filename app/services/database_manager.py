@@ -1,10 +1,52 @@
-from sqlalchemy import create_engine, MetaData, inspect, text, URL
+from sqlalchemy import create_engine, MetaData, inspect, text, URL, make_url
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
-from typing import Dict, List, Optional, Any, Union
+from typing import Dict, List, Optional, Any, Union, Iterator, AsyncIterator, Callable, Tuple
 import os
+import asyncio
+import importlib.util
 from dotenv import load_dotenv
 import logging
+import hashlib
+import functools
+import threading
+import weakref
+from contextvars import ContextVar
+from contextlib import AsyncExitStack, ExitStack, contextmanager
+from app.services.result_set import ColumnarResult
+from app.services.engine_registry import EngineRegistry
+from app.services.engine_router import PRIMARY, SERVED_BY, EngineGroup, EngineTarget
+from app.services.fetch_tuning import FetchStats, expected_rows, install_fetch_tuning
+from app.services.cost_gate import (
+    CostPolicy, CostVerdict, PlanCache, QueryCostError, QueryPlan, add_table_sample, explain_statement,
+    limit_table_reads, parse_plan
+)
+from app.services.pool_policy import is_memory_sqlite, pool_options
+from app.services.pool_telemetry import instrument_engine, pool_summary
+from app.services.pool_warmer import PoolKeeper, prewarm
+from app.services.pagination import (
+    Page, apply_row_cap, build_keyset_query, cursor_params, decode_cursor, find_row_limit,
+    is_deterministic, make_buffer_cursor, make_cursor, null_keys, parse_group_by, parse_order_by,
+    renamed_columns, single_table
+)
+from app.services.result_cache import ResultCache, referenced_tables
+from app.services.single_flight import SingleFlight
+from app.services.sqlite_profile import install_sqlite_profile, sqlite_url
+from app.services.spill import BufferRegistry, ResultTooLargeError, estimate_rows_bytes
+from app.services.sql_classifier import ensure_read_only
+from app.services.table_mirror import MirrorRegistry, TableMirror
+from app.services.statement_cache import (
+    StatementCache, driver_statement_cache_args, install_driver_statement_cache
+)
+from app.services.query_control import (
+    CancelHandle, QueryCancelledError, QueryTimeoutError, await_cancellable, enforce_deadline,
+    enforce_deadline_async, install_cancel_hooks
+)
+from config.database_config import (
+    POOL_PREWARM_SETTINGS, POOL_TELEMETRY_SETTINGS, SQLITE_SETTINGS, ENGINE_REGISTRY_SETTINGS, FETCH_TUNING_SETTINGS, PREVIEW_SETTINGS, QUERY_COST_SETTINGS, QUERY_PAGINATION_SETTINGS, QUERY_TIMEOUT_SETTINGS,
+    READ_ROUTING_SETTINGS, RESULT_BUFFER_SETTINGS, RESULT_CACHE_SETTINGS, SINGLE_FLIGHT_SETTINGS,
+    STATEMENT_CACHE_SETTINGS, TABLE_MIRROR_SETTINGS
+)
 
 # Load environment variables
 load_dotenv()
@@ -13,14 +55,373 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class DatabaseManager:
-    """Manages database connections for different database types."""
+# Default number of rows fetched per round trip when streaming results
+DEFAULT_STREAM_BATCH_SIZE = 1000
+
+# asyncio drivers used for the async API, keyed by backend name
+ASYNC_DRIVERS = {
+    "sqlite": ("aiosqlite", "aiosqlite"),
+    "postgresql": ("asyncpg", "asyncpg"),
+    "mysql": ("aiomysql", "aiomysql"),
+}
+
+
+class RowStream:
+    """
+    Incremental view over a query result backed by a server-side cursor.
+
+    Rows are yielded in batches of at most ``batch_size`` dictionaries. The
+    underlying connection is returned to the pool as soon as the stream is
+    exhausted, closed explicitly or garbage collected, so callers that stop
+    early do not hold a pooled connection.
+    """
+
+    def __init__(self, connection, result, batch_size: int, cleanup: Optional[ExitStack] = None,
+                 cancel_handle: Optional[CancelHandle] = None,
+                 on_close: Optional[Callable[[int], None]] = None):
+        self._connection = connection
+        self._result = result
+        self._cleanup = cleanup
+        self._on_close = on_close
+        self.cancel_handle = cancel_handle
+        self.batch_size = batch_size
+        self.columns: List[str] = list(result.keys())
+        self.rows_fetched = 0
+        self.closed = False
+
+    def __iter__(self) -> Iterator[List[Dict]]:
+        return self.batches()
+
+    def __enter__(self) -> "RowStream":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __del__(self):
+        self.close()
+
+    def batches(self) -> Iterator[List[Dict]]:
+        """Yield rows in batches of dictionaries until the result is exhausted."""
+        columns = self.columns
+        for rows in self.raw_batches():
+            yield [dict(zip(columns, row)) for row in rows]
+
+    def raw_batches(self) -> Iterator[List[Any]]:
+        """Yield rows in batches of row tuples until the result is exhausted."""
+        try:
+            while not self.closed:
+                rows = self._result.fetchmany(self.batch_size)
+                if not rows:
+                    break
+                self.rows_fetched += len(rows)
+                yield rows
+        except Exception as e:
+            if self.cancel_handle is not None:
+                self.cancel_handle.check()
+            raise RuntimeError(f"Error streaming query results: {str(e)}")
+        finally:
+            self.close()
+
+    def rows(self) -> Iterator[Dict]:
+        """Yield rows one at a time."""
+        for batch in self.batches():
+            yield from batch
+
+    def close(self):
+        """Close the cursor and release the pooled connection."""
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self._result.close()
+        except Exception:
+            pass
+        try:
+            if self._cleanup is not None:
+                self._cleanup.close()
+        except Exception:
+            pass
+        try:
+            self._connection.close()
+        except Exception:
+            pass
+        if self._on_close is not None:
+            self._on_close(self.rows_fetched)
+
+
+class AsyncRowStream:
+    """
+    Async counterpart of ``RowStream`` over an ``AsyncEngine`` streaming result.
+
+    Iterate with ``async for``; the pooled connection is released when the
+    stream is exhausted or ``aclose()`` is awaited.
+    """
+
+    def __init__(self, connection, result, batch_size: int, cleanup: AsyncExitStack,
+                 cancel_handle: Optional[CancelHandle] = None):
+        self._connection = connection
+        self._result = result
+        self._cleanup = cleanup
+        self.cancel_handle = cancel_handle
+        self.batch_size = batch_size
+        self.columns: List[str] = list(result.keys())
+        self.rows_fetched = 0
+        self.closed = False
+
+    def __aiter__(self) -> AsyncIterator[List[Dict]]:
+        return self.batches()
+
+    async def __aenter__(self) -> "AsyncRowStream":
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+
+    async def batches(self) -> AsyncIterator[List[Dict]]:
+        """Yield rows in batches of dictionaries until the result is exhausted."""
+        columns = self.columns
+        try:
+            while not self.closed:
+                rows = await await_cancellable(self._connection, self._result.fetchmany(self.batch_size))
+                if not rows:
+                    break
+                self.rows_fetched += len(rows)
+                yield [dict(zip(columns, row)) for row in rows]
+        except (QueryTimeoutError, QueryCancelledError):
+            raise
+        except Exception as e:
+            if self.cancel_handle is not None:
+                self.cancel_handle.check()
+            raise RuntimeError(f"Error streaming query results: {str(e)}")
+        finally:
+            await self.aclose()
+
+    async def aclose(self):
+        """Close the cursor and release the pooled connection."""
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            await self._result.close()
+        except Exception:
+            pass
+        try:
+            await self._cleanup.aclose()
+        except Exception:
+            pass
+
+
+class ThreadedRowStream(AsyncRowStream):
+    """
+    ``AsyncRowStream`` interface over a blocking ``RowStream``.
+
+    Used for backends without an asyncio driver; each batch is fetched on a
+    worker thread so the event loop is never blocked.
+    """
+
+    def __init__(self, stream: RowStream):
+        self._stream = stream
+        self._raw_batches = stream.raw_batches()
+        self.cancel_handle = stream.cancel_handle
+        self.batch_size = stream.batch_size
+        self.columns = stream.columns
+        self.rows_fetched = 0
+        self.closed = False
+
+    async def batches(self) -> AsyncIterator[List[Dict]]:
+        columns = self.columns
+        try:
+            while not self.closed:
+                rows = await asyncio.to_thread(next, self._raw_batches, None)
+                if rows is None:
+                    break
+                self.rows_fetched = self._stream.rows_fetched
+                yield [dict(zip(columns, row)) for row in rows]
+        finally:
+            await self.aclose()
+
+    async def aclose(self):
+        if self.closed:
+            return
+        self.closed = True
+        await asyncio.to_thread(self._stream.close)
+
+
+class _RowBudget:
+    """Running memory estimate of the rows materialized for one query."""
+    
+    def __init__(self, limit: Optional[int] = None):
+        self.limit = RESULT_BUFFER_SETTINGS["memory_budget"] if limit is None else limit
+        self.used = 0
     
+    def consume(self, columns: List[str], batch: List[Any]) -> List[Dict]:
+        """Convert a batch of row tuples to dictionaries, raising once the budget is spent."""
+        rows = [dict(zip(columns, row)) for row in batch]
+        self.used += estimate_rows_bytes(rows)
+        if self.limit and self.used > self.limit:
+            raise ResultTooLargeError(
+                f"Result exceeds the {self.limit:,} byte per-query memory budget; "
+                "fetch it page by page or stream it instead"
+            )
+        return rows
+
+
+def _release_held(engines: EngineRegistry, held: List[Any]):
+    """Release every engine in ``held`` back to ``engines`` and empty the list."""
+    while held:
+        engines.release(held.pop())
+
+
+class _Connection:
+    """
+    One established connection of a ``DatabaseManager``.
+
+    Built completely before it is published and never changed afterwards
+    (apart from lazily reflected metadata), so a query sees either the old or
+    the new connection, never a mix. Queries pin the connection they started
+    on; once it is replaced, its engines go back to the registry when the
+    last pinned query finishes.
+    """
+
+    def __init__(self, engine, engine_group: EngineGroup, session, base, info: Dict[str, Any],
+                 acquired: List[Any], mirror: Optional[TableMirror] = None,
+                 release_mirror: Optional[Callable[[], None]] = None):
+        self.engine = engine
+        self.engine_group = engine_group
+        self.session = session
+        self.base = base
+        self.info = info
+        self.acquired = acquired
+        self.mirror = mirror
+        # Also runs if the connection is garbage collected without being retired
+        self._release_mirror = weakref.finalize(self, release_mirror) if release_mirror else None
+        self.primary_keys: Dict[str, List[str]] = {}
+        self.table_names = None
+        self._pins = 0
+        self._retired = False
+        self._lock = threading.Lock()
+
+    def pin(self):
+        with self._lock:
+            self._pins += 1
+
+    def unpin(self, engines: EngineRegistry, held: List[Any]):
+        with self._lock:
+            self._pins -= 1
+            drained = self._retired and self._pins == 0
+        if drained:
+            self._release(engines, held)
+
+    def retire(self, engines: EngineRegistry, held: List[Any]):
+        """Mark the connection replaced; releases its engines now or after the last pinned query."""
+        with self._lock:
+            self._retired = True
+            drained = self._pins == 0
+        if drained:
+            self._release(engines, held)
+
+    def _release(self, engines: EngineRegistry, held: List[Any]):
+        for engine in self.acquired:
+            try:
+                held.remove(engine)
+            except ValueError:
+                # Already handed back by the manager's finalizer
+                continue
+            engines.release(engine)
+        if self._release_mirror is not None:
+            self._release_mirror()
+
+
+def _pins_connection(method):
+    """Run ``method`` against the connection published when it is called, even if the manager reconnects meanwhile."""
+    if asyncio.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def pinned_async(self, *args, **kwargs):
+            with self._pin():
+                return await method(self, *args, **kwargs)
+        return pinned_async
+
+    @functools.wraps(method)
+    def pinned(self, *args, **kwargs):
+        with self._pin():
+            return method(self, *args, **kwargs)
+    return pinned
+
+
+class QueryCaches:
+    """
+    Statement, plan and result caches plus in-flight coalescing.
+
+    One instance is shared by every ``DatabaseManager`` of the process, like
+    the engine registry. Entries are keyed by statement and connection
+    identity, so managers connected to the same database (e.g. UI sessions)
+    hit each other's entries and memory does not grow with the session count.
+    """
+
     def __init__(self):
-        self.current_engine = None
-        self.current_session = None
-        self.current_base = None
-        self.connection_info = {}
+        self.statement_cache = StatementCache(STATEMENT_CACHE_SETTINGS["max_size"])
+        self.plan_cache = PlanCache(QUERY_COST_SETTINGS["plan_cache_size"])
+        self.single_flight = SingleFlight() if SINGLE_FLIGHT_SETTINGS["enabled"] else None
+        self.result_cache = None
+        if RESULT_CACHE_SETTINGS["enabled"]:
+            self.result_cache = ResultCache(
+                max_bytes=RESULT_CACHE_SETTINGS["max_bytes"],
+                max_entry_bytes=RESULT_CACHE_SETTINGS["max_entry_bytes"],
+                compression_level=RESULT_CACHE_SETTINGS["compression_level"],
+                probe_interval=RESULT_CACHE_SETTINGS["probe_interval"]
+            )
+
+
+class DatabaseManager:
+    """
+    Manages database connections for different database types.
+    
+    ``connect()`` builds and tests the new engines before swapping them in,
+    and publishes the connection as a single immutable handle. Queries keep
+    using the connection they started on, so reconnecting or disconnecting
+    while other threads are querying never fails their queries.
+    
+    Args:
+        engines (Optional[EngineRegistry]): Registry the engines are shared through;
+            defaults to the process-wide registry
+        caches (Optional[QueryCaches]): Caches shared with other managers;
+            defaults to the process-wide caches
+    """
+    
+    def __init__(self, engines: Optional[EngineRegistry] = None, caches: Optional[QueryCaches] = None):
+        self.engines = engines if engines is not None else engine_registry
+        caches = caches if caches is not None else query_caches
+        # Engines acquired from the registry; handed back on reconnect, disconnect
+        # or when the manager is garbage collected (e.g. a UI session ends)
+        self._held_engines: List[Any] = []
+        weakref.finalize(self, _release_held, self.engines, self._held_engines)
+        # Published connection, replaced under the lock; queries pin it through a context variable
+        self._published: Optional[_Connection] = None
+        self._publish_lock = threading.Lock()
+        self._pinned: ContextVar[Optional[_Connection]] = ContextVar(f"db_connection_{id(self)}", default=None)
+        self._active_queries: Dict[str, CancelHandle] = {}
+        self._active_queries_lock = threading.Lock()
+        self.statement_cache = caches.statement_cache
+        self.plan_cache = caches.plan_cache
+        self.single_flight = caches.single_flight
+        self.result_cache = caches.result_cache
+        # Buffered pages belong to this manager's callers
+        self.buffers = BufferRegistry(
+            ttl=RESULT_BUFFER_SETTINGS["buffer_ttl_seconds"],
+            max_entries=RESULT_BUFFER_SETTINGS["max_buffered_results"]
+        )
+        self.fetch_stats = FetchStats()
+        self.cost_policy = None
+        if QUERY_COST_SETTINGS["enabled"]:
+            self.cost_policy = CostPolicy(
+                max_estimated_rows=QUERY_COST_SETTINGS["max_estimated_rows"],
+                max_estimated_cost=QUERY_COST_SETTINGS["max_estimated_cost"],
+                max_scan_rows=QUERY_COST_SETTINGS["max_scan_rows"],
+                action=QUERY_COST_SETTINGS["action"],
+                limit_rows=QUERY_COST_SETTINGS["limit_rows"],
+                sample_percent=QUERY_COST_SETTINGS["sample_percent"]
+            )
         
     def get_connection_string(self, db_type: str, **kwargs) -> str:
         """
@@ -28,14 +429,19 @@ class DatabaseManager:
         
         Args:
             db_type (str): Type of database ('sqlite', 'postgresql', 'mysql', 'sqlserver', 'oracle')
-            **kwargs: Connection parameters
+            **kwargs: Connection parameters; SQLite also takes ``read_only`` and
+                ``immutable`` (defaults from ``SQLITE_SETTINGS``)
             
         Returns:
             str: SQLAlchemy connection string
         """
         if db_type.lower() == 'sqlite':
             db_path = kwargs.get('db_path', 'data/sample.db')
-            return f"sqlite:///{db_path}"
+            return sqlite_url(
+                db_path,
+                read_only=kwargs.get('read_only', SQLITE_SETTINGS["read_only"]),
+                immutable=kwargs.get('immutable', SQLITE_SETTINGS["immutable"])
+            )
             
         elif db_type.lower() == 'postgresql':
             host = kwargs.get('host', 'localhost')
@@ -143,85 +549,236 @@ class DatabaseManager:
         else:
             raise ValueError(f"Unsupported database type: {db_type}")
     
-    def connect(self, db_type: str, **kwargs) -> bool:
+    def connect(self, db_type: str, replicas: Optional[List[Dict[str, Any]]] = None, **kwargs) -> bool:
         """
         Connect to a database with the specified parameters.
         
         Args:
             db_type (str): Type of database
+            replicas (Optional[List[Dict[str, Any]]]): Connection parameters of read
+                replicas of the same type (or copies of a read-only SQLite file);
+                read-only queries are load-balanced across them
             **kwargs: Connection parameters
             
         Returns:
             bool: True if connection successful, False otherwise
         """
+        acquired = []
         try:
-            # Close existing connection if any
-            if self.current_engine:
-                self.current_engine.dispose()
-            
             # Generate connection string
             connection_string = self.get_connection_string(db_type, **kwargs)
             logger.info(f"Attempting to connect with: {connection_string}")
             
-            # Create engine with appropriate settings
-            if db_type.lower() == 'sqlite':
-                self.current_engine = create_engine(
-                    connection_string,
-                    pool_size=5,
-                    max_overflow=10,
-                    pool_timeout=30,
-                    pool_recycle=1800,
-                    connect_args={"check_same_thread": False}
-                )
-            else:
-                # Common settings for other database types
-                engine_kwargs = {
-                    "pool_size": 5,
-                    "max_overflow": 10,
-                    "pool_timeout": 30,
-                    "pool_recycle": 1800
-                }
-                
-                # Add database-specific settings
-                if db_type.lower() == 'mysql':
-                    engine_kwargs["connect_args"] = {
-                        "charset": kwargs.get('charset', 'utf8mb4'),
-                        "autocommit": False
-                    }
-                elif db_type.lower() == 'oracle':
-                    engine_kwargs["connect_args"] = {
-                        "encoding": kwargs.get('encoding', 'UTF-8'),
-                        "nencoding": kwargs.get('encoding', 'UTF-8')
-                    }
-                
-                self.current_engine = create_engine(connection_string, **engine_kwargs)
+            engine = self._acquire_engine(db_type, connection_string, **kwargs)
+            acquired.append(engine)
             
             # Test connection
-            with self.current_engine.connect() as conn:
+            with engine.connect() as conn:
                 conn.execute(text("SELECT 1"))
             
-            # Create session and base
-            self.current_session = sessionmaker(autocommit=False, autoflush=False, bind=self.current_engine)
-            self.current_base = declarative_base()
+            replica_engines = {}
+            for index, replica_params in enumerate(replicas or [], start=1):
+                name = replica_params.get("name") or f"replica{index}"
+                replica_params = {key: value for key, value in replica_params.items() if key != "name"}
+                replica_engines[name] = self._acquire_engine(
+                    db_type, self.get_connection_string(db_type, **replica_params), **replica_params
+                )
+                acquired.append(replica_engines[name])
+            
+            # Open and validate the idle floor of every pool before reporting ready
+            prewarm(acquired, POOL_PREWARM_SETTINGS["min_idle"], POOL_PREWARM_SETTINGS["timeout"])
+            pool_keeper.start()
+            
+            mirror, release_mirror = None, None
+            if TABLE_MIRROR_SETTINGS["enabled"] and engine.dialect.name in TABLE_MIRROR_SETTINGS["dialects"]:
+                mirror, release_mirror = table_mirrors.acquire(
+                    EngineRegistry.make_key(db_type, connection_string),
+                    engine,
+                    label=make_url(connection_string).render_as_string(hide_password=True)
+                )
             
-            # Store connection info
-            self.connection_info = {
-                'type': db_type,
-                'parameters': kwargs,
-                'connection_string': connection_string
-            }
+            engine_group = EngineGroup(
+                engine,
+                replica_engines,
+                include_primary=READ_ROUTING_SETTINGS["include_primary"],
+                max_lag_seconds=READ_ROUTING_SETTINGS["max_lag_seconds"],
+                lag_check_interval=READ_ROUTING_SETTINGS["lag_check_interval"],
+                eject_seconds=READ_ROUTING_SETTINGS["eject_seconds"],
+                max_eject_seconds=READ_ROUTING_SETTINGS["max_eject_seconds"]
+            )
             
-            logger.info(f"Successfully connected to {db_type} database")
+            connection = _Connection(
+                engine,
+                engine_group,
+                session=sessionmaker(autocommit=False, autoflush=False, bind=engine),
+                base=declarative_base(),
+                info={
+                    'type': db_type,
+                    'parameters': kwargs,
+                    'connection_string': connection_string,
+                    'replicas': list(replica_engines)
+                },
+                acquired=acquired,
+                mirror=mirror,
+                release_mirror=release_mirror
+            )
+            self._held_engines.extend(acquired)
+            # Queries already running finish on the previous connection
+            self._publish(connection)
+            
+            logger.info(f"Successfully connected to {db_type} database with {len(replica_engines)} read replica(s)")
             return True
             
         except Exception as e:
             logger.error(f"Failed to connect to {db_type} database: {str(e)}")
-            self.current_engine = None
-            self.current_session = None
-            self.current_base = None
-            self.connection_info = {}
+            # The previous connection, if any, stays in place
+            for engine in acquired:
+                self.engines.release(engine, discard=True)
             return False
     
+    def _acquire_engine(self, db_type: str, connection_string: str, **kwargs):
+        """Shared engine for ``connection_string``, reusing a warm one from the registry."""
+        url = make_url(connection_string)
+        return self.engines.acquire(
+            EngineRegistry.make_key(db_type, connection_string),
+            lambda: self._create_engine(db_type, connection_string, **kwargs),
+            label=url.render_as_string(hide_password=True)
+        )
+    
+    def _publish(self, connection: Optional[_Connection]):
+        """Swap in ``connection`` (None to disconnect) and retire the previous one."""
+        with self._publish_lock:
+            previous, self._published = self._published, connection
+        if previous is not None:
+            # Cached plans are scoped by connection id and shared with other
+            # managers, so only this manager's buffered pages are dropped
+            self.buffers.clear()
+            previous.retire(self.engines, self._held_engines)
+    
+    @contextmanager
+    def _pin(self):
+        """Keep the calling thread or task on the connection published now until the block exits."""
+        if self._pinned.get() is not None:
+            yield
+            return
+        with self._publish_lock:
+            connection = self._published
+            if connection is not None:
+                connection.pin()
+        token = self._pinned.set(connection)
+        try:
+            yield
+        finally:
+            self._pinned.reset(token)
+            if connection is not None:
+                connection.unpin(self.engines, self._held_engines)
+    
+    @property
+    def _connection(self) -> Optional[_Connection]:
+        pinned = self._pinned.get()
+        return pinned if pinned is not None else self._published
+    
+    @property
+    def current_engine(self):
+        """Engine of the connection this thread or task is using."""
+        connection = self._connection
+        return connection.engine if connection is not None else None
+    
+    @property
+    def current_session(self):
+        """Session factory bound to ``current_engine``."""
+        connection = self._connection
+        return connection.session if connection is not None else None
+    
+    @property
+    def current_base(self):
+        """Declarative base of the current connection."""
+        connection = self._connection
+        return connection.base if connection is not None else None
+    
+    @property
+    def engine_group(self) -> Optional[EngineGroup]:
+        """Primary and read replicas of the current connection."""
+        connection = self._connection
+        return connection.engine_group if connection is not None else None
+    
+    @property
+    def connection_info(self) -> Dict[str, Any]:
+        """Type, parameters and connection string of the current connection."""
+        connection = self._connection
+        return connection.info if connection is not None else {}
+    
+    def _create_engine(self, db_type: str, connection_string: str, **kwargs):
+        """Create an engine with pool, statement cache and cancel hooks configured for ``db_type``."""
+        # Pool class and sizing per dialect and workload
+        engine_kwargs = pool_options(connection_string)
+        engine_kwargs["query_cache_size"] = STATEMENT_CACHE_SETTINGS["compiled_cache_size"]
+        connect_args = engine_kwargs["connect_args"]
+        
+        if db_type.lower() == 'sqlite':
+            connect_args.update(
+                check_same_thread=False,
+                **driver_statement_cache_args(db_type, STATEMENT_CACHE_SETTINGS["driver_cache_size"])
+            )
+        # Add database-specific settings
+        elif db_type.lower() == 'mysql':
+            connect_args.update(charset=kwargs.get('charset', 'utf8mb4'), autocommit=False)
+        elif db_type.lower() == 'oracle':
+            connect_args.update(
+                encoding=kwargs.get('encoding', 'UTF-8'),
+                nencoding=kwargs.get('encoding', 'UTF-8')
+            )
+        
+        engine = create_engine(connection_string, **engine_kwargs)
+        
+        install_sqlite_profile(engine, SQLITE_SETTINGS)
+        if POOL_TELEMETRY_SETTINGS["enabled"]:
+            instrument_engine(engine, engine.url.render_as_string(hide_password=True))
+        install_cancel_hooks(engine)
+        install_driver_statement_cache(engine, db_type, STATEMENT_CACHE_SETTINGS["driver_cache_size"])
+        install_fetch_tuning(engine, FETCH_TUNING_SETTINGS["arraysize"], FETCH_TUNING_SETTINGS["prefetch_rows"])
+        return engine
+    
+    def _read_connection(self):
+        """Connection for a read-only query, routed to the least loaded healthy replica."""
+        if self.engine_group is None:
+            return self.current_engine.connect()
+        return self.engine_group.connect()
+    
+    def _read_connection_async(self):
+        return self.engine_group.connect_async(self._async_engine_for)
+    
+    def get_routing_stats(self) -> Dict[str, Any]:
+        """Outstanding requests, totals, ejections and lag per engine."""
+        if self.engine_group is None:
+            return {}
+        return self.engine_group.stats()
+    
+    def get_pool_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Checked-out, overflow and waiting connections, saturation and checkout wait per engine."""
+        return pool_summary()
+    
+    @_pins_connection
+    def query_concurrency(self) -> int:
+        """
+        Number of queries that can run at once without waiting on a pool.
+        
+        The steady-state pool size of every engine reads are routed to;
+        overflow connections are left for callers outside the batch.
+        
+        Returns:
+            int: At least 1
+        """
+        if not self.is_connected():
+            return 1
+        targets = self.engine_group.targets if self.engine_group is not None else []
+        engines = [target.engine for target in targets] or [self.current_engine]
+        total = 0
+        for engine in engines:
+            size = getattr(engine.pool, "size", None)
+            total += size() if callable(size) else 1
+        return max(1, total)
+    
     def get_connection_info(self) -> Dict[str, Any]:
         """Get current connection information."""
         return self.connection_info.copy()
@@ -248,6 +805,7 @@ class DatabaseManager:
             raise RuntimeError("Not connected to any database")
         return self.current_base
     
+    @_pins_connection
     def test_connection(self) -> bool:
         """Test if current connection is still valid."""
         if not self.is_connected():
@@ -260,6 +818,7 @@ class DatabaseManager:
         except Exception:
             return False
     
+    @_pins_connection
     def get_schema_info(self) -> Dict[str, List[Dict[str, Any]]]:
         """
         Get database schema information including tables and columns.
@@ -288,47 +847,1001 @@ class DatabaseManager:
         
         return schema_info
     
-    def execute_query(self, query: str, params: Optional[Dict] = None) -> List[Dict]:
+    @_pins_connection
+    def execute_query(self, query: str, params: Optional[Dict] = None,
+                      cancel_handle: Optional[CancelHandle] = None) -> List[Dict]:
         """
         Execute a SQL query and return results.
         
+        Concurrent calls with the same statement and parameters share a
+        single execution; see ``SingleFlight``.
+        
         Args:
             query (str): SQL query to execute
             params (Optional[Dict]): Query parameters
+            cancel_handle (Optional[CancelHandle]): Deadline and cancel switch;
+                defaults to the configured query timeout
             
         Returns:
             List[Dict]: Query results
+            
+        Raises:
+            QueryTimeoutError: If the query runs past its deadline
+            QueryCancelledError: If the query is cancelled through its handle
+            ResultTooLargeError: If the rows exceed the per-query memory budget
+        """
+        if not self.is_connected():
+            raise RuntimeError("Not connected to any database")
+        
+        self._validate_query(query)
+        
+        cancel_handle = cancel_handle or self.new_cancel_handle()
+        with self._track_query(cancel_handle):
+            # Hot tables may be mirrored locally
+            rows = self._mirror_rows(query, params, cancel_handle)
+            if rows is not None:
+                return rows
+            
+            # Serve repeated queries from the result cache while the data is unchanged
+            cache_slot, rows = self._cached_result(query, params)
+            if rows is not None:
+                return rows
+            
+            if self.single_flight is None:
+                return self._fetch_rows(query, params, cancel_handle, cache_slot)
+            return self.single_flight.do(
+                ResultCache.make_key(query, params, self._connection_id()),
+                lambda: self._fetch_rows(query, params, cancel_handle, cache_slot),
+                cancel_handle
+            )
+    
+    def _fetch_rows(self, query: str, params: Optional[Dict], cancel_handle: CancelHandle,
+                    cache_slot: Optional[tuple]) -> List[Dict]:
+        server_side = self._use_server_side_cursor(query, params)
+        arraysize = FETCH_TUNING_SETTINGS["arraysize"]
+        try:
+            with self._read_connection() as connection:
+                if server_side:
+                    connection = connection.execution_options(stream_results=True, max_row_buffer=arraysize)
+                with enforce_deadline(connection, cancel_handle):
+                    result = connection.execute(self._statement(query), params or {})
+                    columns, rows, budget = list(result.keys()), [], _RowBudget()
+                    while True:
+                        batch = result.fetchmany(DEFAULT_STREAM_BATCH_SIZE)
+                        if not batch:
+                            break
+                        rows.extend(budget.consume(columns, batch))
+                served_by = connection.info.get(SERVED_BY)
+        except (QueryTimeoutError, QueryCancelledError, ResultTooLargeError):
+            raise
+        except Exception as e:
+            raise RuntimeError(f"Error executing query: {str(e)}")
+        
+        self.fetch_stats.record(self.current_engine.dialect.name, len(rows), server_side, arraysize)
+        self._store_result(cache_slot, rows, served_by)
+        return rows
+    
+    def _use_server_side_cursor(self, query: str, params: Optional[Dict] = None) -> bool:
+        """
+        Whether to fetch ``query`` through a server-side (unbuffered) cursor.
+        
+        Results known to be small, from their LIMIT or a cached planner
+        estimate, arrive with the query on a buffered cursor. Large or
+        unknown ones are streamed so the driver never holds them whole.
+        """
+        dialect = self.current_engine.dialect.name
+        plan = self.plan_cache.peek(PlanCache.make_key(query, self._connection_id(), params))
+        rows = expected_rows(find_row_limit(query, dialect), plan)
+        return rows is None or rows > FETCH_TUNING_SETTINGS["server_side_threshold"]
+    
+    @_pins_connection
+    async def execute_query_async(self, query: str, params: Optional[Dict] = None,
+                                  cancel_handle: Optional[CancelHandle] = None) -> List[Dict]:
+        """
+        Execute a SQL query on the asyncio engine and return results.
+        
+        Backends without an installed asyncio driver run ``execute_query()``
+        on a worker thread instead.
+        
+        Args:
+            query (str): SQL query to execute
+            params (Optional[Dict]): Query parameters
+            cancel_handle (Optional[CancelHandle]): Deadline and cancel switch;
+                defaults to the configured query timeout
+            
+        Returns:
+            List[Dict]: Query results
+            
+        Raises:
+            QueryTimeoutError: If the query runs past its deadline
+            QueryCancelledError: If the query is cancelled through its handle
+            ResultTooLargeError: If the rows exceed the per-query memory budget
+        """
+        if not self.is_connected():
+            raise RuntimeError("Not connected to any database")
+        
+        if self._get_async_engine() is None:
+            return await asyncio.to_thread(self.execute_query, query, params, cancel_handle)
+        
+        self._validate_query(query)
+        
+        cancel_handle = cancel_handle or self.new_cancel_handle()
+        with self._track_query(cancel_handle):
+            if self._connection.mirror is not None:
+                rows = await asyncio.to_thread(self._mirror_rows, query, params, cancel_handle)
+                if rows is not None:
+                    return rows
+            
+            cache_slot, rows = await self._cached_result_async(query, params)
+            if rows is not None:
+                return rows
+            
+            if self.single_flight is None:
+                return await self._fetch_rows_async(query, params, cancel_handle, cache_slot)
+            return await self.single_flight.do_async(
+                ResultCache.make_key(query, params, self._connection_id()),
+                lambda: self._fetch_rows_async(query, params, cancel_handle, cache_slot),
+                cancel_handle
+            )
+    
+    async def _fetch_rows_async(self, query: str, params: Optional[Dict], cancel_handle: CancelHandle,
+                                cache_slot: Optional[tuple]) -> List[Dict]:
+        try:
+            async with self._read_connection_async() as connection:
+                async with enforce_deadline_async(connection, cancel_handle):
+                    result = await await_cancellable(
+                        connection, connection.stream(self._statement(query), params or {})
+                    )
+                    columns, rows, budget = list(result.keys()), [], _RowBudget()
+                    while True:
+                        batch = await await_cancellable(
+                            connection, result.fetchmany(DEFAULT_STREAM_BATCH_SIZE)
+                        )
+                        if not batch:
+                            break
+                        rows.extend(budget.consume(columns, batch))
+                served_by = connection.info.get(SERVED_BY)
+        except (QueryTimeoutError, QueryCancelledError, ResultTooLargeError):
+            raise
+        except Exception as e:
+            raise RuntimeError(f"Error executing query: {str(e)}")
+        
+        self.fetch_stats.record(self.current_engine.dialect.name, len(rows), True, DEFAULT_STREAM_BATCH_SIZE)
+        self._store_result(cache_slot, rows, served_by)
+        return rows
+    
+    def _mirror_rows(self, query: str, params: Optional[Dict],
+                     cancel_handle: CancelHandle) -> Optional[List[Dict]]:
+        """Rows of ``query`` from the local mirror of hot tables, or None if it has to run on the database."""
+        mirror = self._connection.mirror
+        if mirror is None:
+            return None
+        mirror.record(query)
+        return mirror.query(query, params, consume=_RowBudget().consume, cancel_handle=cancel_handle)
+    
+    def _cached_result(self, query: str, params: Optional[Dict]) -> Tuple[Optional[tuple], Optional[List[Dict]]]:
+        """
+        Look ``query`` up in the result cache.
+        
+        Results are cached per serving engine: a replica's answer is keyed by
+        that replica and versioned by its own data, so it is never returned
+        for another engine. Every engine reads may currently be routed to is
+        tried, the primary first.
+        
+        Returns:
+            tuple: (slots to store a fresh result under by cache scope, or None
+                when the result cannot be cached; cached rows, or None on a miss)
+        """
+        if self.result_cache is None:
+            return None, None
+        tables = referenced_tables(query)
+        if tables is None:
+            # Writes to a table the statement reads could not invalidate its result
+            return None, None
+        slots = {}
+        for scope, engine in self._cache_targets():
+            version, ttl = self._data_version(tables, scope, engine)
+            if version is None and not ttl:
+                continue
+            cache_key = ResultCache.make_key(query, params, scope)
+            rows = self.result_cache.get(cache_key, version)
+            if rows is not None:
+                return None, rows
+            slots[scope] = (cache_key, version, tables, ttl)
+        return slots or None, None
+    
+    async def _cached_result_async(self, query: str,
+                                   params: Optional[Dict]) -> Tuple[Optional[tuple], Optional[List[Dict]]]:
+        if (self.result_cache is not None
+                and self.current_engine.url.get_backend_name() != "sqlite"
+                and self.result_cache.has_probes(self._connection_id(), referenced_tables(query) or ())):
+            # Table-change probes run on the blocking engine
+            return await asyncio.to_thread(self._cached_result, query, params)
+        return self._cached_result(query, params)
+    
+    def _cache_targets(self) -> List[Tuple[str, Any]]:
+        """(cache scope, engine) of every engine reads may currently be routed to."""
+        if self.engine_group is None:
+            return [(self._connection_id(), self.current_engine)]
+        return [(self._cache_scope(target.name), target.engine) for target in self.engine_group.usable_targets()]
+    
+    def _cache_scope(self, target_name: Optional[str]) -> str:
+        """Result-cache scope of the connection's engine called ``target_name``."""
+        connection_id = self._connection_id()
+        if target_name is None or target_name == PRIMARY:
+            return connection_id
+        return f"{connection_id}:{target_name}"
+    
+    def _store_result(self, cache_slots: Optional[Dict[str, tuple]], rows: List[Dict],
+                      served_by: Optional[str]):
+        cache_slot = (cache_slots or {}).get(self._cache_scope(served_by))
+        if cache_slot is not None:
+            cache_key, version, tables, ttl = cache_slot
+            self.result_cache.put(cache_key, rows, version, tables, ttl)
+    
+    def _get_async_engine(self):
+        """
+        ``AsyncEngine`` for the primary, created on first use.
+        
+        Returns:
+            Optional[AsyncEngine]: None when the backend has no installed asyncio
+            driver (e.g. SQL Server, Oracle) or the database is in-memory SQLite,
+            whose data only exists on the blocking engine's connection
+        """
+        if self.engine_group is None:
+            return None
+        return self._async_engine_for(self.engine_group.primary)
+    
+    def _async_engine_for(self, target: EngineTarget):
+        return self.engines.async_engine(target.engine, self._create_async_engine)
+    
+    def _create_async_engine(self, sync_engine):
+        url = sync_engine.url
+        backend = url.get_backend_name()
+        driver = ASYNC_DRIVERS.get(backend)
+        if driver is None or importlib.util.find_spec(driver[1]) is None:
+            return None
+        try:
+            from sqlalchemy.ext.asyncio import create_async_engine
+        except ImportError as e:
+            logger.warning(f"asyncio engine unavailable, using worker threads: {str(e)}")
+            return None
+        if is_memory_sqlite(url):
+            return None
+        
+        engine_kwargs = pool_options(url, is_async=True)
+        engine_kwargs["query_cache_size"] = STATEMENT_CACHE_SETTINGS["compiled_cache_size"]
+        if backend == "sqlite":
+            engine_kwargs["connect_args"].update(
+                driver_statement_cache_args(backend, STATEMENT_CACHE_SETTINGS["driver_cache_size"])
+            )
+        
+        logger.info(f"Creating asyncio engine with driver {driver[0]}")
+        engine = create_async_engine(url.set(drivername=f"{backend}+{driver[0]}"), **engine_kwargs)
+        install_sqlite_profile(engine.sync_engine, SQLITE_SETTINGS)
+        if POOL_TELEMETRY_SETTINGS["enabled"]:
+            instrument_engine(engine.sync_engine, engine.url.render_as_string(hide_password=True))
+        return engine
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Hit rates and sizes of the statement and result caches, and query coalescing."""
+        return {
+            "statement_cache": self.statement_cache.stats(),
+            "plan_cache": self.plan_cache.stats(),
+            "result_buffers": self.buffers.stats(),
+            "single_flight": self.single_flight.stats() if self.single_flight is not None else None,
+            "fetch": self.fetch_stats.stats(),
+            "engines": self.engines.stats(),
+            "mirror": self._connection.mirror.stats() if self._connection and self._connection.mirror else None,
+            "result_cache": self.result_cache.stats() if self.result_cache is not None else None
+        }
+    
+    @_pins_connection
+    def check_query_cost(self, query: str, params: Optional[Dict] = None) -> CostVerdict:
+        """
+        Run the EXPLAIN pre-flight for ``query`` and apply the cost policy.
+        
+        Plans are cached per SQL hash, parameter values and connection, so
+        repeated statements skip the EXPLAIN round trip.
+        
+        Args:
+            query (str): SQL query to check
+            params (Optional[Dict]): Query parameters
+            
+        Returns:
+            CostVerdict: Statement to run, the plan and the action taken
+        """
+        if not self.is_connected():
+            raise RuntimeError("Not connected to any database")
+        
+        self._validate_query(query)
+        plan = self._query_plan(query, params)
+        policy = self.cost_policy or CostPolicy()
+        return policy.evaluate(query, plan, self.current_engine.dialect.name)
+    
+    @_pins_connection
+    def apply_cost_gate(self, query: str, params: Optional[Dict] = None) -> str:
+        """
+        Return the statement that may run in place of ``query`` under the cost policy.
+        
+        The query is returned unchanged when the gate is disabled or the plan is
+        within budget, and rewritten when the policy caps or samples it.
+        
+        Raises:
+            QueryCostError: If the policy rejects the query
+        """
+        if self.cost_policy is None:
+            return query
+        verdict = self.check_query_cost(query, params)
+        if verdict.rejected:
+            raise QueryCostError(f"Query is too expensive to run: {'; '.join(verdict.reasons)}")
+        if verdict.action is not None:
+            logger.warning(f"Cost gate applied '{verdict.action}': {'; '.join(verdict.reasons)}")
+        return verdict.sql
+    
+    @_pins_connection
+    async def apply_cost_gate_async(self, query: str, params: Optional[Dict] = None) -> str:
+        """Async version of ``apply_cost_gate()``; only a plan-cache miss leaves the event loop."""
+        if self.cost_policy is None:
+            return query
+        if PlanCache.make_key(query, self._connection_id(), params) not in self.plan_cache:
+            return await asyncio.to_thread(self.apply_cost_gate, query, params)
+        return self.apply_cost_gate(query, params)
+    
+    def _query_plan(self, query: str, params: Optional[Dict]) -> QueryPlan:
+        key = PlanCache.make_key(query, self._connection_id(), params)
+        plan = self.plan_cache.get(key)
+        if plan is None:
+            plan = self._explain(query, params)
+            self.plan_cache.put(key, plan)
+        return plan
+    
+    def _explain(self, query: str, params: Optional[Dict]) -> QueryPlan:
+        """Ask the database for its plan and estimates for ``query``."""
+        dialect = self.current_engine.dialect.name
+        statement = explain_statement(query, dialect)
+        if statement is None:
+            return QueryPlan(supported=False)
+        
+        try:
+            with self._read_connection() as connection:
+                rows = connection.execute(text(statement), params or {}).fetchall()
+                plan = parse_plan(query, dialect, rows)
+                if dialect == "sqlite":
+                    # EXPLAIN QUERY PLAN has no estimates; size scanned tables by their largest rowid
+                    quote = self.current_engine.dialect.identifier_preparer.quote
+                    for table in plan.full_scans:
+                        try:
+                            size = connection.execute(text(f"SELECT max(rowid) FROM {quote(table)}")).scalar()
+                            plan.full_scans[table] = float(size or 0)
+                        except Exception:
+                            plan.full_scans[table] = None
+                return plan
+        except Exception as e:
+            raise RuntimeError(f"Error explaining query: {str(e)}")
+    
+    def _statement(self, query: str):
+        """Cached ``text()`` clause for ``query`` on the current dialect."""
+        return self.statement_cache.get(query, self.current_engine.dialect.name)
+    
+    def invalidate_cached_results(self, table: Optional[str] = None) -> int:
+        """
+        Drop cached results, either for one table or entirely.
+        
+        Call this after writing to a table through another channel so
+        dashboards do not keep serving the previous answer until the TTL expires.
+        
+        Args:
+            table (Optional[str]): Table whose dependent results should be dropped
+            
+        Returns:
+            int: Number of entries removed (0 when clearing everything)
+        """
+        if self.result_cache is None:
+            return 0
+        if table is None:
+            self.result_cache.invalidate_all()
+            return 0
+        return self.result_cache.invalidate_table(table)
+    
+    def register_table_probe(self, table: str, probe_sql: str):
+        """
+        Register a cheap query whose result changes when ``table`` changes.
+        
+        Cached results of this connection that read ``table`` are served
+        only while the probe returns the same answer, e.g.
+        ``SELECT MAX(updated_at), COUNT(*) FROM sales``. The probe applies to
+        the current connection only; if it fails, those results expire by TTL.
+        
+        Args:
+            table (str): Table the probe watches
+            probe_sql (str): Read-only query returning a single row
+        """
+        if not self.is_connected():
+            raise RuntimeError("Not connected to any database")
+        self._validate_query(probe_sql)
+        if self.result_cache is not None:
+            # Each engine of the connection answers its own probes
+            targets = self.engine_group.targets if self.engine_group is not None else [None]
+            for target in targets:
+                scope = self._cache_scope(target.name if target is not None else None)
+                self.result_cache.register_table_probe(scope, table, probe_sql)
+    
+    def _data_version(self, tables, scope: str, engine) -> tuple:
+        """
+        Cheap token identifying the current state of the data a query reads on ``engine``.
+        
+        SQLite files use the modification time and size of the database and its
+        WAL file. Server databases use the table-change probes registered for
+        the cache ``scope``, if any, and always fall back to the configured TTL.
+        
+        Returns:
+            tuple: (version token or None, TTL in seconds or None)
+        """
+        url = engine.url
+        if url.get_backend_name() == "sqlite":
+            database = url.database
+            if database and database != ":memory:" and not database.startswith("file::memory:"):
+                database = database.split("?", 1)[0]
+                if database.startswith("file:"):
+                    database = database[len("file:"):]
+                version = []
+                for path in (database, database + "-wal"):
+                    try:
+                        stat = os.stat(path)
+                        version.append((stat.st_mtime_ns, stat.st_size))
+                    except OSError:
+                        version.append(None)
+                return tuple(version), None
+            return None, None
+        
+        ttl = RESULT_CACHE_SETTINGS["ttl_seconds"]
+        if self.result_cache.has_probes(scope, tables):
+            try:
+                return self.result_cache.probe_version(scope, tables, functools.partial(self._run_probe, engine)), ttl
+            except Exception as e:
+                logger.warning(f"Table-change probe failed, cached results expire by TTL: {str(e)}")
+        return None, ttl
+    
+    def _run_probe(self, engine, probe_sql: str) -> tuple:
+        with engine.connect() as connection:
+            row = connection.execute(text(probe_sql)).fetchone()
+            return tuple(row) if row is not None else ()
+    
+    @_pins_connection
+    def stream_query(self, query: str, params: Optional[Dict] = None,
+                     batch_size: int = DEFAULT_STREAM_BATCH_SIZE,
+                     cancel_handle: Optional[CancelHandle] = None) -> RowStream:
+        """
+        Execute a SQL query and stream its results in fixed-size batches.
+        
+        The query runs on a server-side cursor (``stream_results``) so rows are
+        fetched from the database as the caller consumes them instead of being
+        buffered up front.
+        
+        Args:
+            query (str): SQL query to execute
+            params (Optional[Dict]): Query parameters
+            batch_size (int): Number of rows per yielded batch
+            cancel_handle (Optional[CancelHandle]): Deadline and cancel switch covering
+                the whole stream; defaults to the configured query timeout
+            
+        Returns:
+            RowStream: Iterable of row batches; close it to stop early
         """
         if not self.is_connected():
             raise RuntimeError("Not connected to any database")
+        if batch_size < 1:
+            raise ValueError("batch_size must be a positive integer")
         
-        # Basic SQL injection prevention
-        dangerous_operations = [
-            "DROP DATABASE", "DROP TABLE", "TRUNCATE", "DELETE FROM",
-            "UPDATE", "INSERT INTO", "CREATE TABLE", "ALTER TABLE"
-        ]
+        self._validate_query(query)
         
-        query_upper = query.upper()
-        if any(op in query_upper for op in dangerous_operations):
-            raise ValueError("Query contains dangerous operations that are not allowed")
+        cancel_handle = cancel_handle or self.new_cancel_handle()
+        cleanup = ExitStack()
+        try:
+            cleanup.enter_context(self._track_query(cancel_handle))
+            connection = cleanup.enter_context(self._read_connection())
+            connection = connection.execution_options(
+                stream_results=True,
+                yield_per=batch_size
+            )
+            cleanup.enter_context(enforce_deadline(connection, cancel_handle))
+            result = connection.execute(self._statement(query), params or {})
+            dialect = self.current_engine.dialect.name
+            fetch_size = max(batch_size, FETCH_TUNING_SETTINGS["arraysize"])
+            return RowStream(
+                connection, result, batch_size, cleanup, cancel_handle,
+                on_close=lambda rows: self.fetch_stats.record(dialect, rows, True, fetch_size)
+            )
+        except (QueryTimeoutError, QueryCancelledError):
+            cleanup.close()
+            raise
+        except Exception as e:
+            cleanup.close()
+            raise RuntimeError(f"Error executing query: {str(e)}")
+    
+    @_pins_connection
+    async def stream_query_async(self, query: str, params: Optional[Dict] = None,
+                                 batch_size: int = DEFAULT_STREAM_BATCH_SIZE,
+                                 cancel_handle: Optional[CancelHandle] = None) -> AsyncRowStream:
+        """
+        Execute a SQL query on the asyncio engine and stream its results.
+        
+        Backends without an installed asyncio driver stream through
+        ``stream_query()`` with each batch fetched on a worker thread.
+        
+        Args:
+            query (str): SQL query to execute
+            params (Optional[Dict]): Query parameters
+            batch_size (int): Number of rows per yielded batch
+            cancel_handle (Optional[CancelHandle]): Deadline and cancel switch covering
+                the whole stream; defaults to the configured query timeout
+            
+        Returns:
+            AsyncRowStream: Async iterable of row batches; ``aclose()`` it to stop early
+        """
+        if not self.is_connected():
+            raise RuntimeError("Not connected to any database")
+        if batch_size < 1:
+            raise ValueError("batch_size must be a positive integer")
         
+        if self._get_async_engine() is None:
+            stream = await asyncio.to_thread(self.stream_query, query, params, batch_size, cancel_handle)
+            return ThreadedRowStream(stream)
+        
+        self._validate_query(query)
+        
+        cancel_handle = cancel_handle or self.new_cancel_handle()
+        cleanup = AsyncExitStack()
         try:
-            with self.current_engine.connect() as connection:
-                result = connection.execute(text(query), params or {})
-                return [dict(row._mapping) for row in result]
+            cleanup.enter_context(self._track_query(cancel_handle))
+            connection = await cleanup.enter_async_context(self._read_connection_async())
+            await cleanup.enter_async_context(enforce_deadline_async(connection, cancel_handle))
+            result = await await_cancellable(
+                connection, connection.stream(self._statement(query), params or {})
+            )
+            return AsyncRowStream(connection, result, batch_size, cleanup, cancel_handle)
+        except (QueryTimeoutError, QueryCancelledError):
+            await cleanup.aclose()
+            raise
         except Exception as e:
+            await cleanup.aclose()
             raise RuntimeError(f"Error executing query: {str(e)}")
     
+    def new_cancel_handle(self, timeout: Optional[float] = None,
+                          query_id: Optional[str] = None) -> CancelHandle:
+        """
+        Create a cancel handle with the configured default timeout.
+        
+        Args:
+            timeout (Optional[float]): Seconds the query may run; defaults to the configured timeout
+            query_id (Optional[str]): Identifier for ``cancel_query()``
+            
+        Returns:
+            CancelHandle: New handle
+        """
+        if timeout is None:
+            timeout = QUERY_TIMEOUT_SETTINGS["default_timeout"]
+        return CancelHandle(timeout=timeout, query_id=query_id)
+    
+    def cancel_query(self, query_id: str) -> bool:
+        """
+        Cancel an in-flight query started with a handle carrying ``query_id``.
+        
+        Returns:
+            bool: True if a matching query was found
+        """
+        with self._active_queries_lock:
+            handle = self._active_queries.get(query_id)
+        if handle is None:
+            return False
+        handle.cancel()
+        return True
+    
+    @contextmanager
+    def _track_query(self, cancel_handle: CancelHandle):
+        """Make a handle reachable through ``cancel_query()`` while its query runs."""
+        query_id = cancel_handle.query_id
+        if query_id is None:
+            yield
+            return
+        with self._active_queries_lock:
+            self._active_queries[query_id] = cancel_handle
+        try:
+            yield
+        finally:
+            with self._active_queries_lock:
+                if self._active_queries.get(query_id) is cancel_handle:
+                    del self._active_queries[query_id]
+    
+    @_pins_connection
+    def execute_query_columnar(self, query: str, params: Optional[Dict] = None,
+                               batch_size: int = DEFAULT_STREAM_BATCH_SIZE,
+                               cancel_handle: Optional[CancelHandle] = None,
+                               on_batch: Optional[Callable[[int], None]] = None) -> ColumnarResult:
+        """
+        Execute a SQL query and return its results in columnar form.
+        
+        Rows are streamed from the database and packed batch by batch, so the
+        per-row dictionaries returned by ``execute_query()`` are never built.
+        Columns past the per-query memory budget spill to memory-mapped files;
+        ``close()`` the result to delete them early.
+        
+        Args:
+            query (str): SQL query to execute
+            params (Optional[Dict]): Query parameters
+            batch_size (int): Number of rows fetched per round trip
+            cancel_handle (Optional[CancelHandle]): Deadline and cancel switch
+            on_batch (Optional[Callable[[int], None]]): Called with the running row count after each batch
+            
+        Returns:
+            ColumnarResult: Query results
+            
+        Raises:
+            ResultTooLargeError: If the result cannot fit its memory and disk budgets
+        """
+        stream = self.stream_query(query, params, batch_size=batch_size, cancel_handle=cancel_handle)
+        return ColumnarResult.from_stream(stream, on_batch, **self.spill_budget())
+    
+    def spill_budget(self) -> Dict[str, Any]:
+        """Memory and disk budget keyword arguments for ``ColumnarResult.from_batches()``."""
+        return {
+            "memory_budget": RESULT_BUFFER_SETTINGS["memory_budget"],
+            "spill_dir": RESULT_BUFFER_SETTINGS["spill_dir"] or None,
+            "max_spill_bytes": RESULT_BUFFER_SETTINGS["max_spill_bytes"]
+        }
+    
+    @_pins_connection
+    def preview_query(self, query: str) -> Optional[str]:
+        """
+        Cheap approximation of ``query`` for a progressive preview.
+        
+        PostgreSQL reads a ``TABLESAMPLE SYSTEM`` of every referenced table;
+        other databases read the first rows of each table. Aggregates over
+        the preview are therefore computed on a fraction of the data.
+        
+        Returns:
+            Optional[str]: Rewritten statement, or None if the query references no table
+        """
+        dialect = self.current_engine.dialect.name
+        tables = self._table_name_list()
+        if dialect == "postgresql":
+            return add_table_sample(query, tables, PREVIEW_SETTINGS["sample_percent"])
+        return limit_table_reads(query, tables, dialect, PREVIEW_SETTINGS["table_rows"])
+    
+    @_pins_connection
+    def execute_preview(self, query: str, page_size: Optional[int] = None, params: Optional[Dict] = None,
+                        cancel_handle: Optional[CancelHandle] = None) -> Optional[Page]:
+        """
+        Run the preview of ``query`` under the short preview deadline.
+        
+        Args:
+            query (str): SQL query the preview approximates
+            page_size (Optional[int]): Rows to return; defaults to the configured page size
+            params (Optional[Dict]): Query parameters
+            cancel_handle (Optional[CancelHandle]): Deadline and cancel switch;
+                defaults to the configured preview timeout
+            
+        Returns:
+            Optional[Page]: Preview rows, or None when the query cannot be
+            previewed or the preview failed or ran out of time
+        """
+        preview_sql = self._preview_statement(query, page_size)
+        if preview_sql is None:
+            return None
+        cancel_handle = cancel_handle or self.new_cancel_handle(timeout=PREVIEW_SETTINGS["timeout"])
+        try:
+            rows = self.execute_query(preview_sql, params, cancel_handle)
+        except Exception as e:
+            logger.info(f"Preview skipped: {str(e)}")
+            return None
+        return Page(preview_sql, rows, False)
+    
+    @_pins_connection
+    async def execute_preview_async(self, query: str, page_size: Optional[int] = None,
+                                    params: Optional[Dict] = None,
+                                    cancel_handle: Optional[CancelHandle] = None) -> Optional[Page]:
+        """Async version of ``execute_preview()`` running on the asyncio engine."""
+        if self._connection is None or self._connection.table_names is None:
+            # Schema reflection is blocking; it runs once per connection
+            await asyncio.to_thread(self._table_name_list)
+        preview_sql = self._preview_statement(query, page_size)
+        if preview_sql is None:
+            return None
+        cancel_handle = cancel_handle or self.new_cancel_handle(timeout=PREVIEW_SETTINGS["timeout"])
+        try:
+            rows = await self.execute_query_async(preview_sql, params, cancel_handle)
+        except Exception as e:
+            logger.info(f"Preview skipped: {str(e)}")
+            return None
+        return Page(preview_sql, rows, False)
+    
+    def _preview_statement(self, query: str, page_size: Optional[int]) -> Optional[str]:
+        if not self.is_connected():
+            raise RuntimeError("Not connected to any database")
+        preview_sql = self.preview_query(query)
+        if preview_sql is None:
+            return None
+        return apply_row_cap(preview_sql, self.current_engine.dialect.name, self._resolve_page_size(page_size))
+    
+    def _table_name_list(self) -> List[str]:
+        """Table names of the connected database, reflected once per connection."""
+        connection = self._connection
+        if connection.table_names is None:
+            connection.table_names = inspect(connection.engine).get_table_names()
+        return connection.table_names
+    
+    @_pins_connection
+    def execute_page(self, query: str, page_size: Optional[int] = None,
+                     params: Optional[Dict] = None,
+                     cancel_handle: Optional[CancelHandle] = None) -> Page:
+        """
+        Execute a SQL query and return only its first page of results.
+        
+        A dialect-appropriate row cap is injected into the query. If more rows
+        exist the page carries an opaque cursor for ``fetch_next_page()``: a
+        keyset cursor when the query has a deterministic ORDER BY, otherwise a
+        cursor into the full result. The full result is only fetched when the
+        second page is requested, then buffered (and spilled to disk past the
+        memory budget) until its last page is read or it expires.
+        
+        Args:
+            query (str): SQL query to execute
+            page_size (Optional[int]): Rows per page; defaults to the configured page size
+            params (Optional[Dict]): Query parameters
+            cancel_handle (Optional[CancelHandle]): Deadline and cancel switch
+            
+        Returns:
+            Page: First page of results
+        """
+        if not self.is_connected():
+            raise RuntimeError("Not connected to any database")
+        
+        page_size = self._resolve_page_size(page_size)
+        dialect = self.current_engine.dialect.name
+        rows = self.execute_query(apply_row_cap(query, dialect, page_size + 1), params, cancel_handle)
+        order_keys = self._keyset_order(query, rows) if len(rows) > page_size else None
+        if len(rows) > page_size and not order_keys:
+            return self._unordered_page(query, params, rows, page_size)
+        return self._build_page(query, params, rows, page_size, order_keys)
+    
+    @_pins_connection
+    async def execute_page_async(self, query: str, page_size: Optional[int] = None,
+                                 params: Optional[Dict] = None,
+                                 cancel_handle: Optional[CancelHandle] = None) -> Page:
+        """
+        Async version of ``execute_page()`` running on the asyncio engine.
+        
+        Args:
+            query (str): SQL query to execute
+            page_size (Optional[int]): Rows per page; defaults to the configured page size
+            params (Optional[Dict]): Query parameters
+            cancel_handle (Optional[CancelHandle]): Deadline and cancel switch
+            
+        Returns:
+            Page: First page of results
+        """
+        if not self.is_connected():
+            raise RuntimeError("Not connected to any database")
+        
+        page_size = self._resolve_page_size(page_size)
+        dialect = self.current_engine.dialect.name
+        rows = await self.execute_query_async(apply_row_cap(query, dialect, page_size + 1), params, cancel_handle)
+        order_keys = None
+        if len(rows) > page_size:
+            table = single_table(query)
+            if table is not None and table.lower() not in self._connection.primary_keys:
+                # Schema reflection is blocking; it runs once per table and connection
+                await asyncio.to_thread(self._primary_key, table)
+            order_keys = self._keyset_order(query, rows)
+            if not order_keys:
+                return self._unordered_page(query, params, rows, page_size)
+        return self._build_page(query, params, rows, page_size, order_keys)
+    
+    @_pins_connection
+    def fetch_next_page(self, cursor: str, cancel_handle: Optional[CancelHandle] = None) -> Page:
+        """
+        Fetch the page following a cursor issued by ``execute_page()``.
+        
+        The next slice is selected with a keyset predicate on the ORDER BY
+        columns, so the database never re-reads the rows already returned.
+        Cursors into a buffered result are served from the buffer; the second
+        page of an unordered result runs the full query to fill it.
+        
+        Args:
+            cursor (str): Opaque cursor from a previous page
+            cancel_handle (Optional[CancelHandle]): Deadline and cancel switch
+            
+        Returns:
+            Page: Next page of results
+        """
+        if not self.is_connected():
+            raise RuntimeError("Not connected to any database")
+        
+        state, page_sql, page_size, order_keys = self._next_page_query(cursor)
+        if page_sql is None:
+            if state["buffer"] is None:
+                state["buffer"] = self._fill_buffer(state, cancel_handle)
+            return self._next_buffered_page(state, page_size)
+        rows = self.execute_query(page_sql, cursor_params(state), cancel_handle)
+        return self._next_page(state, rows, page_size, order_keys)
+    
+    @_pins_connection
+    async def fetch_next_page_async(self, cursor: str, cancel_handle: Optional[CancelHandle] = None) -> Page:
+        """
+        Async version of ``fetch_next_page()`` running on the asyncio engine.
+        
+        Args:
+            cursor (str): Opaque cursor from a previous page
+            cancel_handle (Optional[CancelHandle]): Deadline and cancel switch
+            
+        Returns:
+            Page: Next page of results
+        """
+        if not self.is_connected():
+            raise RuntimeError("Not connected to any database")
+        
+        state, page_sql, page_size, order_keys = self._next_page_query(cursor)
+        if page_sql is None:
+            if state["buffer"] is None:
+                state["buffer"] = await asyncio.to_thread(self._fill_buffer, state, cancel_handle)
+            return self._next_buffered_page(state, page_size)
+        rows = await self.execute_query_async(page_sql, cursor_params(state), cancel_handle)
+        return self._next_page(state, rows, page_size, order_keys)
+    
+    def _next_page_query(self, cursor: str) -> tuple:
+        """
+        Decode a cursor into its state and the keyset query selecting the next page.
+        
+        The query is None for cursors into a buffered result.
+        """
+        state = decode_cursor(cursor)
+        if state.get("conn") != self._connection_id():
+            raise ValueError("Pagination cursor was issued for a different database connection")
+        if "buffer" in state:
+            return state, None, self._resolve_page_size(state["size"]), None
+        
+        order_keys = [(name, descending) for name, descending in state["keys"]]
+        page_size = self._resolve_page_size(state["size"])
+        page_sql = build_keyset_query(
+            state["sql"],
+            order_keys,
+            self.current_engine.dialect.name,
+            page_size + 1,
+            self.current_engine.dialect.identifier_preparer.quote,
+            null_keys(state)
+        )
+        return state, page_sql, page_size, order_keys
+    
+    def _next_page(self, state: Dict, rows: List[Dict], page_size: int, order_keys: List) -> Page:
+        params = {name: value for name, value in cursor_params(state).items() if not name.startswith("_k")}
+        return self._build_page(state["sql"], params, rows, page_size, order_keys)
+    
+    def _unordered_page(self, query: str, params: Optional[Dict], rows: List[Dict], page_size: int) -> Page:
+        """First page of an unordered result; the cursor fetches the full result only if it is used."""
+        next_cursor = make_buffer_cursor(query, None, page_size, page_size, self._connection_id(), params)
+        return Page(query, rows[:page_size], True, next_cursor)
+    
+    def _fill_buffer(self, state: Dict, cancel_handle: Optional[CancelHandle]) -> str:
+        """Fetch the full result of a buffer cursor's query and buffer it; returns its token."""
+        result = self.execute_query_columnar(state["sql"], cursor_params(state), cancel_handle=cancel_handle)
+        return self.buffers.register(result)
+    
+    def _next_buffered_page(self, state: Dict, page_size: int) -> Page:
+        self.buffers.sweep()
+        token, offset = state["buffer"], state["offset"]
+        result = self.buffers.get(token)
+        if result is None:
+            raise ValueError("Pagination cursor has expired; run the query again")
+        rows = result.slice_dicts(offset, offset + page_size)
+        has_more = offset + page_size < result.row_count
+        next_cursor = None
+        if has_more:
+            next_cursor = make_buffer_cursor(state["sql"], token, offset + page_size, page_size,
+                                             self._connection_id())
+        else:
+            self.buffers.release(token)
+        return Page(state["sql"], rows, has_more, next_cursor)
+    
+    def _build_page(self, query: str, params: Optional[Dict], rows: List[Dict], page_size: int,
+                    order_keys: Optional[List]) -> Page:
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        next_cursor = None
+        if has_more and order_keys:
+            try:
+                next_cursor = make_cursor(query, params, order_keys, rows[-1], page_size, self._connection_id())
+            except TypeError:
+                # Key values a cursor cannot carry; page through the buffered result instead
+                return self._unordered_page(query, params, rows, page_size)
+        return Page(query, rows, has_more, next_cursor)
+    
+    def _keyset_order(self, query: str, rows: List[Dict]) -> Optional[List]:
+        """ORDER BY keys usable for keyset pagination, mapped to output column names."""
+        order_keys = parse_order_by(query)
+        if not order_keys or not rows:
+            return None
+        
+        columns = {name.lower(): name for name in rows[0].keys()}
+        if any(name.lower() not in columns for name, _ in order_keys):
+            return None
+        order_keys = [(columns[name.lower()], descending) for name, descending in order_keys]
+        
+        # A primary key only makes rows unique when it belongs to the one table
+        # read, under its own name; joins repeat it and aliases can shadow it
+        primary_key = []
+        table = single_table(query)
+        if table is not None:
+            primary_key = self._primary_key(table)
+            if {column.lower() for column in primary_key} & renamed_columns(query):
+                primary_key = []
+        if not is_deterministic(order_keys, primary_key, parse_group_by(query)):
+            return None
+        return order_keys
+    
+    def _primary_key(self, table: str) -> List[str]:
+        """Primary key columns of ``table``, reflected once per table and connection."""
+        connection = self._connection
+        primary_keys = connection.primary_keys
+        key = table.lower()
+        if key not in primary_keys:
+            names = {name.lower(): name for name in self._table_name_list()}
+            try:
+                constraint = inspect(connection.engine).get_pk_constraint(names[key]) if key in names else {}
+            except Exception as e:
+                logger.warning(f"Could not reflect the primary key of {table}: {str(e)}")
+                constraint = {}
+            primary_keys[key] = list(constraint.get("constrained_columns") or [])
+        return primary_keys[key]
+    
+    def _resolve_page_size(self, page_size: Optional[int]) -> int:
+        if page_size is None:
+            page_size = QUERY_PAGINATION_SETTINGS["default_page_size"]
+        if page_size < 1:
+            raise ValueError("page_size must be a positive integer")
+        return min(page_size, QUERY_PAGINATION_SETTINGS["max_page_size"])
+    
+    def _connection_id(self) -> str:
+        """Short fingerprint of the current connection, used to scope cursors."""
+        connection_string = self.connection_info.get("connection_string", "")
+        return hashlib.sha256(connection_string.encode()).hexdigest()[:16]
+    
+    def _validate_query(self, query: str):
+        """Reject anything but a single read-only statement."""
+        ensure_read_only(query, self.current_engine.dialect.name)
+    
     def disconnect(self):
-        """Disconnect from current database."""
-        if self.current_engine:
-            self.current_engine.dispose()
-            self.current_engine = None
-            self.current_session = None
-            self.current_base = None
-            self.connection_info = {}
+        """
+        Disconnect from current database; its engines stay warm in the registry for other users.
+        
+        Queries still running finish first; their connection is released afterwards.
+        """
+        if self._published is not None:
+            self._publish(None)
             logger.info("Disconnected from database")
 
+# Engines shared by every database manager in the process
+engine_registry = EngineRegistry(
+    max_idle=ENGINE_REGISTRY_SETTINGS["max_idle_engines"],
+    idle_ttl=ENGINE_REGISTRY_SETTINGS["idle_ttl_seconds"],
+    max_memory=ENGINE_REGISTRY_SETTINGS["max_memory_bytes"],
+    connection_memory=ENGINE_REGISTRY_SETTINGS["connection_memory_bytes"]
+)
+
+# Local mirrors of hot tables, one per remote database
+table_mirrors = MirrorRegistry(TABLE_MIRROR_SETTINGS)
+
+# Shared by every manager, so UI sessions share cached results and coalesce identical queries
+query_caches = QueryCaches()
+
+# Holds the idle floor of engines in use and sweeps the registry
+pool_keeper = PoolKeeper(
+    engine_registry,
+    min_idle=POOL_PREWARM_SETTINGS["min_idle"],
+    interval=POOL_PREWARM_SETTINGS["keeper_interval"],
+    timeout=POOL_PREWARM_SETTINGS["timeout"]
+)
+
 # Global database manager instance
 db_manager = DatabaseManager()
 
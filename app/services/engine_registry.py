@@ -0,0 +1,300 @@
+"""
+Process-wide registry of warm database engines.
+
+Engines are keyed by the normalized identity of their connection URL, so
+every caller connecting to the same database with the same credentials
+shares one engine and its connection pool. Callers acquire an engine and
+release it when they switch elsewhere; released engines stay warm for the
+next caller and are disposed only once idle, least recently used first,
+when more than ``max_idle`` are idle, one has been idle longer than
+``idle_ttl``, or the pooled connections of all engines are estimated to take
+more than ``max_memory`` bytes. An engine in use is never disposed on another
+caller's behalf, and a released engine that still has connections checked
+out (e.g. a stream started before its caller reconnected) is left to drain
+and disposed by a later sweep.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+from sqlalchemy.engine import make_url
+from app.services.pool_policy import is_memory_sqlite
+
+logger = logging.getLogger(__name__)
+
+
+class _Entry:
+    """One registered engine, its asyncio counterpart and its users."""
+
+    def __init__(self, key: str, engine: Any, label: str):
+        self.key = key
+        self.engine = engine
+        self.label = label
+        self.async_engine: Any = None
+        self.users = 0
+        self.idle_since = time.monotonic()
+
+    def connections(self) -> int:
+        """Open pooled connections of the engine and its asyncio counterpart (at least one)."""
+        count = _pooled(self.engine)
+        if self.async_engine:
+            count += _pooled(self.async_engine.sync_engine)
+        return max(1, count)
+
+    def busy(self) -> bool:
+        """Whether connections of the engine or its asyncio counterpart are still checked out."""
+        if _checked_out(self.engine):
+            return True
+        return bool(self.async_engine and _checked_out(self.async_engine.sync_engine))
+
+    def dispose(self):
+        if self.async_engine:
+            # Closing pooled asyncio connections needs their event loop; drop the
+            # pool and let checked-in connections be closed when collected
+            self.async_engine.sync_engine.dispose(close=False)
+        self.engine.dispose()
+
+
+class EngineRegistry:
+    """
+    Shared engines keyed by connection identity with LRU disposal of idle ones.
+
+    Args:
+        max_idle (int): Idle engines kept warm; 0 disposes engines as soon as they are released
+        idle_ttl (float): Seconds an idle engine is kept; 0 for no limit
+        max_memory (int): Estimated bytes all pooled connections may hold before
+            idle engines are disposed; 0 for no limit
+        connection_memory (int): Estimated bytes held per pooled connection
+    """
+
+    def __init__(self, max_idle: int = 8, idle_ttl: float = 900.0, max_memory: int = 0,
+                 connection_memory: int = 4 * 1024 * 1024):
+        self.max_idle = max_idle
+        self.idle_ttl = idle_ttl
+        self.max_memory = max_memory
+        self.connection_memory = connection_memory
+        self.created = 0
+        self.reused = 0
+        self.evicted = 0
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._by_engine: Dict[int, _Entry] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(db_type: str, connection_string: str) -> str:
+        """
+        Normalized identity of a connection.
+
+        Host name case and query option order do not change the key;
+        relative SQLite paths are resolved. The password is part of the key,
+        since different credentials must not share a pool, but only as a hash.
+
+        Args:
+            db_type (str): Type of database
+            connection_string (str): SQLAlchemy connection URL
+
+        Returns:
+            str: Registry key
+        """
+        url = make_url(connection_string)
+        database = url.database or ""
+        if url.get_backend_name() == "sqlite" and not is_memory_sqlite(url):
+            path, _, options = database.partition("?")
+            if not path.startswith("file:"):
+                path = os.path.normcase(os.path.abspath(path))
+            database = f"{path}?{options}" if options else path
+        query = "&".join(
+            f"{name.lower()}={value}" for name, value in sorted(url.query.items(), key=lambda item: item[0].lower())
+        )
+        identity = "|".join([
+            db_type.lower(), url.drivername.lower(), url.username or "", url.password or "",
+            (url.host or "").lower(), str(url.port or ""), database, query
+        ])
+        return hashlib.sha256(identity.encode("utf-8")).hexdigest()
+
+    def acquire(self, key: str, factory: Callable[[], Any], label: str = "") -> Any:
+        """
+        Engine registered under ``key``, created with ``factory`` if there is none.
+
+        Every ``acquire`` must be paired with a ``release`` of the returned engine.
+
+        Args:
+            key (str): Connection identity from ``make_key``
+            factory (Callable[[], Any]): Builds the engine on first use
+            label (str): Description for stats; must not contain credentials
+
+        Returns:
+            Any: The shared engine
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.users += 1
+                self._entries.move_to_end(key)
+                self.reused += 1
+                return entry.engine
+        # Build outside the lock; a concurrent builder of the same key loses the race
+        engine = factory()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _Entry(key, engine, label)
+                self._by_engine[id(engine)] = entry
+                self.created += 1
+                engine = None
+            else:
+                self.reused += 1
+            entry.users += 1
+            self._entries.move_to_end(key)
+            shared = entry.engine
+            evicted = self._evict_locked()
+        if engine is not None:
+            engine.dispose()
+        self._dispose_all(evicted)
+        return shared
+
+    def release(self, engine: Any, discard: bool = False):
+        """
+        Give back an engine from ``acquire``; it stays warm until evicted as idle.
+
+        Args:
+            engine: Engine returned by ``acquire``
+            discard (bool): Dispose the engine right away if no one else uses it,
+                e.g. after it failed to connect
+        """
+        with self._lock:
+            entry = self._by_engine.get(id(engine))
+            if entry is None or entry.engine is not engine:
+                return
+            entry.users = max(0, entry.users - 1)
+            if entry.users == 0:
+                entry.idle_since = time.monotonic()
+            evicted = self._evict_locked()
+            if discard and entry.users == 0 and entry not in evicted:
+                del self._entries[entry.key]
+                self._by_engine.pop(id(entry.engine), None)
+                evicted.append(entry)
+        self._dispose_all(evicted)
+
+    def async_engine(self, engine: Any, factory: Callable[[Any], Any]) -> Any:
+        """
+        asyncio engine sharing the identity of a registered ``engine``.
+
+        Args:
+            engine: Registered sync engine
+            factory (Callable[[Any], Any]): Builds the asyncio engine from the sync one;
+                may return None when no asyncio driver is available
+
+        Returns:
+            Any: The asyncio engine, or None
+        """
+        with self._lock:
+            entry = self._by_engine.get(id(engine))
+            if entry is not None and entry.async_engine is not None:
+                return entry.async_engine or None
+        async_engine = factory(engine) or False
+        with self._lock:
+            entry = self._by_engine.get(id(engine))
+            if entry is None or entry.engine is not engine:
+                # Not registered (or evicted meanwhile): caller owns nothing shared
+                return async_engine or None
+            if entry.async_engine is None:
+                entry.async_engine = async_engine
+                async_engine = None
+            shared = entry.async_engine
+        if async_engine:
+            async_engine.sync_engine.dispose(close=False)
+        return shared or None
+
+    def in_use(self) -> List[Any]:
+        """Engines currently acquired by at least one caller."""
+        with self._lock:
+            return [entry.engine for entry in self._entries.values() if entry.users > 0]
+
+    def sweep(self):
+        """Dispose engines idle longer than the time-to-live or beyond the idle limit, once drained."""
+        with self._lock:
+            evicted = self._evict_locked()
+        self._dispose_all(evicted)
+
+    def clear(self):
+        """Dispose every registered engine, in use or not; for shutdown."""
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+            self._by_engine.clear()
+        self._dispose_all(entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Registered engines with their users and checked-out connections, and lifetime counts."""
+        with self._lock:
+            entries = list(self._entries.values())
+            counts = {"created": self.created, "reused": self.reused, "evicted": self.evicted}
+        now = time.monotonic()
+        return {
+            **counts,
+            "estimated_memory_bytes": sum(entry.connections() for entry in entries) * self.connection_memory,
+            "engines": [
+                {
+                    "label": entry.label,
+                    "users": entry.users,
+                    "idle_seconds": round(now - entry.idle_since, 1) if entry.users == 0 else 0.0,
+                    "checked_out": _checked_out(entry.engine),
+                }
+                for entry in entries
+            ],
+        }
+
+    def _evict_locked(self) -> List[_Entry]:
+        now = time.monotonic()
+        # Released engines whose connections are still checked out drain first
+        idle = [entry for entry in self._entries.values() if entry.users == 0 and not entry.busy()]
+        evicted = []
+        for position, entry in enumerate(idle):
+            # Entries are in least recently used order
+            expired = self.idle_ttl and now - entry.idle_since > self.idle_ttl
+            if expired or len(idle) - position > self.max_idle:
+                evicted.append(entry)
+        if self.max_memory:
+            remaining = [entry for entry in idle if entry not in evicted]
+            memory = sum(
+                entry.connections() for entry in self._entries.values() if entry not in evicted
+            ) * self.connection_memory
+            while memory > self.max_memory and remaining:
+                entry = remaining.pop(0)
+                evicted.append(entry)
+                memory -= entry.connections() * self.connection_memory
+            if memory > self.max_memory:
+                logger.warning(
+                    f"Engines in use hold an estimated {memory:,} bytes, over the {self.max_memory:,} byte cap"
+                )
+        for entry in evicted:
+            del self._entries[entry.key]
+            self._by_engine.pop(id(entry.engine), None)
+        self.evicted += len(evicted)
+        return evicted
+
+    @staticmethod
+    def _dispose_all(entries: List[_Entry]):
+        for entry in entries:
+            try:
+                entry.dispose()
+                logger.info(f"Disposed idle engine {entry.label}")
+            except Exception as e:
+                logger.warning(f"Failed to dispose engine {entry.label}: {str(e)}")
+
+
+def _pooled(engine: Any) -> int:
+    pool = engine.pool
+    return sum(
+        count() for count in (getattr(pool, "checkedin", None), getattr(pool, "checkedout", None)) if callable(count)
+    )
+
+
+def _checked_out(engine: Any) -> Optional[int]:
+    checkedout = getattr(engine.pool, "checkedout", None)
+    return checkedout() if callable(checkedout) else None
@@ -0,0 +1,307 @@
+"""
+Read routing across a primary engine and its read replicas.
+
+An ``EngineGroup`` holds one primary and any number of replicas (server
+replicas, or copies of a read-only SQLite file). Read-only queries go to the
+healthy replica with the fewest outstanding requests. A replica that fails to
+connect or drops its connection is ejected for a backoff period, and one that
+lags the primary by more than the configured bound is skipped until it
+catches up. The primary serves reads only when no replica is usable, unless
+configured to share the load.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Callable, Dict, List, Optional
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+logger = logging.getLogger(__name__)
+
+PRIMARY = "primary"
+# Key of ``Connection.info`` naming the target a connection was routed to
+SERVED_BY = "engine_target"
+
+
+class EngineTarget:
+    """One engine in a group and its routing state."""
+
+    def __init__(self, name: str, engine: Any):
+        self.name = name
+        self.engine = engine
+        self.outstanding = 0
+        self.served = 0
+        self.failures = 0
+        self.ejected_until = 0.0
+        self.lag: Optional[float] = None
+
+    def ejected(self, now: float) -> bool:
+        return now < self.ejected_until
+
+    def stats(self, now: float) -> Dict[str, Any]:
+        return {
+            "outstanding": self.outstanding,
+            "served": self.served,
+            "consecutive_failures": self.failures,
+            "ejected_for": max(0.0, self.ejected_until - now),
+            "lag_seconds": self.lag,
+        }
+
+
+def _is_connection_failure(exc: BaseException) -> bool:
+    """Whether an execution error means the engine itself is unhealthy."""
+    return isinstance(exc, DBAPIError) and exc.connection_invalidated
+
+
+def _sqlite_path(engine) -> Optional[str]:
+    database = engine.url.database
+    if not database or database == ":memory:" or database.startswith("file::memory:"):
+        return None
+    database = database.split("?", 1)[0]
+    return database[len("file:"):] if database.startswith("file:") else database
+
+
+def sqlite_data_version(path: str) -> tuple:
+    """
+    Token that changes whenever a commit lands in an SQLite file.
+
+    Made of the file change counter in the database header, which rollback
+    journals bump on every commit, and the salts and size of the ``-wal``
+    file, which is where WAL commits go until a checkpoint.
+    """
+    with open(path, "rb") as database:
+        header = database.read(28)
+    try:
+        with open(path + "-wal", "rb") as wal:
+            # Salts change on every WAL reset; the size grows with every commit
+            wal_version = (wal.read(24)[16:24], os.fstat(wal.fileno()).st_size)
+    except FileNotFoundError:
+        wal_version = None
+    return header[24:28], wal_version
+
+
+def _sqlite_changed_at(path: str) -> float:
+    """Last modification time of an SQLite file or its WAL."""
+    changed_at = os.stat(path).st_mtime
+    try:
+        changed_at = max(changed_at, os.stat(path + "-wal").st_mtime)
+    except FileNotFoundError:
+        pass
+    return changed_at
+
+
+def measure_lag(primary, replica) -> Optional[float]:
+    """
+    Seconds ``replica`` is behind ``primary``, or None when it cannot be measured.
+
+    PostgreSQL reports the age of the last replayed transaction and MySQL its
+    ``Seconds_Behind_Source``. SQLite copies are compared by data version
+    (see ``sqlite_data_version()``), so commits still in the primary's WAL
+    count; a copy whose data differs is as old as its own last change.
+    """
+    dialect = replica.dialect.name
+    if dialect == "sqlite":
+        primary_path, replica_path = _sqlite_path(primary), _sqlite_path(replica)
+        if primary_path is None or replica_path is None:
+            return None
+        if sqlite_data_version(primary_path) == sqlite_data_version(replica_path):
+            return 0.0
+        return max(0.0, time.time() - _sqlite_changed_at(replica_path))
+
+    with replica.connect() as connection:
+        if dialect == "postgresql":
+            return float(connection.execute(text(
+                "SELECT CASE WHEN pg_is_in_recovery() "
+                "THEN COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) "
+                "ELSE 0 END"
+            )).scalar())
+        if dialect == "mysql":
+            row = connection.execute(text("SHOW REPLICA STATUS")).mappings().first()
+            if row is None:
+                return 0.0
+            lag = row.get("Seconds_Behind_Source", row.get("Seconds_Behind_Master"))
+            # NULL means replication is stopped
+            return float(lag) if lag is not None else float("inf")
+    return None
+
+
+class EngineGroup:
+    """
+    A primary engine plus read replicas with least-outstanding-requests routing.
+
+    Args:
+        primary: Engine for the primary database
+        replicas (Optional[Dict[str, Any]]): Replica engines by name
+        include_primary (bool): Route reads to the primary alongside healthy replicas
+        max_lag_seconds (float): Replicas further behind than this are skipped; 0 disables the check
+        lag_check_interval (float): Seconds between replica lag measurements
+        eject_seconds (float): Initial ejection period after a failure; doubles per consecutive failure
+        max_eject_seconds (float): Upper bound for the ejection period
+    """
+
+    def __init__(self, primary, replicas: Optional[Dict[str, Any]] = None, include_primary: bool = False,
+                 max_lag_seconds: float = 30.0, lag_check_interval: float = 5.0,
+                 eject_seconds: float = 30.0, max_eject_seconds: float = 300.0):
+        self.primary = EngineTarget(PRIMARY, primary)
+        self.replicas = [EngineTarget(name, engine) for name, engine in (replicas or {}).items()]
+        self.include_primary = include_primary
+        self.max_lag_seconds = max_lag_seconds
+        self.lag_check_interval = lag_check_interval
+        self.eject_seconds = eject_seconds
+        self.max_eject_seconds = max_eject_seconds
+        self._next_lag_check = 0.0
+        self._lag_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._turn = 0
+
+    @property
+    def targets(self) -> List[EngineTarget]:
+        return [self.primary] + self.replicas
+
+    def lag_check_due(self) -> bool:
+        return bool(self.replicas and self.max_lag_seconds) and time.monotonic() >= self._next_lag_check
+
+    def refresh_lag(self):
+        """Measure replica lag if the check interval has passed; one caller measures at a time."""
+        if not self.lag_check_due() or not self._lag_lock.acquire(blocking=False):
+            return
+        try:
+            for replica in self.replicas:
+                if replica.ejected(time.monotonic()):
+                    continue
+                try:
+                    replica.lag = measure_lag(self.primary.engine, replica.engine)
+                except Exception as e:
+                    logger.warning(f"Could not measure lag of replica {replica.name}: {str(e)}")
+                    self._record_failure(replica)
+            self._next_lag_check = time.monotonic() + self.lag_check_interval
+        finally:
+            self._lag_lock.release()
+
+    def _usable(self, replica: EngineTarget, now: float) -> bool:
+        return not replica.ejected(now) and not (
+            self.max_lag_seconds and replica.lag is not None and replica.lag > self.max_lag_seconds
+        )
+
+    def usable_targets(self) -> List[EngineTarget]:
+        """The primary followed by the replicas reads may currently be routed to."""
+        now = time.monotonic()
+        with self._lock:
+            return [self.primary] + [replica for replica in self.replicas if self._usable(replica, now)]
+
+    def _candidates(self) -> List[EngineTarget]:
+        """Usable targets ordered by outstanding requests, the primary as last resort."""
+        now = time.monotonic()
+        with self._lock:
+            pool = [replica for replica in self.replicas if self._usable(replica, now)]
+            if self.include_primary or not pool:
+                pool.append(self.primary)
+            # Rotate before sorting so ties are spread evenly
+            self._turn = (self._turn + 1) % len(pool)
+            pool = pool[self._turn:] + pool[:self._turn]
+            pool.sort(key=lambda target: target.outstanding)
+            if self.primary not in pool:
+                pool.append(self.primary)
+            return pool
+
+    def _acquire(self, target: EngineTarget):
+        with self._lock:
+            target.outstanding += 1
+            target.served += 1
+
+    def _release(self, target: EngineTarget, failed: bool):
+        with self._lock:
+            target.outstanding -= 1
+            if not failed:
+                target.failures = 0
+        if failed:
+            self._record_failure(target)
+
+    def _record_failure(self, target: EngineTarget):
+        if target is self.primary:
+            return
+        with self._lock:
+            target.failures += 1
+            backoff = min(self.max_eject_seconds, self.eject_seconds * 2 ** (target.failures - 1))
+            target.ejected_until = time.monotonic() + backoff
+        logger.warning(f"Ejected replica {target.name} for {backoff:g}s after {target.failures} failure(s)")
+
+    @contextmanager
+    def connect(self):
+        """
+        Connection from the least loaded usable engine.
+
+        Engines that fail to connect are ejected and the next candidate is
+        tried; the primary is always the final fallback.
+        """
+        self.refresh_lag()
+        last_error = None
+        for target in self._candidates():
+            self._acquire(target)
+            try:
+                connection = target.engine.connect()
+            except Exception as e:
+                self._release(target, failed=True)
+                last_error = e
+                continue
+            connection.info[SERVED_BY] = target.name
+            failed = False
+            try:
+                with connection:
+                    yield connection
+            except BaseException as e:
+                failed = _is_connection_failure(e)
+                raise
+            finally:
+                self._release(target, failed)
+            return
+        raise last_error
+
+    @asynccontextmanager
+    async def connect_async(self, async_engine_for: Callable[[EngineTarget], Any]):
+        """
+        Async version of ``connect()`` yielding an ``AsyncConnection``.
+
+        Args:
+            async_engine_for: Returns the ``AsyncEngine`` for a target
+        """
+        if self.lag_check_due():
+            await asyncio.to_thread(self.refresh_lag)
+        last_error = None
+        for target in self._candidates():
+            self._acquire(target)
+            connection = async_engine_for(target).connect()
+            try:
+                await connection.start()
+            except Exception as e:
+                self._release(target, failed=True)
+                last_error = e
+                continue
+            connection.info[SERVED_BY] = target.name
+            failed = False
+            try:
+                yield connection
+            except BaseException as e:
+                failed = _is_connection_failure(e)
+                raise
+            finally:
+                try:
+                    await connection.close()
+                finally:
+                    self._release(target, failed)
+            return
+        raise last_error
+
+    def stats(self) -> Dict[str, Any]:
+        """Routing counters and health of each engine."""
+        now = time.monotonic()
+        with self._lock:
+            return {target.name: target.stats(now) for target in self.targets}
+
+    def dispose(self):
+        for target in self.targets:
+            target.engine.dispose()
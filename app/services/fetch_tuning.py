@@ -0,0 +1,99 @@
+"""
+Fetch batch sizing for large result transfers.
+
+Drivers default to small fetch sizes: cx_Oracle / oracledb fetch 100 rows
+per round trip and prefetch 2 with the execute, and DBAPI cursors default
+to an ``arraysize`` of 1. The tuning installed here sizes each cursor
+before it executes (``arraysize`` everywhere, ``prefetchrows`` on Oracle,
+``itersize`` on psycopg2 named cursors). ``DatabaseManager``
+chooses between buffered and server-side (unbuffered, e.g. pymysql
+``SSCursor``) cursors from the expected result size: a small result is
+cheapest fetched in the same round trip as the query, a large one should
+not be materialized in the driver before the first row is used.
+"""
+
+import math
+import threading
+from typing import Any, Dict, Optional
+from sqlalchemy import event
+
+# Dialects whose buffered cursors receive the whole result with the execute round trip
+BUFFERED_IN_ONE_ROUNDTRIP = {"postgresql", "mysql"}
+
+
+def install_fetch_tuning(engine, arraysize: int, prefetch_rows: int):
+    """
+    Size every cursor of ``engine`` before it executes.
+
+    An ``arraysize`` already raised by the caller (e.g. through ``yield_per``)
+    is left alone.
+
+    Args:
+        engine: Engine to tune
+        arraysize (int): Rows per fetch round trip
+        prefetch_rows (int): Rows Oracle returns with the execute round trip
+    """
+    if engine.dialect.name == "sqlite":
+        return
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _size_cursor(conn, cursor, statement, parameters, context, executemany):
+        if executemany:
+            return
+        if getattr(cursor, "arraysize", arraysize) < arraysize:
+            cursor.arraysize = arraysize
+        if conn.dialect.name == "oracle" and hasattr(cursor, "prefetchrows"):
+            cursor.prefetchrows = prefetch_rows
+        elif hasattr(cursor, "itersize") and getattr(cursor, "name", None):
+            # psycopg2 named (server-side) cursor: rows per FETCH FORWARD
+            cursor.itersize = max(cursor.itersize, arraysize)
+
+
+def estimate_roundtrips(dialect: str, rows: int, server_side: bool, fetch_size: int) -> int:
+    """
+    Network round trips needed to transfer ``rows`` rows.
+
+    Buffered PostgreSQL and MySQL cursors receive the whole result with the
+    query; otherwise each fetch of ``fetch_size`` rows is one round trip.
+    """
+    if not server_side and dialect in BUFFERED_IN_ONE_ROUNDTRIP:
+        return 1
+    return max(1, math.ceil(rows / max(1, fetch_size)))
+
+
+class FetchStats:
+    """Rows transferred and estimated round trips per dialect."""
+
+    def __init__(self):
+        self._totals: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, dialect: str, rows: int, server_side: bool, fetch_size: int):
+        """Account for one result of ``rows`` rows; in-process SQLite is not counted."""
+        if dialect == "sqlite":
+            return
+        roundtrips = estimate_roundtrips(dialect, rows, server_side, fetch_size)
+        with self._lock:
+            totals = self._totals.setdefault(
+                dialect, {"results": 0, "server_side": 0, "rows": 0, "roundtrips": 0}
+            )
+            totals["results"] += 1
+            totals["server_side"] += int(server_side)
+            totals["rows"] += rows
+            totals["roundtrips"] += roundtrips
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                dialect: {**totals, "rows_per_roundtrip": totals["rows"] / totals["roundtrips"]}
+                for dialect, totals in self._totals.items()
+            }
+
+
+def expected_rows(row_limit: Optional[int], plan: Optional[Any]) -> Optional[float]:
+    """Best available estimate of a result's size: its LIMIT, else the planner's estimate."""
+    if row_limit is not None:
+        return row_limit
+    if plan is not None and getattr(plan, "estimated_rows", None) is not None:
+        return plan.estimated_rows
+    return None
@@ -0,0 +1,218 @@
+"""
+In-process metrics registry.
+
+Counters, gauges and fixed-bucket histograms identified by a metric name and
+a set of labels, readable as a JSON-friendly snapshot or in the Prometheus
+text exposition format. Gauges are sampled from a callback when read; a
+callback returning None (e.g. because the object it observes was garbage
+collected) removes the gauge.
+"""
+
+import bisect
+import math
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# Seconds; covers pool checkouts and statements from sub-millisecond to timeouts
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Seconds; connection ages from fresh to long-lived pooled connections
+LIFETIME_BUCKETS = (1.0, 10.0, 60.0, 300.0, 900.0, 1800.0, 3600.0, 7200.0, 21600.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+class Counter:
+    """Monotonically increasing count."""
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+
+class Histogram:
+    """
+    Observations counted into cumulative upper-bound buckets.
+
+    Args:
+        buckets (Sequence[float]): Increasing bucket upper bounds; +Inf is implied
+    """
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.sum += value
+            self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the ``q`` quantile, or None without observations."""
+        with self._lock:
+            counts, total, largest = list(self._counts), self.count, self.max
+        if not total:
+            return None
+        rank = math.ceil(q * total)
+        seen = 0
+        for index, count in enumerate(counts):
+            seen += count
+            if seen >= rank:
+                return min(self.buckets[index], largest) if index < len(self.buckets) else largest
+        return largest
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counts, total, value_sum, largest = list(self._counts), self.count, self.sum, self.max
+        cumulative, running = {}, 0
+        for bound, count in zip(self.buckets + (math.inf,), counts):
+            running += count
+            cumulative["+Inf" if bound == math.inf else repr(bound)] = running
+        return {
+            "count": total,
+            "sum": value_sum,
+            "max": largest,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": cumulative,
+        }
+
+
+class MetricsRegistry:
+    """Named, labelled metrics shared by the whole process."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _family(self, name: str, kind: str, description: str) -> Dict[str, Any]:
+        family = self._metrics.get(name)
+        if family is None:
+            family = self._metrics[name] = {"type": kind, "help": description, "series": {}}
+        elif family["type"] != kind:
+            raise ValueError(f"Metric {name} is already registered as a {family['type']}")
+        return family
+
+    def counter(self, name: str, description: str = "", **labels) -> Counter:
+        """Counter for ``name`` and ``labels``, created on first use."""
+        with self._lock:
+            series = self._family(name, "counter", description)["series"]
+            return series.setdefault(_label_key(labels), Counter())
+
+    def histogram(self, name: str, description: str = "", buckets: Sequence[float] = LATENCY_BUCKETS,
+                  **labels) -> Histogram:
+        """Histogram for ``name`` and ``labels``, created on first use."""
+        with self._lock:
+            series = self._family(name, "histogram", description)["series"]
+            key = _label_key(labels)
+            if key not in series:
+                series[key] = Histogram(buckets)
+            return series[key]
+
+    def gauge(self, name: str, read: Callable[[], Optional[float]], description: str = "", **labels):
+        """Register a gauge sampled from ``read``; replaces an existing gauge with the same labels."""
+        with self._lock:
+            self._family(name, "gauge", description)["series"][_label_key(labels)] = read
+
+    def remove(self, **labels):
+        """Drop every series carrying all of ``labels``."""
+        wanted = set(_label_key(labels))
+        with self._lock:
+            for family in self._metrics.values():
+                for key in [key for key in family["series"] if wanted <= set(key)]:
+                    del family["series"][key]
+
+    def _collect(self) -> List[Tuple[str, Dict[str, Any], List[Tuple[LabelKey, Any]]]]:
+        with self._lock:
+            families = [
+                (name, family, list(family["series"].items())) for name, family in sorted(self._metrics.items())
+            ]
+        collected, dead = [], []
+        for name, family, series in families:
+            values = []
+            for key, metric in series:
+                if family["type"] == "gauge":
+                    try:
+                        value = metric()
+                    except Exception:
+                        value = None
+                    if value is None:
+                        dead.append((name, key))
+                        continue
+                    values.append((key, value))
+                else:
+                    values.append((key, metric))
+            collected.append((name, family, values))
+        if dead:
+            with self._lock:
+                for name, key in dead:
+                    self._metrics[name]["series"].pop(key, None)
+        return collected
+
+    def snapshot(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Every series as ``{"labels": ..., "value": ...}``; histograms as their bucket summary."""
+        result = {}
+        for name, family, series in self._collect():
+            entries = []
+            for key, metric in series:
+                if isinstance(metric, Histogram):
+                    value = metric.snapshot()
+                elif isinstance(metric, Counter):
+                    value = metric.value
+                else:
+                    value = metric
+                entries.append({"labels": dict(key), "value": value})
+            if entries:
+                result[name] = entries
+        return result
+
+    def render_prometheus(self) -> str:
+        """Text exposition format, e.g. for a Prometheus scrape."""
+        lines = []
+        for name, family, series in self._collect():
+            if not series:
+                continue
+            if family["help"]:
+                lines.append(f"# HELP {name} {family['help']}")
+            lines.append(f"# TYPE {name} {family['type']}")
+            for key, metric in series:
+                if isinstance(metric, Histogram):
+                    snapshot = metric.snapshot()
+                    for bound, count in snapshot["buckets"].items():
+                        lines.append(f"{name}_bucket{_render_labels(key + (('le', bound),))} {count}")
+                    lines.append(f"{name}_sum{_render_labels(key)} {snapshot['sum']}")
+                    lines.append(f"{name}_count{_render_labels(key)} {snapshot['count']}")
+                else:
+                    value = metric.value if isinstance(metric, Counter) else metric
+                    lines.append(f"{name}{_render_labels(key)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _render_labels(key: LabelKey) -> str:
+    if not key:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in key) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+# Process-wide registry
+metrics = MetricsRegistry()
@@ -0,0 +1,533 @@
+"""
+Row caps and keyset pagination for generated SQL.
+
+Generated queries get a dialect-appropriate row cap (LIMIT, TOP or
+FETCH FIRST). When a query is ordered deterministically, the last row of a
+page is encoded into an opaque, signed cursor; the next page is fetched with
+a keyset predicate on the ORDER BY columns instead of an OFFSET scan.
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import os
+from datetime import date, datetime, time
+from decimal import Decimal
+from uuid import UUID
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+import sqlparse
+from sqlparse import tokens as T
+from sqlparse.sql import Identifier, IdentifierList
+
+# Signing key for cursors. Set PAGINATION_SECRET when running several workers
+# so cursors issued by one worker are accepted by the others.
+_CURSOR_SECRET = os.getenv("PAGINATION_SECRET", "").encode() or os.urandom(32)
+
+# Alias of the derived table used for keyset follow-up pages
+PAGE_ALIAS = "_page"
+
+# Dialects that sort NULL above every value (last ascending, first descending);
+# the others sort it below every value
+NULLS_SORT_HIGH = {"postgresql", "oracle"}
+
+# Top-level keywords that make a SELECT read more than one table
+_MULTI_TABLE_KEYWORDS = ("JOIN", "APPLY", "UNION", "INTERSECT", "EXCEPT", "MINUS")
+
+# Keywords joining the SELECTs of a compound statement
+_SET_OPERATORS = ("UNION", "INTERSECT", "EXCEPT", "MINUS")
+
+# Alias of the derived table a compound SQL Server statement is capped through
+CAP_ALIAS = "capped"
+
+
+class Page:
+    """One page of query results."""
+
+    def __init__(self, sql: str, rows: List[Dict], has_more: bool, next_cursor: Optional[str] = None):
+        self.sql = sql
+        self.rows = rows
+        self.has_more = has_more
+        self.next_cursor = next_cursor
+
+
+def _statement(sql: str):
+    return sqlparse.parse(sql.strip().rstrip(";").strip())[0]
+
+
+def _significant(tokens) -> List[Any]:
+    return [t for t in tokens if not t.is_whitespace and t.ttype not in T.Comment]
+
+
+def _keyword(token) -> Optional[str]:
+    if token.ttype in T.Keyword or token.ttype in T.Keyword.DML:
+        return token.normalized.upper()
+    return None
+
+
+def _int_value(token) -> Optional[int]:
+    if token is not None and token.ttype in T.Literal.Number.Integer:
+        return int(token.value)
+    return None
+
+
+def _main_select_index(tokens: List[Any]) -> Optional[int]:
+    """Index of the top-level SELECT keyword (after any WITH clause)."""
+    for i, token in enumerate(tokens):
+        if token.ttype in T.Keyword.DML and token.normalized.upper() == "SELECT":
+            return i
+    return None
+
+
+def _is_compound(tokens: List[Any]) -> bool:
+    """Whether the statement combines several SELECTs (UNION, INTERSECT, EXCEPT)."""
+    return any((_keyword(token) or "").split(" ")[0] in _SET_OPERATORS for token in tokens)
+
+
+def _find_top(tokens: List[Any]) -> Optional[Tuple[Any, int]]:
+    """
+    Locate the ``TOP n`` / ``TOP (n)`` of the main SELECT.
+
+    sqlparse groups TOP with the select list (``TOP``, ``500 a``), so the
+    clause is read from the leaf tokens following the SELECT keyword.
+    """
+    select_index = _main_select_index(tokens)
+    if select_index is None or _is_compound(tokens):
+        # A TOP in a compound statement limits only its own SELECT
+        return None
+    leaves = [leaf for token in tokens[select_index + 1:select_index + 4] for leaf in token.flatten()
+              if not leaf.is_whitespace and leaf.ttype not in T.Comment]
+    if leaves and leaves[0].normalized.upper() in ("DISTINCT", "ALL"):
+        leaves = leaves[1:]
+    if not leaves or leaves[0].value.upper() != "TOP":
+        return None
+    leaves = leaves[1:]
+    if leaves and leaves[0].match(T.Punctuation, "("):
+        leaves = leaves[1:]
+    count = _int_value(leaves[0]) if leaves else None
+    return (leaves[0], count) if count is not None else None
+
+
+def _find_limit(tokens: List[Any], dialect: str) -> Optional[Tuple[Any, int]]:
+    """
+    Locate an existing top-level row limit.
+
+    Returns:
+        Optional[Tuple[Any, int]]: (token holding the row count, row count)
+    """
+    if dialect == "mssql":
+        found = _find_top(tokens)
+        if found is not None:
+            return found
+    for i, token in enumerate(tokens):
+        keyword = _keyword(token)
+        following = tokens[i + 1] if i + 1 < len(tokens) else None
+        if keyword == "LIMIT":
+            if isinstance(following, IdentifierList):
+                # MySQL "LIMIT offset, count" parsed as one list
+                numbers = [leaf for leaf in following.flatten() if _int_value(leaf) is not None]
+                if len(numbers) == 2:
+                    return numbers[1], int(numbers[1].value)
+            count = _int_value(following)
+            if count is None:
+                continue
+            # MySQL "LIMIT offset, count"
+            if i + 3 < len(tokens) and tokens[i + 2].match(T.Punctuation, ","):
+                second = _int_value(tokens[i + 3])
+                if second is not None:
+                    return tokens[i + 3], second
+            return following, count
+        if keyword in ("FIRST", "NEXT") and i > 0 and _keyword(tokens[i - 1]) == "FETCH":
+            count = _int_value(following)
+            if count is not None:
+                return following, count
+    return None
+
+
+def find_row_limit(sql: str, dialect: str) -> Optional[int]:
+    """Return the row limit a query already carries, if any."""
+    found = _find_limit(_significant(_statement(sql).tokens), dialect)
+    return found[1] if found else None
+
+
+def apply_row_cap(sql: str, dialect: str, cap: int) -> str:
+    """
+    Cap the number of rows a SELECT statement can return.
+
+    An existing LIMIT / TOP / FETCH FIRST is lowered to ``cap`` if it is larger;
+    otherwise the dialect's own syntax is added. SQL Server's TOP applies to a
+    single SELECT, so compound statements are capped through a derived table.
+
+    Args:
+        sql (str): SELECT statement
+        dialect (str): SQLAlchemy dialect name
+        cap (int): Maximum number of rows
+
+    Returns:
+        str: Capped statement
+    """
+    statement = _statement(sql)
+    tokens = _significant(statement.tokens)
+    select_index = _main_select_index(tokens)
+    if select_index is None:
+        return str(statement)
+
+    found = _find_limit(tokens, dialect)
+    if found is not None:
+        count_token, count = found
+        if count > cap:
+            count_token.value = str(cap)
+        return str(statement)
+
+    if dialect == "mssql" and _is_compound(tokens):
+        return _cap_compound(statement, tokens, select_index, cap)
+    if dialect == "mssql":
+        select = tokens[select_index]
+        anchor = select
+        if select_index + 1 < len(tokens) and _keyword(tokens[select_index + 1]) in ("DISTINCT", "ALL"):
+            anchor = tokens[select_index + 1]
+        anchor.value = f"{anchor.value} TOP {cap}"
+        return str(statement)
+    if dialect == "oracle":
+        return f"{statement} FETCH FIRST {cap} ROWS ONLY"
+    return f"{statement} LIMIT {cap}"
+
+
+def _cap_compound(statement, tokens: List[Any], select_index: int, cap: int) -> str:
+    """
+    Wrap a compound statement as ``SELECT TOP n * FROM (...) AS capped``.
+
+    A WITH clause stays in front, and the ORDER BY moves to the outer query
+    since SQL Server rejects it in a derived table without TOP.
+    """
+    order_by = ""
+    span = _order_by_span(tokens)
+    if span is not None:
+        index, order_list = span
+        order_by = f" ORDER BY {order_list}"
+        tokens[index].value = ""
+        for token in order_list.flatten():
+            token.value = ""
+    start = statement.tokens.index(tokens[select_index])
+    prefix = "".join(str(token) for token in statement.tokens[:start])
+    body = "".join(str(token) for token in statement.tokens[start:]).strip()
+    return f"{prefix}SELECT TOP {cap} * FROM ({body}) AS {CAP_ALIAS}{order_by}"
+
+
+def _order_by_span(tokens: List[Any]) -> Optional[Tuple[int, Any]]:
+    for i, token in enumerate(tokens):
+        if _keyword(token) == "ORDER BY" and i + 1 < len(tokens):
+            return i, tokens[i + 1]
+    return None
+
+
+def _column_name(identifier) -> Optional[str]:
+    """Name of a plain column reference such as ``city`` or ``s.city``."""
+    if not isinstance(identifier, Identifier):
+        return identifier.value if identifier.ttype in T.Name else None
+    for token in identifier.flatten():
+        if token.is_whitespace or token.ttype in T.Name or token.ttype in T.Keyword.Order:
+            continue
+        if token.ttype in T.Literal.String.Symbol or token.match(T.Punctuation, "."):
+            continue
+        return None
+    return identifier.get_real_name()
+
+
+def parse_order_by(sql: str) -> Optional[List[Tuple[str, bool]]]:
+    """
+    Parse a top-level ORDER BY made only of plain column references.
+
+    Returns:
+        Optional[List[Tuple[str, bool]]]: (column name, descending) pairs, or
+        None when there is no ORDER BY or it uses expressions / positions
+    """
+    tokens = _significant(_statement(sql).tokens)
+    span = _order_by_span(tokens)
+    if span is None:
+        return None
+    _, order_list = span
+    items = list(order_list.get_identifiers()) if isinstance(order_list, IdentifierList) else [order_list]
+    keys = []
+    for item in items:
+        name = _column_name(item)
+        if not name:
+            return None
+        if any(token.ttype in T.Keyword.Order and token.normalized.upper() not in ("ASC", "DESC")
+               for token in item.flatten()):
+            # Explicit NULLS FIRST / LAST overrides the dialect's NULL ordering
+            return None
+        descending = isinstance(item, Identifier) and item.get_ordering() == "DESC"
+        keys.append((name, descending))
+    return keys
+
+
+def parse_group_by(sql: str) -> Optional[List[str]]:
+    """Column names of a top-level GROUP BY made only of plain column references."""
+    tokens = _significant(_statement(sql).tokens)
+    for i, token in enumerate(tokens):
+        if _keyword(token) == "GROUP BY" and i + 1 < len(tokens):
+            group_list = tokens[i + 1]
+            items = list(group_list.get_identifiers()) if isinstance(group_list, IdentifierList) else [group_list]
+            names = [_column_name(item) for item in items]
+            return names if all(names) else None
+    return None
+
+
+def single_table(sql: str) -> Optional[str]:
+    """
+    Name of the only table a plain SELECT reads.
+
+    Returns:
+        Optional[str]: Unqualified table name, or None for joins, comma joins,
+        derived tables, set operations, CTEs and grouped queries
+    """
+    tokens = _significant(_statement(sql).tokens)
+    select_index = _main_select_index(tokens)
+    if select_index is None or select_index > 0:
+        return None
+    table = None
+    for i, token in enumerate(tokens):
+        keyword = _keyword(token)
+        if keyword is None:
+            continue
+        if keyword == "GROUP BY" or any(word in keyword for word in _MULTI_TABLE_KEYWORDS):
+            return None
+        if keyword == "FROM":
+            following = tokens[i + 1] if i + 1 < len(tokens) else None
+            if table is not None or not isinstance(following, Identifier) or following.tokens[0].ttype not in T.Name:
+                return None
+            table = following.get_real_name()
+    return table
+
+
+def renamed_columns(sql: str) -> Set[str]:
+    """
+    Lower-cased output names of a top-level SELECT list that do not come from
+    the column of the same name, e.g. ``UPPER(name) AS id`` or ``name AS id``.
+    """
+    tokens = _significant(_statement(sql).tokens)
+    select_index = _main_select_index(tokens)
+    if select_index is None:
+        return set()
+    index = select_index + 1
+    if index < len(tokens) and _keyword(tokens[index]) in ("DISTINCT", "ALL"):
+        index += 1
+    if index >= len(tokens):
+        return set()
+    select_list = tokens[index]
+    items = list(select_list.get_identifiers()) if isinstance(select_list, IdentifierList) else [select_list]
+    renamed = set()
+    for item in items:
+        alias = item.get_alias() if isinstance(item, Identifier) else None
+        if not alias:
+            continue
+        source = item.tokens[0]
+        if isinstance(source, Identifier):
+            source_name = source.get_real_name() if source.tokens[-1].ttype in T.Name else None
+        else:
+            source_name = source.value if source.ttype in T.Name else None
+        if source_name is None or source_name.lower() != alias.lower():
+            renamed.add(alias.lower())
+    return renamed
+
+
+def remove_order_by(sql: str) -> str:
+    """Drop the top-level ORDER BY clause of a statement."""
+    statement = _statement(sql)
+    tokens = _significant(statement.tokens)
+    span = _order_by_span(tokens)
+    if span is None:
+        return str(statement)
+    index, order_list = span
+    tokens[index].value = ""
+    order_list.value = ""
+    for token in order_list.flatten():
+        token.value = ""
+    return str(statement).strip()
+
+
+def is_deterministic(order_keys: List[Tuple[str, bool]], primary_key: Sequence[str],
+                     group_by: Optional[List[str]] = None) -> bool:
+    """
+    Whether an ordering identifies each row uniquely.
+
+    The ordering is treated as deterministic when it includes every column
+    of ``primary_key``, which must be the primary key of the only table the
+    query reads (see ``single_table()``), or when it covers every GROUP BY
+    column.
+    """
+    names = {name.lower() for name, _ in order_keys}
+    if primary_key and {column.lower() for column in primary_key} <= names:
+        return True
+    if group_by:
+        return {name.lower() for name in group_by} <= names
+    return False
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"t": "datetime", "v": value.isoformat()}
+    if isinstance(value, date):
+        return {"t": "date", "v": value.isoformat()}
+    if isinstance(value, time):
+        return {"t": "time", "v": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"t": "decimal", "v": str(value)}
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return {"t": "bytes", "v": _b64encode(bytes(value))}
+    if isinstance(value, UUID):
+        return {"t": "uuid", "v": str(value)}
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    raise TypeError(f"Cannot encode a {type(value).__name__} value in a pagination cursor")
+
+
+def _decode_value(value: Any) -> Any:
+    if not isinstance(value, dict):
+        return value
+    kind, raw = value.get("t"), value.get("v")
+    if kind == "datetime":
+        return datetime.fromisoformat(raw)
+    if kind == "date":
+        return date.fromisoformat(raw)
+    if kind == "time":
+        return time.fromisoformat(raw)
+    if kind == "decimal":
+        return Decimal(raw)
+    if kind == "bytes":
+        return _b64decode(raw)
+    if kind == "uuid":
+        return UUID(raw)
+    raise ValueError("Invalid cursor value")
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def encode_cursor(state: Dict[str, Any]) -> str:
+    """Serialize and sign a pagination state into an opaque cursor."""
+    payload = json.dumps(state, separators=(",", ":"), sort_keys=True).encode()
+    signature = hmac.new(_CURSOR_SECRET, payload, hashlib.sha256).digest()
+    return f"{_b64encode(payload)}.{_b64encode(signature)}"
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """
+    Verify and deserialize a cursor produced by ``encode_cursor``.
+
+    Raises:
+        ValueError: If the cursor is malformed or its signature does not match
+    """
+    try:
+        payload_part, signature_part = cursor.split(".", 1)
+        payload = _b64decode(payload_part)
+        signature = _b64decode(signature_part)
+    except (ValueError, TypeError):
+        raise ValueError("Malformed pagination cursor")
+    expected = hmac.new(_CURSOR_SECRET, payload, hashlib.sha256).digest()
+    if not hmac.compare_digest(signature, expected):
+        raise ValueError("Invalid pagination cursor")
+    return json.loads(payload)
+
+
+def make_cursor(sql: str, params: Optional[Dict], order_keys: List[Tuple[str, bool]],
+                last_row: Dict, page_size: int, connection_id: str) -> str:
+    """Build the cursor pointing just past ``last_row``."""
+    return encode_cursor({
+        "sql": sql,
+        "params": {name: _encode_value(value) for name, value in (params or {}).items()},
+        "keys": [[name, descending] for name, descending in order_keys],
+        "after": [_encode_value(last_row[name]) for name, _ in order_keys],
+        "size": page_size,
+        "conn": connection_id,
+    })
+
+
+def make_buffer_cursor(sql: str, token: Optional[str], offset: int, page_size: int, connection_id: str,
+                       params: Optional[Dict] = None) -> str:
+    """
+    Build a cursor for the page at ``offset`` of a result buffered under ``token``.
+
+    A None ``token`` stands for a result not fetched yet; ``params`` are
+    kept so the page that needs it can run the query.
+    """
+    return encode_cursor({
+        "sql": sql,
+        "params": {name: _encode_value(value) for name, value in (params or {}).items()},
+        "buffer": token,
+        "offset": offset,
+        "size": page_size,
+        "conn": connection_id,
+    })
+
+
+def cursor_params(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Bind parameters for the page a cursor points to, including the keyset values."""
+    params = {name: _decode_value(value) for name, value in state.get("params", {}).items()}
+    for i, value in enumerate(state.get("after", ())):
+        if value is not None:
+            # NULL keys are matched with IS NULL instead of a bind parameter
+            params[f"_k{i}"] = _decode_value(value)
+    return params
+
+
+def null_keys(state: Dict[str, Any]) -> List[int]:
+    """Positions of the keyset values of a cursor that are NULL."""
+    return [i for i, value in enumerate(state["after"]) if value is None]
+
+
+def _after(column: str, index: int, descending: bool, is_null: bool, nulls_high: bool) -> Optional[str]:
+    """Predicate for ``column`` sorting strictly after key ``index``; None if nothing can."""
+    nulls_last = nulls_high != descending
+    if is_null:
+        return None if nulls_last else f"{column} IS NOT NULL"
+    after = f"{column} {'<' if descending else '>'} :_k{index}"
+    return f"({after} OR {column} IS NULL)" if nulls_last else after
+
+
+def build_keyset_query(sql: str, order_keys: List[Tuple[str, bool]], dialect: str,
+                       page_size: int, quote: Callable[[str], str],
+                       null_keys: Sequence[int] = ()) -> str:
+    """
+    Build the SQL for the page following a given key tuple.
+
+    The original query becomes a derived table filtered with
+    ``(k1 > :_k0) OR (k1 = :_k0 AND k2 > :_k1) ...`` (``<`` for descending
+    keys) and re-ordered, so the database can seek instead of skipping rows.
+    Bind parameters are named ``_k0``, ``_k1``, ... NULL keys are compared
+    with ``IS NULL`` / ``IS NOT NULL`` following the dialect's NULL ordering
+    (see ``NULLS_SORT_HIGH``).
+
+    Args:
+        sql (str): Original SELECT statement
+        order_keys (List[Tuple[str, bool]]): Output column names and directions
+        dialect (str): SQLAlchemy dialect name
+        page_size (int): Rows to fetch
+        quote (Callable[[str], str]): Identifier quoting function for the dialect
+        null_keys (Sequence[int]): Positions of the keys whose value is NULL
+
+    Returns:
+        str: Keyset page statement
+    """
+    # Without its own row limit the inner ORDER BY is redundant, and SQL Server
+    # rejects ORDER BY in a derived table that has no TOP.
+    inner = str(_statement(sql)) if find_row_limit(sql, dialect) is not None else remove_order_by(sql)
+    nulls_high = dialect in NULLS_SORT_HIGH
+    columns = [f"{PAGE_ALIAS}.{quote(name)}" for name, _ in order_keys]
+    equal = [f"{column} IS NULL" if i in null_keys else f"{column} = :_k{i}" for i, column in enumerate(columns)]
+    disjuncts = []
+    for i, (_, descending) in enumerate(order_keys):
+        after = _after(columns[i], i, descending, i in null_keys, nulls_high)
+        if after is not None:
+            disjuncts.append("(" + " AND ".join(equal[:i] + [after]) + ")")
+    if not disjuncts:
+        disjuncts.append("1 = 0")
+    order = ", ".join(f"{PAGE_ALIAS}.{quote(name)}{' DESC' if descending else ''}" for name, descending in order_keys)
+    page_sql = f"SELECT * FROM ({inner}) {PAGE_ALIAS} WHERE {' OR '.join(disjuncts)} ORDER BY {order}"
+    return apply_row_cap(page_sql, dialect, page_size)
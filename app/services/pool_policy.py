@@ -0,0 +1,103 @@
+"""
+Connection pool policy per dialect and workload.
+
+``pool_options`` turns ``DEFAULT_CONNECTION_SETTINGS`` into the pool keyword
+arguments of ``create_engine`` for one database URL:
+
+- In-memory SQLite gets a ``StaticPool``: every checkout shares the single
+  connection that holds the database, from any thread.
+- File SQLite keeps a sized ``QueuePool`` (reopening the file per checkout
+  costs more than twice as much, and loses the per-connection statement and
+  page caches) but without pre-ping and recycling, which only guard against
+  servers dropping idle connections.
+- Server databases get a sized ``QueuePool`` with pre-ping, recycling, LIFO
+  checkout and a connect timeout.
+
+``POOL_CLASS`` forces a pool class for every dialect, e.g. ``null`` behind an
+external pooler such as PgBouncer.
+"""
+
+from typing import Any, Dict, Optional
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool, QueuePool, SingletonThreadPool, StaticPool
+from config.database_config import DEFAULT_CONNECTION_SETTINGS
+
+POOL_CLASSES = {
+    "queue": QueuePool,
+    "null": NullPool,
+    "static": StaticPool,
+    "singleton": SingletonThreadPool,
+}
+
+# connect() keyword of each driver for its connect timeout in seconds
+_CONNECT_TIMEOUT_ARGS = {
+    "postgresql": "connect_timeout",
+    "mysql": "connect_timeout",
+}
+_ASYNC_CONNECT_TIMEOUT_ARGS = {
+    "postgresql": "timeout",
+    "mysql": "connect_timeout",
+}
+
+
+def is_memory_sqlite(url) -> bool:
+    """Whether ``url`` is an SQLite database living only in memory."""
+    url = make_url(url)
+    database = url.database or ""
+    return url.get_backend_name() == "sqlite" and (
+        database in ("", ":memory:") or database.startswith("file::memory:") or "mode=memory" in database
+        or url.query.get("mode") == "memory"
+    )
+
+
+def pool_options(url, settings: Optional[Dict[str, Any]] = None, is_async: bool = False) -> Dict[str, Any]:
+    """
+    Pool keyword arguments of ``create_engine`` for ``url``.
+
+    Args:
+        url: Database URL (string or ``URL``)
+        settings (Optional[Dict[str, Any]]): Pool settings; defaults to ``DEFAULT_CONNECTION_SETTINGS``
+        is_async (bool): Options for an asyncio engine, whose queue pool class
+            SQLAlchemy picks itself; only a forced ``null`` pool is honoured there
+
+    Returns:
+        Dict[str, Any]: Keyword arguments, including ``connect_args`` entries to merge
+
+    Raises:
+        ValueError: If the settings name an unknown pool class
+    """
+    settings = settings or DEFAULT_CONNECTION_SETTINGS
+    url = make_url(url)
+    backend = url.get_backend_name()
+    forced = (settings.get("pool_class") or "").lower()
+    if forced and forced not in POOL_CLASSES:
+        raise ValueError(f"Unknown pool class {forced!r}; expected one of {', '.join(POOL_CLASSES)}")
+
+    if forced and not (is_async and forced != "null"):
+        poolclass = POOL_CLASSES[forced]
+    elif is_memory_sqlite(url) and not is_async:
+        poolclass = StaticPool
+    else:
+        poolclass = QueuePool
+
+    options: Dict[str, Any] = {"connect_args": {}}
+    if poolclass is not QueuePool or not is_async:
+        options["poolclass"] = poolclass
+    if poolclass is QueuePool:
+        options.update(
+            pool_size=settings["pool_size"],
+            max_overflow=settings["max_overflow"],
+            pool_timeout=settings["pool_timeout"],
+            pool_use_lifo=settings["pool_use_lifo"],
+        )
+    elif poolclass is SingletonThreadPool:
+        options["pool_size"] = settings["pool_size"]
+
+    if backend != "sqlite":
+        options["pool_pre_ping"] = settings["pool_pre_ping"]
+        options["pool_recycle"] = settings["pool_recycle"]
+        timeout_arg = (_ASYNC_CONNECT_TIMEOUT_ARGS if is_async else _CONNECT_TIMEOUT_ARGS).get(backend)
+        if timeout_arg and settings.get("connect_timeout"):
+            options["connect_args"][timeout_arg] = settings["connect_timeout"]
+    return options
+
@@ -0,0 +1,210 @@
+"""
+Connection pool telemetry.
+
+``instrument_engine`` attaches pool and execution event listeners to an
+engine and reports into the metrics registry, labelled with the engine's
+password-free URL:
+
+- checkout wait time (including connection creation and pre-ping), checkouts
+  and checkout timeouts, and callers currently waiting for a connection
+- connections opened, how long each is held per checkout, connection
+  lifetimes and invalidations (hard and soft)
+- statement execution time on the database, separate from the wait
+- gauges for checked-out and overflow connections, pool size and saturation
+  (checked out / maximum), sampled when the metrics are read
+
+Together with the model generation time recorded by ``SQLGenerator`` this
+tells whether a slow request waited on the pool, the model or the database.
+"""
+
+import threading
+import time
+import weakref
+from typing import Any, Dict, Optional
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from app.services.metrics import LIFETIME_BUCKETS, MetricsRegistry, metrics
+
+
+def instrument_engine(engine, label: str, registry: Optional[MetricsRegistry] = None):
+    """
+    Report pool and statement metrics of ``engine`` to ``registry``.
+
+    Args:
+        engine: Engine to instrument (the ``sync_engine`` of an asyncio engine)
+        label (str): Value of the ``engine`` label; must not contain credentials
+        registry (Optional[MetricsRegistry]): Defaults to the process-wide registry
+    """
+    registry = registry or metrics
+    checkout_seconds = registry.histogram(
+        "db_pool_checkout_seconds", "Time to obtain a pooled connection", engine=label
+    )
+    checkouts = registry.counter("db_pool_checkouts_total", "Connections checked out", engine=label)
+    timeouts = registry.counter(
+        "db_pool_checkout_timeouts_total", "Checkouts that gave up waiting for a connection", engine=label
+    )
+    opened = registry.counter("db_pool_connections_opened_total", "New DBAPI connections", engine=label)
+    hold_seconds = registry.histogram(
+        "db_pool_connection_hold_seconds", "Time a connection stays checked out", engine=label
+    )
+    lifetime_seconds = registry.histogram(
+        "db_pool_connection_lifetime_seconds", "Age of connections when closed",
+        buckets=LIFETIME_BUCKETS, engine=label
+    )
+    invalidations = registry.counter(
+        "db_pool_invalidations_total", "Connections invalidated", engine=label, soft=False
+    )
+    soft_invalidations = registry.counter(
+        "db_pool_invalidations_total", "Connections invalidated", engine=label, soft=True
+    )
+    statement_seconds = registry.histogram(
+        "db_statement_seconds", "Statement execution time on the database", engine=label
+    )
+    waiting = _Waiting()
+
+    def instrument_pool(pool):
+        connect = pool.connect
+
+        def timed_connect():
+            started = time.perf_counter()
+            waiting.add(1)
+            try:
+                connection = connect()
+            except PoolTimeoutError:
+                timeouts.inc()
+                raise
+            finally:
+                waiting.add(-1)
+            checkout_seconds.observe(time.perf_counter() - started)
+            return connection
+
+        pool.connect = timed_connect
+
+    instrument_pool(engine.pool)
+
+    @event.listens_for(engine, "engine_disposed")
+    def _reinstrument(disposed_engine):
+        # dispose() replaces the pool; pool event listeners carry over, the timer does not
+        instrument_pool(engine.pool)
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, record):
+        record.info["opened_at"] = time.monotonic()
+        opened.inc()
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, record, proxy):
+        record.info["checked_out_at"] = time.monotonic()
+        checkouts.inc()
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, record):
+        checked_out_at = record.info.pop("checked_out_at", None)
+        if checked_out_at is not None:
+            hold_seconds.observe(time.monotonic() - checked_out_at)
+
+    def _on_close(dbapi_connection, record):
+        opened_at = record.info.get("opened_at")
+        if opened_at is not None:
+            lifetime_seconds.observe(time.monotonic() - opened_at)
+
+    event.listen(engine, "close", _on_close)
+
+    @event.listens_for(engine, "invalidate")
+    def _on_invalidate(dbapi_connection, record, exception):
+        invalidations.inc()
+
+    @event.listens_for(engine, "soft_invalidate")
+    def _on_soft_invalidate(dbapi_connection, record, exception):
+        soft_invalidations.inc()
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start_statement(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._telemetry_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _end_statement(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_telemetry_started", None)
+        if started is not None:
+            statement_seconds.observe(time.perf_counter() - started)
+
+    engine_ref = weakref.ref(engine)
+
+    def sample(read):
+        def gauge():
+            current = engine_ref()
+            return read(current.pool) if current is not None else None
+        return gauge
+
+    registry.gauge("db_pool_checked_out", sample(_checked_out), "Connections in use", engine=label)
+    registry.gauge("db_pool_overflow", sample(_overflow), "Connections beyond the pool size", engine=label)
+    registry.gauge("db_pool_size", sample(_size), "Steady-state pool size", engine=label)
+    registry.gauge("db_pool_waiting", sample(lambda pool: waiting.value), "Callers waiting for a connection",
+                   engine=label)
+    registry.gauge("db_pool_saturation", sample(_saturation), "Checked out / maximum connections", engine=label)
+
+
+class _Waiting:
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def add(self, delta: int):
+        with self._lock:
+            self.value += delta
+
+
+def _checked_out(pool) -> int:
+    checkedout = getattr(pool, "checkedout", None)
+    return checkedout() if callable(checkedout) else 0
+
+
+def _overflow(pool) -> int:
+    overflow = getattr(pool, "overflow", None)
+    # QueuePool counts from -size until the pool is full
+    return max(0, overflow()) if callable(overflow) else 0
+
+
+def _size(pool) -> int:
+    size = getattr(pool, "size", None)
+    return size() if callable(size) else 1
+
+
+def _saturation(pool) -> float:
+    max_overflow = getattr(pool, "_max_overflow", 0)
+    if max_overflow < 0:
+        # Unbounded overflow never saturates
+        return 0.0
+    return _checked_out(pool) / max(1, _size(pool) + max_overflow)
+
+
+def pool_summary(registry: Optional[MetricsRegistry] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Current state of every instrumented pool, keyed by engine label.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Gauges, checkout wait percentiles, timeouts and invalidations
+    """
+    snapshot = (registry or metrics).snapshot()
+    summary: Dict[str, Dict[str, Any]] = {}
+
+    def entries(name):
+        for entry in snapshot.get(name, []):
+            yield summary.setdefault(entry["labels"]["engine"], {}), entry
+
+    for name, key in (("db_pool_checked_out", "checked_out"), ("db_pool_overflow", "overflow"),
+                      ("db_pool_size", "size"), ("db_pool_waiting", "waiting"),
+                      ("db_pool_saturation", "saturation"), ("db_pool_checkouts_total", "checkouts"),
+                      ("db_pool_checkout_timeouts_total", "checkout_timeouts")):
+        for pool, entry in entries(name):
+            pool[key] = entry["value"]
+    for pool, entry in entries("db_pool_checkout_seconds"):
+        pool["checkout_p50_seconds"] = entry["value"]["p50"]
+        pool["checkout_p95_seconds"] = entry["value"]["p95"]
+    for pool, entry in entries("db_statement_seconds"):
+        pool["statement_p95_seconds"] = entry["value"]["p95"]
+    for pool, entry in entries("db_pool_invalidations_total"):
+        key = "soft_invalidations" if entry["labels"]["soft"] == "True" else "invalidations"
+        pool[key] = entry["value"]
+    return summary
@@ -0,0 +1,180 @@
+"""
+Connection pool pre-warming.
+
+A freshly created engine holds only the connection its first query opened,
+so the first burst of concurrent queries pays the TCP, TLS and
+authentication handshakes one after another. ``prewarm`` opens the missing
+idle connections of one or more pools in parallel threads, validates each
+with the dialect's ping and leaves them checked in. ``PoolKeeper`` repeats
+this in the background for every engine in use, holding the idle floor
+after connections are recycled, invalidated or closed, and sweeps the engine
+registry so idle engines are disposed on time.
+
+Warming only uses the public pool API: it checks out as many connections
+at once as should sit idle, which makes the pool open the missing ones, and
+checks them all back in. Until then a concurrent query may find no idle
+connection and open its own (or wait, with no overflow left). Other pool
+classes (static, null, singleton-thread) and asyncio pools are left alone.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, List, Optional
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+logger = logging.getLogger(__name__)
+
+
+def idle_deficit(engine, min_idle: int) -> int:
+    """
+    Connections to open so that ``engine`` has ``min_idle`` checked in.
+
+    The floor is capped at the steady-state pool size, since connections
+    beyond it would be closed again on check-in.
+
+    Args:
+        engine: Engine whose pool to inspect
+        min_idle (int): Idle connections wanted
+
+    Returns:
+        int: Missing idle connections; 0 for pools that are not warmed
+    """
+    pool = engine.pool
+    if not isinstance(pool, QueuePool) or isinstance(pool, AsyncAdaptedQueuePool):
+        return 0
+    room = pool.size() - pool.checkedin() - pool.checkedout()
+    return max(0, min(min_idle - pool.checkedin(), room))
+
+
+def prewarm(engines: List[Any], min_idle: int, timeout: Optional[float] = None) -> List[int]:
+    """
+    Open the missing idle connections of ``engines`` in parallel.
+
+    Failures are logged and leave the pool with fewer warm connections; they
+    do not raise, since the engines were already tested by the caller.
+
+    Args:
+        engines (List[Any]): Engines to warm
+        min_idle (int): Idle connections wanted per engine
+        timeout (Optional[float]): Seconds to wait for the connections; slower
+            ones still join the pool when they complete
+
+    Returns:
+        List[int]: Connections added per engine, in order
+    """
+    # Checking out every connection that should be idle makes the pool open the missing ones
+    idle = [engine.pool.checkedin() if idle_deficit(engine, min_idle) else 0 for engine in engines]
+    tasks = [
+        (index, engine)
+        for index, engine in enumerate(engines)
+        for _ in range(idle[index] + idle_deficit(engine, min_idle))
+    ]
+    added = [0] * len(engines)
+    if not tasks:
+        return added
+
+    started = time.perf_counter()
+    executor = ThreadPoolExecutor(max_workers=len(tasks), thread_name_prefix="pool-prewarm")
+    futures = {executor.submit(_check_out, engine): index for index, engine in tasks}
+    done, pending = wait(futures, timeout=timeout)
+    executor.shutdown(wait=False)
+    checked_out = [0] * len(engines)
+    for future in done:
+        if future.exception() is None:
+            future.result().close()
+            checked_out[futures[future]] += 1
+        else:
+            logger.warning(f"Could not pre-warm connection: {str(future.exception())}")
+    for future in pending:
+        future.add_done_callback(_check_in)
+    added = [max(0, count - idle[index]) for index, count in enumerate(checked_out)]
+    if pending:
+        logger.warning(f"{len(pending)} connection(s) still opening after {timeout}s; they join the pool when ready")
+    logger.info(
+        f"Pre-warmed {sum(added)} connection(s) across {len(engines)} engine(s) "
+        f"in {(time.perf_counter() - started) * 1000:.0f} ms"
+    )
+    return added
+
+
+def _check_out(engine):
+    """Check out one pooled connection and validate it with the dialect's ping."""
+    connection = engine.pool.connect()
+    try:
+        engine.dialect.do_ping(connection.dbapi_connection)
+    except Exception:
+        # Discard the broken connection instead of returning it to the pool
+        connection.invalidate()
+        connection.close()
+        raise
+    return connection
+
+
+def _check_in(future):
+    """Return a connection whose checkout finished after ``prewarm`` stopped waiting."""
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+class PoolKeeper:
+    """
+    Background thread holding the idle floor of every engine in use.
+
+    Args:
+        registry: ``EngineRegistry`` whose engines to keep warm and sweep
+        min_idle (int): Idle connections kept per engine in use
+        interval (float): Seconds between rounds
+        timeout (Optional[float]): Seconds to wait for new connections per round
+    """
+
+    def __init__(self, registry, min_idle: int, interval: float, timeout: Optional[float] = None):
+        self.registry = registry
+        self.min_idle = min_idle
+        self.interval = interval
+        self.timeout = timeout
+        self.rounds = 0
+        self.opened = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the keeper thread unless it is running or disabled (interval 0)."""
+        with self._lock:
+            if self.interval <= 0 or (self._thread is not None and self._thread.is_alive()):
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="pool-keeper", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the keeper thread and wait for its current round."""
+        self._stop.set()
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join()
+
+    def run_once(self) -> int:
+        """
+        One round: dispose expired idle engines, then top up the engines in use.
+
+        Returns:
+            int: Connections opened
+        """
+        self.registry.sweep()
+        opened = 0
+        if self.min_idle > 0:
+            opened = sum(prewarm(self.registry.in_use(), self.min_idle, self.timeout))
+        self.rounds += 1
+        self.opened += opened
+        return opened
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.warning(f"Pool keeper round failed: {str(e)}")
@@ -0,0 +1,304 @@
+"""
+Per-query deadlines and cooperative cancellation.
+
+Deadlines are enforced by each database natively: a progress handler on
+SQLite, ``statement_timeout`` on PostgreSQL, ``MAX_EXECUTION_TIME`` on MySQL,
+the connection query timeout on pyodbc and ``call_timeout`` on Oracle. A
+``CancelHandle`` lets another thread abort the running statement through the
+driver's own cancel mechanism, or abandon the awaiting driver call on the
+asyncio path.
+"""
+
+import asyncio
+import logging
+import math
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Callable, Optional
+from sqlalchemy import event, text
+
+logger = logging.getLogger(__name__)
+
+# Number of SQLite VM instructions between deadline / cancel checks
+SQLITE_PROGRESS_STEPS = 1000
+
+
+class QueryTimeoutError(RuntimeError):
+    """Raised when a query runs past its deadline."""
+
+
+class QueryCancelledError(RuntimeError):
+    """Raised when a query is cancelled through its handle."""
+
+
+class CancelHandle:
+    """
+    Deadline and cancel switch for one query execution.
+
+    Args:
+        timeout (Optional[float]): Seconds the query may run; None for no deadline
+        query_id (Optional[str]): Identifier under which the query can be cancelled
+    """
+
+    def __init__(self, timeout: Optional[float] = None, query_id: Optional[str] = None):
+        self.timeout = timeout if timeout and timeout > 0 else None
+        self.query_id = query_id
+        self.deadline: Optional[float] = None
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._dialect: Optional[str] = None
+        self._dbapi_connection: Any = None
+        self._engine: Any = None
+        self._waker: Optional[Callable[[], None]] = None
+        self.cursor: Any = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def expired(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def remaining_ms(self) -> Optional[int]:
+        """Milliseconds left before the deadline, or None without a deadline."""
+        if self.deadline is None:
+            return None
+        return max(0, int((self.deadline - time.monotonic()) * 1000))
+
+    def start(self):
+        """Start the deadline clock; called when execution begins."""
+        if self.timeout is not None and self.deadline is None:
+            self.deadline = time.monotonic() + self.timeout
+
+    def check(self):
+        """Raise if the query was cancelled or its deadline has passed."""
+        if self.cancelled:
+            raise QueryCancelledError("Query was cancelled")
+        if self.expired():
+            raise QueryTimeoutError(f"Query exceeded its {self.timeout:g}s timeout")
+
+    def cancel(self) -> bool:
+        """
+        Cancel the query, interrupting it in the database if it is running.
+
+        Returns:
+            bool: True if a running statement was signalled
+        """
+        self._cancelled.set()
+        with self._lock:
+            dialect, dbapi_connection, engine, cursor = self._dialect, self._dbapi_connection, self._engine, self.cursor
+            waker = self._waker
+        if waker is not None:
+            # Async execution: wakes the await_cancellable() call awaiting the driver
+            waker()
+            return True
+        if dbapi_connection is None:
+            return False
+        try:
+            if dialect == "sqlite":
+                dbapi_connection.interrupt()
+            elif dialect in ("postgresql", "oracle") and hasattr(dbapi_connection, "cancel"):
+                dbapi_connection.cancel()
+            elif dialect == "mssql" and cursor is not None:
+                cursor.cancel()
+            elif dialect == "mysql" and hasattr(dbapi_connection, "thread_id"):
+                # MySQL drivers cannot cancel in-band; kill the statement from a second connection
+                with engine.connect() as connection:
+                    connection.execute(text(f"KILL QUERY {int(dbapi_connection.thread_id())}"))
+            else:
+                return False
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to cancel running query: {str(e)}")
+            return False
+
+    def _attach(self, dialect: str, dbapi_connection: Any, engine: Any):
+        with self._lock:
+            self._dialect = dialect
+            self._dbapi_connection = dbapi_connection
+            self._engine = engine
+
+    def _detach(self):
+        with self._lock:
+            self._dialect = None
+            self._dbapi_connection = None
+            self._engine = None
+            self._waker = None
+            self.cursor = None
+
+    def _set_waker(self, waker: Optional[Callable[[], None]]):
+        with self._lock:
+            self._waker = waker
+
+
+def _track_cursor(conn, cursor, statement, parameters, context, executemany):
+    handle = conn.info.get("cancel_handle")
+    if handle is not None:
+        handle.cursor = cursor
+
+
+def install_cancel_hooks(engine):
+    """Record the DBAPI cursor of each execution so pyodbc statements can be cancelled."""
+    if not event.contains(engine, "before_cursor_execute", _track_cursor):
+        event.listen(engine, "before_cursor_execute", _track_cursor)
+
+
+@contextmanager
+def enforce_deadline(connection, handle: CancelHandle):
+    """
+    Apply ``handle``'s deadline to ``connection`` and make it cancellable.
+
+    Driver errors raised because of the deadline or a cancel are re-raised as
+    ``QueryTimeoutError`` / ``QueryCancelledError``. A connection interrupted
+    mid-statement on a server database is invalidated rather than returned to
+    the pool.
+    """
+    handle.start()
+    handle.check()
+
+    dialect = connection.dialect.name
+    dbapi_connection = connection.connection.dbapi_connection
+    remaining = handle.remaining_ms()
+    connection.info["cancel_handle"] = handle
+    handle._attach(dialect, dbapi_connection, connection.engine)
+    try:
+        if dialect == "sqlite":
+            dbapi_connection.set_progress_handler(
+                lambda: 1 if handle.cancelled or handle.expired() else 0,
+                SQLITE_PROGRESS_STEPS
+            )
+        elif remaining is not None:
+            remaining = max(1, remaining)
+            if dialect == "postgresql":
+                # Scoped to the current transaction, which ends when the connection is released
+                connection.execute(text(f"SET LOCAL statement_timeout = {remaining}"))
+            elif dialect == "mysql":
+                connection.execute(text(f"SET SESSION MAX_EXECUTION_TIME = {remaining}"))
+            elif dialect == "mssql":
+                dbapi_connection.timeout = max(1, math.ceil(remaining / 1000))
+            elif dialect == "oracle":
+                dbapi_connection.call_timeout = remaining
+
+        # Cancelled while the deadline was being set up
+        handle.check()
+        yield handle
+    except (QueryTimeoutError, QueryCancelledError):
+        raise
+    except Exception as e:
+        if handle.cancelled or handle.expired():
+            if dialect != "sqlite":
+                connection.invalidate()
+            handle.check()
+        raise
+    finally:
+        handle._detach()
+        connection.info.pop("cancel_handle", None)
+        if not connection.invalidated:
+            try:
+                if dialect == "sqlite":
+                    dbapi_connection.set_progress_handler(None, 0)
+                elif dialect == "mysql" and remaining is not None:
+                    connection.execute(text("SET SESSION MAX_EXECUTION_TIME = 0"))
+                elif dialect == "mssql" and remaining is not None:
+                    dbapi_connection.timeout = 0
+                elif dialect == "oracle" and remaining is not None:
+                    dbapi_connection.call_timeout = 0
+            except Exception:
+                connection.invalidate()
+
+
+def _signal(future: "asyncio.Future"):
+    if not future.done():
+        future.set_result(None)
+
+
+@asynccontextmanager
+async def enforce_deadline_async(connection, handle: CancelHandle):
+    """
+    Async counterpart of ``enforce_deadline`` for ``AsyncConnection`` objects.
+
+    SQLite (aiosqlite) gets the same progress handler, run on the driver's
+    worker thread; PostgreSQL and MySQL get their native statement timeouts.
+    Driver calls wrapped in ``await_cancellable()`` are abandoned as soon as
+    the handle is cancelled, which asyncpg / aiomysql turn into a server-side
+    cancel or a closed connection.
+    """
+    handle.start()
+    handle.check()
+
+    dialect = connection.dialect.name
+    raw_connection = await connection.get_raw_connection()
+    driver_connection = raw_connection.driver_connection
+    remaining = handle.remaining_ms()
+    loop = asyncio.get_running_loop()
+    cancel_signal = loop.create_future()
+    connection.info["cancel_signal"] = cancel_signal
+    handle._set_waker(lambda: loop.call_soon_threadsafe(_signal, cancel_signal))
+    try:
+        if dialect == "sqlite":
+            await driver_connection.set_progress_handler(
+                lambda: 1 if handle.cancelled or handle.expired() else 0,
+                SQLITE_PROGRESS_STEPS
+            )
+        elif remaining is not None:
+            remaining = max(1, remaining)
+            if dialect == "postgresql":
+                await connection.execute(text(f"SET LOCAL statement_timeout = {remaining}"))
+            elif dialect == "mysql":
+                await connection.execute(text(f"SET SESSION MAX_EXECUTION_TIME = {remaining}"))
+
+        handle.check()
+        yield handle
+    except (QueryTimeoutError, QueryCancelledError):
+        raise
+    except Exception:
+        if handle.cancelled or handle.expired():
+            if dialect != "sqlite":
+                await connection.invalidate()
+            handle.check()
+        raise
+    finally:
+        handle._set_waker(None)
+        connection.info.pop("cancel_signal", None)
+        if not connection.invalidated:
+            try:
+                if dialect == "sqlite":
+                    await driver_connection.set_progress_handler(None, 0)
+                elif dialect == "mysql" and remaining is not None:
+                    await connection.execute(text("SET SESSION MAX_EXECUTION_TIME = 0"))
+            except Exception:
+                await connection.invalidate()
+
+
+async def await_cancellable(connection, awaitable):
+    """
+    Await a driver call on ``connection``, abandoning it if its handle is cancelled.
+
+    Must run inside ``enforce_deadline_async()``. SQLite statements are
+    interrupted by the progress handler instead and are awaited directly.
+
+    Raises:
+        QueryCancelledError: If the handle was cancelled before the call finished
+    """
+    cancel_signal = connection.info.get("cancel_signal")
+    if cancel_signal is None or connection.dialect.name == "sqlite":
+        return await awaitable
+
+    work = asyncio.ensure_future(awaitable)
+    try:
+        await asyncio.wait({work, cancel_signal}, return_when=asyncio.FIRST_COMPLETED)
+    except asyncio.CancelledError:
+        work.cancel()
+        raise
+    if work.done():
+        return work.result()
+
+    work.cancel()
+    try:
+        await work
+    except BaseException:
+        pass
+    # The statement may still be running server-side; never reuse the connection
+    await connection.invalidate()
+    raise QueryCancelledError("Query was cancelled")
@@ -0,0 +1,324 @@
+"""
+Bounded, byte-accounted cache of query results.
+
+Entries are keyed by canonicalized SQL, bind parameters and connection, and
+are validated against a data-version token on every read. Results are stored
+compressed; the cache evicts least recently used entries once the total
+compressed size exceeds its budget.
+"""
+
+import hashlib
+import pickle
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+import sqlparse
+from sqlparse import tokens as T
+
+
+def canonicalize_sql(sql: str) -> str:
+    """Normalize keyword case, comments and whitespace so equivalent SQL shares a key."""
+    formatted = sqlparse.format(sql, keyword_case="upper", strip_comments=True, strip_whitespace=True)
+    return formatted.strip().rstrip(";").strip()
+
+
+# Keywords that end a table source; any other keyword right after one is its alias
+_SOURCE_END_KEYWORDS = {
+    "ON", "USING", "WHERE", "GROUP BY", "ORDER BY", "HAVING", "LIMIT", "OFFSET", "FETCH", "FOR", "WINDOW",
+    "UNION", "UNION ALL", "INTERSECT", "EXCEPT", "MINUS", "QUALIFY", "CONNECT", "START", "PIVOT", "UNPIVOT",
+}
+
+# Words that can precede a table name in a FROM clause
+_SOURCE_PREFIX_KEYWORDS = {"ONLY", "RECURSIVE"}
+
+
+def _is_word(token) -> bool:
+    return token.ttype in T.Name or token.ttype in T.Literal.String.Symbol or token.ttype in T.Keyword
+
+
+def _collect_tables(statement, tables: List[str], ctes: Set[str]) -> bool:
+    """
+    Add the tables ``statement`` reads to ``tables`` and its CTE names to ``ctes``.
+
+    Scans the flattened tokens rather than sqlparse's groups, which do not
+    group table names that are also keywords (``events``, ``data``).
+
+    Returns:
+        bool: False if a table source cannot be resolved
+    """
+    # Per parenthesis level: [inside a SELECT, state]; FROM only names tables
+    # after a SELECT of the same level, not in EXTRACT(YEAR FROM ...)
+    levels = [[False, None]]
+    name: List[str] = []
+    for token in statement.flatten():
+        if token.is_whitespace or token.ttype in T.Comment:
+            continue
+        level = levels[-1]
+        state = level[1]
+        keyword = token.normalized.upper() if token.ttype in T.Keyword else None
+        if state == "name":
+            if token.match(T.Punctuation, "."):
+                level[1] = "dot"
+                continue
+            if token.match(T.Punctuation, "("):
+                # Table-valued function
+                return False
+            tables.append(".".join(name))
+            level[1] = state = "source"
+        elif state == "dot":
+            if not _is_word(token):
+                return False
+            name.append(token.value.strip('"`[]'))
+            level[1] = "name"
+            continue
+
+        if token.match(T.Punctuation, "("):
+            if state == "table":
+                # Derived table
+                level[1] = "source"
+            levels.append([False, None])
+            continue
+        if token.match(T.Punctuation, ")"):
+            if len(levels) > 1:
+                levels.pop()
+            continue
+        if keyword is not None and token.ttype in T.Keyword.DML:
+            level[0], level[1] = keyword == "SELECT", None
+            continue
+        if level[0] and (keyword == "FROM" or (keyword or "").endswith("JOIN")
+                         or token.value.upper() == "APPLY"):
+            level[1] = "table"
+            continue
+        if keyword == "WITH":
+            level[1] = "cte"
+            continue
+
+        if state == "table":
+            if keyword in _SOURCE_PREFIX_KEYWORDS:
+                continue
+            if not _is_word(token) or keyword == "LATERAL":
+                return False
+            name = [token.value.strip('"`[]')]
+            level[1] = "name"
+        elif state == "source":
+            if token.match(T.Punctuation, ","):
+                # Comma join
+                level[1] = "table"
+            elif keyword in _SOURCE_END_KEYWORDS:
+                level[1] = None
+        elif state == "cte":
+            if keyword in _SOURCE_PREFIX_KEYWORDS:
+                continue
+            if _is_word(token):
+                ctes.add(token.value.strip('"`[]').lower())
+                level[1] = "cte body"
+        elif state == "cte body" and token.match(T.Punctuation, ","):
+            level[1] = "cte"
+    if levels[-1][1] == "name":
+        tables.append(".".join(name))
+    return True
+
+
+def table_references(sql: str) -> Optional[List[str]]:
+    """
+    Table names a query reads from, as written (schema included, quotes removed).
+
+    Tables of subqueries, comma joins and CTE bodies are included; CTE names
+    are not.
+
+    Returns:
+        Optional[List[str]]: Table names, or None when some table source cannot
+        be resolved (e.g. a table-valued function)
+    """
+    tables: List[str] = []
+    ctes: Set[str] = set()
+    for statement in sqlparse.parse(sql):
+        if not _collect_tables(statement, tables, ctes):
+            return None
+    return [name for name in tables if "." in name or name.lower() not in ctes]
+
+
+def referenced_tables(sql: str) -> Optional[Set[str]]:
+    """Lower-cased, unqualified names of the tables a query reads from; None if they cannot all be resolved."""
+    references = table_references(sql)
+    if references is None:
+        return None
+    return {name.split(".")[-1].lower() for name in references}
+
+
+class _CacheEntry:
+    __slots__ = ("payload", "size", "version", "tables", "expires_at")
+
+    def __init__(self, payload: bytes, version: Hashable, tables: Set[str], expires_at: Optional[float]):
+        self.payload = payload
+        self.size = len(payload)
+        self.version = version
+        self.tables = tables
+        self.expires_at = expires_at
+
+
+class ResultCache:
+    """
+    LRU cache of compressed query results with a total byte budget.
+
+    Args:
+        max_bytes (int): Budget for the sum of compressed entry sizes
+        max_entry_bytes (int): Results larger than this once compressed are not cached
+        compression_level (int): zlib compression level
+        probe_interval (float): Seconds a table-change probe result is reused
+
+    Change probes are registered per connection scope, the same scope that
+    ``make_key()`` puts into result keys.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, max_entry_bytes: int = 8 * 1024 * 1024,
+                 compression_level: int = 1, probe_interval: float = 5.0):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.compression_level = compression_level
+        self.probe_interval = probe_interval
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._table_probes: Dict[Tuple[str, str], str] = {}
+        self._probe_results: Dict[Tuple[str, str], tuple] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(sql: str, params: Any, scope: str) -> str:
+        """Build the cache key for a statement, its parameters and a connection scope."""
+        if isinstance(params, dict):
+            params_repr = repr(sorted(params.items()))
+        else:
+            params_repr = repr(params)
+        raw = "\x00".join((scope, canonicalize_sql(sql), params_repr))
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get(self, key: str, version: Hashable) -> Optional[List[Dict]]:
+        """
+        Return cached rows for ``key`` if present, unexpired and built at ``version``.
+
+        Stale entries are dropped on access.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.version != version or (entry.expires_at is not None and entry.expires_at < time.time()):
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            payload = entry.payload
+        return pickle.loads(zlib.decompress(payload))
+
+    def put(self, key: str, rows: List[Dict], version: Hashable, tables: Iterable[str],
+            ttl: Optional[float] = None) -> bool:
+        """
+        Store rows under ``key``.
+
+        Returns:
+            bool: False if the result was too large to cache
+        """
+        payload = zlib.compress(pickle.dumps(rows, protocol=pickle.HIGHEST_PROTOCOL), self.compression_level)
+        if len(payload) > self.max_entry_bytes or len(payload) > self.max_bytes:
+            return False
+        expires_at = time.time() + ttl if ttl else None
+        entry = _CacheEntry(payload, version, set(tables), expires_at)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self.current_bytes += entry.size
+            while self.current_bytes > self.max_bytes and self._entries:
+                self._remove(next(iter(self._entries)))
+        return True
+
+    def invalidate_table(self, table: str) -> int:
+        """
+        Drop every entry that reads from ``table``.
+
+        Returns:
+            int: Number of entries removed
+        """
+        table = table.split(".")[-1].lower()
+        with self._lock:
+            for probe_key in [probe_key for probe_key in self._probe_results if probe_key[1] == table]:
+                del self._probe_results[probe_key]
+            keys = [key for key, entry in self._entries.items() if table in entry.tables]
+            for key in keys:
+                self._remove(key)
+        return len(keys)
+
+    def invalidate_all(self):
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+            self._probe_results.clear()
+            self.current_bytes = 0
+
+    def register_table_probe(self, scope: str, table: str, probe_sql: str):
+        """
+        Register a cheap query whose result changes when ``table`` changes.
+
+        For example ``SELECT MAX(updated_at), COUNT(*) FROM sales``. Probe
+        results become part of the data version of queries reading the table
+        through the connection ``scope``.
+        """
+        key = (scope, table.split(".")[-1].lower())
+        with self._lock:
+            self._table_probes[key] = probe_sql
+            self._probe_results.pop(key, None)
+
+    def has_probes(self, scope: str, tables: Iterable[str]) -> bool:
+        """Whether any of ``tables`` has a change probe registered for ``scope``."""
+        return any((scope, table) in self._table_probes for table in tables)
+
+    def probe_version(self, scope: str, tables: Iterable[str], run: Callable[[str], Any]) -> tuple:
+        """
+        Data version of ``tables`` derived from the change probes of ``scope``.
+
+        Probe results are reused for ``probe_interval`` seconds, so a burst of
+        cached reads costs at most one probe per table per interval.
+
+        Args:
+            scope (str): Connection scope the probes were registered for
+            tables (Iterable[str]): Tables a query reads from
+            run (Callable[[str], Any]): Executes a probe query and returns its result
+        """
+        now = time.time()
+        version = []
+        for table in sorted(tables):
+            key = (scope, table)
+            probe_sql = self._table_probes.get(key)
+            if probe_sql is None:
+                continue
+            cached = self._probe_results.get(key)
+            if cached is None or now - cached[1] > self.probe_interval:
+                cached = (run(probe_sql), now)
+                self._probe_results[key] = cached
+            version.append((table, cached[0]))
+        return tuple(version)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and memory usage."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry.size
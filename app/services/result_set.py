@@ -0,0 +1,642 @@
+"""
+Compact column-major representation of query results.
+
+Results that outgrow their memory budget spill their columns to memory-mapped
+files in a ``SpillStore`` and keep serving rows from there.
+"""
+
+import logging
+import os
+from collections.abc import Mapping, Sequence
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+import numpy as np
+from app.services.spill import ResultTooLargeError, SpillStore
+
+logger = logging.getLogger(__name__)
+
+# Column storage kinds
+KIND_BOOL = "bool"
+KIND_INT = "int"
+KIND_FLOAT = "float"
+KIND_DECIMAL = "decimal"
+KIND_DATETIME = "datetime"
+KIND_DATE = "date"
+KIND_STRING = "string"
+KIND_OBJECT = "object"
+
+# On-disk dtype of each kind that can be spilled; object columns stay in memory
+_SPILL_DTYPES = {
+    KIND_BOOL: np.dtype(bool),
+    KIND_INT: np.dtype(np.int64),
+    KIND_FLOAT: np.dtype(np.float64),
+    KIND_DECIMAL: np.dtype(np.int64),
+    KIND_DATETIME: np.dtype("datetime64[us]"),
+    KIND_DATE: np.dtype("datetime64[D]"),
+    KIND_STRING: np.dtype(np.int32),
+}
+
+# Distinct strings remembered for deduplication once a string column has spilled
+SPILL_DICTIONARY_LIMIT = 100_000
+
+# Rows converted at a time when a spilled column has to be rewritten
+_REWRITE_BLOCK = 1 << 20
+
+# Range of the int64 column storage
+_INT64_MIN = -(1 << 63)
+_INT64_MAX = (1 << 63) - 1
+
+
+def _map_file(path: str, dtype, count: int) -> np.ndarray:
+    """Read-only memory map of ``count`` values; empty files cannot be mapped."""
+    if count == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=(count,))
+
+
+def _decimal_scale(value: Decimal) -> int:
+    """Digits after the decimal point of a finite Decimal."""
+    return max(0, -value.as_tuple().exponent)
+
+
+def _infer_kind(value: Any) -> str:
+    """Pick the storage kind for a column from its first non-null value."""
+    # bool is a subclass of int, so it must be checked first
+    if isinstance(value, (bool, np.bool_)):
+        return KIND_BOOL
+    if isinstance(value, (int, np.integer)):
+        return KIND_INT
+    if isinstance(value, Decimal):
+        # Fixed-point int64 keeps NUMERIC and money values exact; NaN and Infinity cannot be scaled
+        return KIND_DECIMAL if value.is_finite() else KIND_OBJECT
+    if isinstance(value, (float, np.floating)):
+        return KIND_FLOAT
+    if isinstance(value, datetime):
+        # datetime64 has no time zone; aware values are kept as objects
+        return KIND_DATETIME if value.tzinfo is None else KIND_OBJECT
+    if isinstance(value, date):
+        return KIND_DATE
+    if isinstance(value, np.datetime64):
+        return KIND_DATETIME
+    if isinstance(value, str):
+        return KIND_STRING
+    return KIND_OBJECT
+
+
+class DiskStrings(Sequence):
+    """Read-only string dictionary stored as UTF-8 data plus an offsets array on disk."""
+
+    def __init__(self, data: np.ndarray, offsets: np.ndarray):
+        self._data = data
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        index = int(index)
+        if index < 0:
+            index += len(self)
+        start, end = self._offsets[index], self._offsets[index + 1]
+        return bytes(self._data[start:end]).decode("utf-8")
+
+
+class _StringHeap:
+    """Append-only string dictionary written to a spill store."""
+
+    _FLUSH_BYTES = 1 << 20
+
+    def __init__(self, store: SpillStore, prefix: str):
+        self.store = store
+        self.data_path = store.file(f"{prefix}.strings")
+        self.offsets_path = store.file(f"{prefix}.offsets")
+        self._data_file = open(self.data_path, "wb")
+        self._offsets_file = open(self.offsets_path, "wb")
+        self._pending = bytearray()
+        self._pending_offsets: List[int] = [0]
+        self.position = 0
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def append(self, value: str):
+        encoded = value.encode("utf-8")
+        self._pending += encoded
+        self.position += len(encoded)
+        self._pending_offsets.append(self.position)
+        self.count += 1
+        if len(self._pending) >= self._FLUSH_BYTES:
+            self.flush()
+
+    def flush(self):
+        if self._pending_offsets:
+            offsets = np.array(self._pending_offsets, dtype=np.int64)
+            offsets.tofile(self._offsets_file)
+            self._data_file.write(self._pending)
+            self.store.add_bytes(len(self._pending) + offsets.nbytes)
+            self._pending = bytearray()
+            self._pending_offsets = []
+        self._data_file.flush()
+        self._offsets_file.flush()
+
+    def finish(self) -> DiskStrings:
+        self.flush()
+        self._data_file.close()
+        self._offsets_file.close()
+        data = _map_file(self.data_path, np.uint8, self.position)
+        return DiskStrings(data, _map_file(self.offsets_path, np.int64, self.count + 1))
+
+
+class _ColumnBuilder:
+    """Accumulates one column chunk by chunk and packs it into a NumPy array."""
+
+    def __init__(self):
+        self.kind: Optional[str] = None
+        self.chunks: List[np.ndarray] = []
+        self.mask_chunks: List[np.ndarray] = []
+        self.has_nulls = False
+        # Digits after the decimal point of a fixed-point decimal column
+        self.scale = 0
+        # Dictionary encoding state for string columns
+        self.categories: List[str] = []
+        self.codes: Dict[str, int] = {}
+        self.codes_limit: Optional[int] = None
+        # Spill state: once spilled, packed chunks go straight to the files
+        self.store: Optional[SpillStore] = None
+        self.prefix = ""
+        self.spilled = False
+        self.spilled_rows = 0
+        self._values_file = None
+        self._mask_file = None
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by chunks not yet written to disk."""
+        size = sum(chunk.nbytes for chunk in self.chunks) + sum(mask.nbytes for mask in self.mask_chunks)
+        if isinstance(self.categories, list):
+            size += sum(len(category) for category in self.categories)
+        return size
+
+    def spill_to(self, store: SpillStore, prefix: str):
+        """Move this column to ``store`` now, or as soon as its kind can be stored on disk."""
+        self.store = store
+        self.prefix = prefix
+        self._spill()
+
+    def _spill(self):
+        if self.spilled or self.store is None or self.kind not in _SPILL_DTYPES:
+            return
+        self._values_file = open(self.store.file(f"{self.prefix}.values"), "wb")
+        self._mask_file = open(self.store.file(f"{self.prefix}.mask"), "wb")
+        self.spilled = True
+        chunks, mask_chunks = self.chunks, self.mask_chunks
+        self.chunks, self.mask_chunks = [], []
+        for chunk, mask in zip(chunks, mask_chunks):
+            self._write(chunk, mask)
+        if self.kind == KIND_STRING:
+            heap = _StringHeap(self.store, self.prefix)
+            for category in self.categories:
+                heap.append(category)
+            self.categories = heap
+            self.codes_limit = SPILL_DICTIONARY_LIMIT
+
+    def _write(self, values: np.ndarray, mask: np.ndarray):
+        values.tofile(self._values_file)
+        mask.tofile(self._mask_file)
+        self.spilled_rows += len(values)
+        self.store.add_bytes(values.nbytes + mask.nbytes)
+
+    def _spilled_arrays(self):
+        self._values_file.flush()
+        self._mask_file.flush()
+        values = np.fromfile(self._values_file.name, dtype=_SPILL_DTYPES[self.kind], count=self.spilled_rows)
+        mask = np.fromfile(self._mask_file.name, dtype=bool, count=self.spilled_rows)
+        return values, mask
+
+    def _unspill(self):
+        """Bring spilled data back into memory, for a column widened to a kind that cannot spill."""
+        values, mask = self._spilled_arrays()
+        self._values_file.close()
+        self._mask_file.close()
+        os.remove(self._values_file.name)
+        os.remove(self._mask_file.name)
+        if isinstance(self.categories, _StringHeap):
+            self.categories = list(self.categories.finish())
+        self.chunks, self.mask_chunks = [values] + self.chunks, [mask] + self.mask_chunks
+        self.spilled = False
+        self.spilled_rows = 0
+        self.store = None
+        logger.warning(f"Column {self.prefix} holds mixed types and cannot stay spilled to disk")
+
+    def _spilled_to_float(self):
+        """Rewrite a spilled integer column as float, block by block."""
+        self._values_file.flush()
+        source = self._values_file.name
+        target = source + ".float"
+        with open(target, "wb") as output:
+            for start in range(0, self.spilled_rows, _REWRITE_BLOCK):
+                count = min(_REWRITE_BLOCK, self.spilled_rows - start)
+                block = np.fromfile(source, dtype=np.int64, count=count, offset=start * 8).astype(np.float64)
+                mask = np.fromfile(self._mask_file.name, dtype=bool, count=count, offset=start)
+                block[mask] = np.nan
+                block.tofile(output)
+        self._values_file.close()
+        os.replace(target, source)
+        self._values_file = open(source, "ab")
+
+    def append(self, values: List[Any]):
+        mask = np.fromiter((v is None for v in values), dtype=bool, count=len(values))
+        if mask.any():
+            self.has_nulls = True
+        if self.kind is None:
+            first = next((v for v in values if v is not None), None)
+            if first is None:
+                # Type still unknown; keep the chunk as all-null objects
+                self.chunks.append(np.full(len(values), None, dtype=object))
+                self.mask_chunks.append(mask)
+                return
+            self.kind = _infer_kind(first)
+            if self.kind == KIND_DECIMAL:
+                self.scale = _decimal_scale(first)
+            # Earlier all-null chunks are re-packed with the now known kind
+            pending = [(chunk.tolist(), chunk_mask) for chunk, chunk_mask in zip(self.chunks, self.mask_chunks)]
+            self.chunks, self.mask_chunks = [], []
+            for chunk_values, chunk_mask in pending:
+                self._append_packed(chunk_values, chunk_mask)
+        self._append_packed(values, mask)
+
+    def _append_packed(self, values: List[Any], mask: np.ndarray):
+        try:
+            packed = self._pack(values)
+        except (TypeError, ValueError, OverflowError):
+            self._widen(values)
+            packed = self._pack(values)
+        if self.spilled:
+            self._write(packed, mask)
+            return
+        self.chunks.append(packed)
+        self.mask_chunks.append(mask)
+        if self.store is not None:
+            # The column's kind became known after the result started spilling
+            self._spill()
+
+    def _pack(self, values: List[Any]) -> np.ndarray:
+        if self.kind == KIND_BOOL:
+            if any(v is not None and not isinstance(v, (bool, np.bool_)) for v in values):
+                raise TypeError("non-boolean value in boolean column")
+            return np.array([bool(v) if v is not None else False for v in values], dtype=bool)
+        if self.kind == KIND_INT:
+            if any(v is not None and not isinstance(v, (int, np.integer)) for v in values):
+                raise TypeError("non-integer value in integer column")
+            return np.array([v if v is not None else 0 for v in values], dtype=np.int64)
+        if self.kind == KIND_FLOAT:
+            if any(isinstance(v, Decimal) for v in values):
+                raise TypeError("decimal value in float column")
+            return np.array([float(v) if v is not None else np.nan for v in values], dtype=np.float64)
+        if self.kind == KIND_DECIMAL:
+            return np.array([self._scaled(v) for v in values], dtype=np.int64)
+        if self.kind == KIND_DATETIME:
+            if any(isinstance(v, date) and (not isinstance(v, datetime) or v.tzinfo is not None) for v in values):
+                raise TypeError("date or time zone aware value in datetime column")
+            return np.array([v if v is not None else np.datetime64("NaT") for v in values], dtype="datetime64[us]")
+        if self.kind == KIND_DATE:
+            if any(v is not None and (not isinstance(v, date) or isinstance(v, datetime)) for v in values):
+                raise TypeError("non-date value in date column")
+            return np.array([v if v is not None else np.datetime64("NaT") for v in values], dtype="datetime64[D]")
+        if self.kind == KIND_STRING:
+            codes = self.codes
+            packed = np.empty(len(values), dtype=np.int32)
+            for i, v in enumerate(values):
+                if v is None:
+                    packed[i] = -1
+                    continue
+                if not isinstance(v, str):
+                    raise TypeError("non-string value in string column")
+                code = codes.get(v)
+                if code is None:
+                    code = len(self.categories)
+                    self.categories.append(v)
+                    # A spilled dictionary only remembers the first distinct values
+                    if self.codes_limit is None or len(codes) < self.codes_limit:
+                        codes[v] = code
+                packed[i] = code
+            return packed
+        return np.array(values + [None], dtype=object)[:-1]
+
+    def _scaled(self, value: Any) -> int:
+        """Fixed-point integer of ``value`` at the column's scale; raises if it does not fit exactly."""
+        if value is None:
+            return 0
+        if isinstance(value, (bool, np.bool_)) or not isinstance(value, (int, np.integer, Decimal)):
+            raise TypeError("non-decimal value in decimal column")
+        if isinstance(value, Decimal):
+            if not value.is_finite() or _decimal_scale(value) > self.scale:
+                raise ValueError("decimal value does not fit the column scale")
+            return int(value.scaleb(self.scale))
+        return int(value) * 10 ** self.scale
+
+    def _widen(self, values: List[Any]):
+        """Fall back to a wider kind when a chunk does not fit the current one."""
+        # Integers past int64 would lose precision as floats; they widen to objects
+        if (self.kind == KIND_INT and all(v is None or isinstance(v, (int, float)) for v in values)
+                and not any(isinstance(v, int) and not _INT64_MIN <= v <= _INT64_MAX for v in values)):
+            if self.spilled:
+                self._spilled_to_float()
+            self.chunks = [chunk.astype(np.float64) for chunk in self.chunks]
+            for chunk, mask in zip(self.chunks, self.mask_chunks):
+                chunk[mask] = np.nan
+            self.kind = KIND_FLOAT
+            return
+        if self.spilled:
+            self._unspill()
+        decoded = [self._to_objects(chunk, mask) for chunk, mask in zip(self.chunks, self.mask_chunks)]
+        self.kind = KIND_OBJECT
+        self.categories, self.codes = [], {}
+        self.chunks = [np.array(chunk + [None], dtype=object)[:-1] for chunk in decoded]
+
+    def _to_objects(self, chunk: np.ndarray, mask: np.ndarray) -> List[Any]:
+        if self.kind == KIND_STRING:
+            return [None if m else self.categories[c] for c, m in zip(chunk.tolist(), mask.tolist())]
+        if self.kind == KIND_DECIMAL:
+            return [None if m else Decimal(v).scaleb(-self.scale) for v, m in zip(chunk.tolist(), mask.tolist())]
+        return [None if m else v for v, m in zip(chunk.tolist(), mask.tolist())]
+
+    def finish(self) -> "Column":
+        kind = self.kind or KIND_OBJECT
+        if self.spilled:
+            self._values_file.close()
+            self._mask_file.close()
+            values = _map_file(self._values_file.name, _SPILL_DTYPES[kind], self.spilled_rows)
+            mask = _map_file(self._mask_file.name, bool, self.spilled_rows)
+            categories = self.categories.finish() if isinstance(self.categories, _StringHeap) else None
+            return Column(kind, values, mask if self.has_nulls else None, categories, self.scale)
+        if self.chunks:
+            values = np.concatenate(self.chunks) if len(self.chunks) > 1 else self.chunks[0]
+            mask = np.concatenate(self.mask_chunks) if len(self.mask_chunks) > 1 else self.mask_chunks[0]
+        else:
+            values = np.empty(0, dtype=object)
+            mask = np.empty(0, dtype=bool)
+        return Column(kind, values, mask if self.has_nulls else None, self.categories or None, self.scale)
+
+
+class Column:
+    """
+    A single column stored as a NumPy array.
+
+    String columns are dictionary encoded: ``values`` holds int32 codes into
+    ``categories`` with -1 marking nulls. Decimal columns hold int64 values
+    scaled by ``10 ** scale``. Other kinds keep a separate boolean null
+    ``mask`` when the column contains nulls.
+    """
+
+    __slots__ = ("kind", "values", "mask", "categories", "scale")
+
+    def __init__(self, kind: str, values: np.ndarray, mask: Optional[np.ndarray] = None,
+                 categories: Optional[List[str]] = None, scale: int = 0):
+        self.kind = kind
+        self.values = values
+        self.mask = mask
+        self.categories = categories
+        self.scale = scale
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def get(self, index: int) -> Any:
+        """Return the Python value at ``index``."""
+        if self.mask is not None and self.mask[index]:
+            return None
+        value = self.values[index]
+        if self.kind == KIND_STRING:
+            return self.categories[value]
+        if self.kind == KIND_DATETIME:
+            return value.astype(datetime)
+        if self.kind == KIND_DATE:
+            return value.astype(date)
+        if self.kind == KIND_DECIMAL:
+            return Decimal(int(value)).scaleb(-self.scale)
+        return value.item() if isinstance(value, np.generic) else value
+
+    @property
+    def spilled(self) -> bool:
+        return isinstance(self.values, np.memmap)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the column; memory-mapped buffers are not counted."""
+        if self.spilled:
+            return 0
+        size = self.values.nbytes
+        if self.mask is not None:
+            size += self.mask.nbytes
+        if self.categories:
+            size += sum(len(c) for c in self.categories)
+        return size
+
+    def to_pandas(self):
+        """Wrap the column in a pandas array without copying the value buffer."""
+        import pandas as pd
+
+        if self.kind == KIND_STRING:
+            categories = self.categories or []
+            if isinstance(categories, DiskStrings):
+                categories = list(categories)
+                if len(set(categories)) != len(categories):
+                    # Past the spill dictionary limit a string can appear under several codes
+                    unique, inverse = np.unique(np.array(categories, dtype=object), return_inverse=True)
+                    codes = np.where(self.values < 0, -1, inverse[np.maximum(self.values, 0)])
+                    return pd.Categorical.from_codes(codes, categories=unique)
+            return pd.Categorical.from_codes(self.values, categories=categories)
+        if self.kind in (KIND_DECIMAL, KIND_DATE):
+            # pandas has no exact decimal or plain date dtype; Python objects keep the values unchanged
+            return np.array([self.get(index) for index in range(len(self))] + [None], dtype=object)[:-1]
+        if self.mask is None:
+            return self.values
+        if self.kind == KIND_INT:
+            return pd.arrays.IntegerArray(self.values, self.mask)
+        if self.kind == KIND_BOOL:
+            return pd.arrays.BooleanArray(self.values, self.mask)
+        # Float and datetime columns already encode nulls as NaN / NaT
+        return self.values
+
+
+class RowView(Mapping):
+    """Read-only dictionary view of one row that reads values lazily from the columns."""
+
+    __slots__ = ("_result", "_index")
+
+    def __init__(self, result: "ColumnarResult", index: int):
+        self._result = result
+        self._index = index
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            column = self._result.data[key]
+        except KeyError:
+            raise KeyError(key)
+        return column.get(self._index)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._result.columns)
+
+    def __len__(self) -> int:
+        return len(self._result.columns)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class ColumnarResult:
+    """
+    Query result stored as a column list plus column-major arrays.
+
+    Numeric, boolean and date columns are NumPy arrays, decimals are stored
+    as scaled int64, string columns are dictionary encoded. Use ``to_pandas()`` to hand the data to pandas without
+    copying the value buffers and ``rows()`` / indexing for lazy per-row
+    dictionary views.
+    """
+
+    def __init__(self, columns: List[str], data: Dict[str, Column], row_count: int,
+                 spill: Optional[SpillStore] = None):
+        self.columns = columns
+        self.data = data
+        self.row_count = row_count
+        self.spill = spill
+
+    @classmethod
+    def from_batches(cls, columns: List[str], batches: Iterable[List[Any]],
+                     on_batch: Optional[Callable[[int], None]] = None, memory_budget: int = 0,
+                     spill_dir: Optional[str] = None, max_spill_bytes: int = 0) -> "ColumnarResult":
+        """
+        Build a result from an iterable of row batches.
+
+        Args:
+            columns (List[str]): Column names
+            batches (Iterable[List[Any]]): Batches of rows as dicts or sequences
+            on_batch (Optional[Callable[[int], None]]): Called with the running row count after each batch
+            memory_budget (int): Bytes the packed columns may hold in memory before they
+                spill to memory-mapped files; 0 keeps everything in memory
+            spill_dir (Optional[str]): Directory for spill files; defaults to the system temp directory
+            max_spill_bytes (int): Disk budget for spill files; 0 for no limit
+
+        Returns:
+            ColumnarResult: Packed result
+
+        Raises:
+            ResultTooLargeError: If the result exceeds its budget in columns that
+                cannot spill, or its disk budget
+        """
+        builders = [_ColumnBuilder() for _ in columns]
+        store = None
+        row_count = 0
+        try:
+            for batch in batches:
+                if not batch:
+                    continue
+                cls._append_batch(columns, builders, batch)
+                row_count += len(batch)
+                if memory_budget and sum(builder.nbytes for builder in builders) > memory_budget:
+                    if store is None:
+                        store = SpillStore(spill_dir, max_spill_bytes)
+                        logger.info(f"Result passed its {memory_budget:,} byte memory budget; spilling to {store.path}")
+                        for index, builder in enumerate(builders):
+                            builder.spill_to(store, f"c{index}")
+                    if sum(builder.nbytes for builder in builders) > memory_budget:
+                        raise ResultTooLargeError(
+                            f"Result exceeds its {memory_budget:,} byte memory budget in columns that cannot spill"
+                        )
+                if on_batch is not None:
+                    on_batch(row_count)
+            data = {name: builder.finish() for name, builder in zip(columns, builders)}
+        except BaseException:
+            if store is not None:
+                store.close()
+            raise
+        return cls(list(columns), data, row_count, store)
+
+    @staticmethod
+    def _append_batch(columns: List[str], builders: List[_ColumnBuilder], batch: List[Any]):
+        if isinstance(batch[0], Mapping):
+            column_values = [[row[name] for row in batch] for name in columns]
+        else:
+            column_values = [list(values) for values in zip(*batch)]
+        for builder, values in zip(builders, column_values):
+            builder.append(values)
+
+    @classmethod
+    def from_stream(cls, stream, on_batch: Optional[Callable[[int], None]] = None,
+                    **budget) -> "ColumnarResult":
+        """Build a result by draining a ``RowStream``; ``budget`` is passed to ``from_batches()``."""
+        with stream:
+            return cls.from_batches(stream.columns, stream.raw_batches(), on_batch, **budget)
+
+    @classmethod
+    def from_records(cls, records: List[Dict]) -> "ColumnarResult":
+        """Build a result from a list of dictionaries."""
+        columns = list(records[0].keys()) if records else []
+        return cls.from_batches(columns, [records])
+
+    def __len__(self) -> int:
+        return self.row_count
+
+    def __getitem__(self, index: int) -> RowView:
+        if index < 0:
+            index += self.row_count
+        if not 0 <= index < self.row_count:
+            raise IndexError("row index out of range")
+        return RowView(self, index)
+
+    def __iter__(self) -> Iterator[RowView]:
+        return self.rows()
+
+    def rows(self) -> Iterator[RowView]:
+        """Yield lazy dictionary views, one per row."""
+        for index in range(self.row_count):
+            yield RowView(self, index)
+
+    def to_dicts(self) -> List[Dict]:
+        """Materialize the result as a list of plain dictionaries."""
+        return [dict(row) for row in self.rows()]
+
+    def slice_dicts(self, start: int, stop: int) -> List[Dict]:
+        """Materialize rows ``start`` to ``stop`` as plain dictionaries, e.g. to serve one page."""
+        return [dict(RowView(self, index)) for index in range(*slice(start, stop).indices(self.row_count))]
+
+    @property
+    def spilled(self) -> bool:
+        """Whether any column lives in memory-mapped spill files."""
+        return self.spill is not None
+
+    def close(self):
+        """Delete the spill files, if any."""
+        if self.spill is not None:
+            self.spill.close()
+
+    def column(self, name: str) -> Column:
+        """Get a column by name."""
+        return self.data[name]
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory used by the column buffers, excluding spilled columns."""
+        return sum(column.nbytes for column in self.data.values())
+
+    def to_pandas(self):
+        """
+        Convert to a pandas DataFrame.
+
+        Numeric, boolean and date buffers are wrapped rather than copied;
+        string columns become pandas categoricals built from the existing
+        dictionary, so no per-row string objects are created.
+        """
+        import pandas as pd
+
+        frame = pd.DataFrame(
+            {name: self.data[name].to_pandas() for name in self.columns},
+            copy=False
+        )
+        return frame
@@ -1,9 +1,9 @@
-from typing import Dict, List
-from app.services.database_manager import get_db_manager
+from typing import Dict, List, Optional
+from app.services.database_manager import DatabaseManager, get_db_manager
 
 class SchemaReader:
-    def __init__(self):
-        self.db_manager = get_db_manager()
+    def __init__(self, db_manager: Optional[DatabaseManager] = None):
+        self.db_manager = db_manager or get_db_manager()
     
     def get_formatted_schema(self) -> str:
         """
@@ -0,0 +1,170 @@
+"""
+Cached SQL Server discovery.
+
+The connection sidebar lists the databases of a server and tests
+connections on every Streamlit rerun. ``ServerDiscovery`` answers both
+through one probe engine per server identity, kept warm in the engine
+registry, and caches the database list with its details for ``ttl``
+seconds per server, so navigating the sidebar does not hit the server again.
+Concurrent lookups of the same server (e.g. several sessions) share one
+round trip.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from app.services.database_manager import engine_registry
+from app.services.engine_registry import EngineRegistry
+from app.services.pool_policy import pool_options
+from app.services.single_flight import SingleFlight
+from config.database_config import DEFAULT_CONNECTION_SETTINGS, SERVER_DISCOVERY_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+# User databases with the details the sidebar shows, in one round trip
+DATABASES_QUERY = text(
+    "SELECT name, database_id, create_date, compatibility_level, recovery_model_desc, state_desc "
+    "FROM sys.databases WHERE database_id > :first_user_id ORDER BY name"
+)
+
+# Databases 1-4 are master, tempdb, model and msdb
+FIRST_USER_DATABASE_ID = 4
+
+SERVER_INFO_QUERY = text("SELECT @@VERSION AS version, @@SERVERNAME AS server_name, DB_NAME() AS current_db")
+
+# Probes run one at a time per server; a second connection covers overlapping sessions
+PROBE_POOL_SETTINGS = dict(DEFAULT_CONNECTION_SETTINGS, pool_size=1, max_overflow=1, pool_class="queue")
+
+
+class ServerDiscovery:
+    """
+    Database lists and connection tests per server, over reusable probe engines.
+
+    Args:
+        engines (EngineRegistry): Registry the probe engines are kept warm in
+        ttl (float): Seconds a server's database list is served from the cache
+        max_servers (int): Servers whose database lists are cached
+    """
+
+    def __init__(self, engines: EngineRegistry, ttl: float = 300.0, max_servers: int = 32):
+        self.engines = engines
+        self.ttl = ttl
+        self.max_servers = max_servers
+        self.hits = 0
+        self.misses = 0
+        self._cache: "OrderedDict[str, Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._single_flight = SingleFlight()
+
+    def list_databases(self, connection_string: str, refresh: bool = False) -> List[Dict[str, Any]]:
+        """
+        User databases of the server with their creation date, compatibility
+        level, recovery model and state.
+
+        Args:
+            connection_string (str): SQLAlchemy URL of the server's ``master`` database
+            refresh (bool): Bypass the cache
+
+        Returns:
+            List[Dict[str, Any]]: One dictionary per database, ordered by name
+
+        Raises:
+            RuntimeError: If the server cannot be queried
+        """
+        key = self._key(connection_string)
+        if not refresh:
+            with self._lock:
+                cached = self._cache.get(key)
+                if cached is not None and time.monotonic() < cached[0]:
+                    self._cache.move_to_end(key)
+                    self.hits += 1
+                    return list(cached[1])
+        databases = self._single_flight.do(
+            key, lambda: self._probe(connection_string, DATABASES_QUERY, {"first_user_id": FIRST_USER_DATABASE_ID})
+        )
+        with self._lock:
+            self.misses += 1
+            self._cache[key] = (time.monotonic() + self.ttl, databases)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_servers:
+                self._cache.popitem(last=False)
+        return list(databases)
+
+    def database_details(self, connection_string: str, name: str) -> Optional[Dict[str, Any]]:
+        """Details of one database from the cached list, or None if the server has no such database."""
+        for database in self.list_databases(connection_string):
+            if database["name"] == name:
+                return database
+        return None
+
+    def test_connection(self, connection_string: str) -> Dict[str, Any]:
+        """
+        Connect through the probe engine and report the server version and name.
+
+        Never served from the cache; only the engine and its connection are reused.
+
+        Args:
+            connection_string (str): SQLAlchemy URL to test
+
+        Returns:
+            Dict[str, Any]: ``version``, ``server_name`` and ``current_db``
+
+        Raises:
+            RuntimeError: If the connection or the query fails
+        """
+        rows = self._probe(connection_string, SERVER_INFO_QUERY)
+        return rows[0] if rows else {}
+
+    def invalidate(self, connection_string: Optional[str] = None):
+        """Forget the cached database list of one server, or of every server."""
+        with self._lock:
+            if connection_string is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(self._key(connection_string), None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache hits, misses and cached servers."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "servers": len(self._cache)}
+
+    @staticmethod
+    def _key(connection_string: str) -> str:
+        # Probe engines get their own identity so a full connection to the same
+        # database never inherits the small probe pool, and vice versa
+        return EngineRegistry.make_key("sqlserver-probe", connection_string)
+
+    def _probe(self, connection_string: str, statement, params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        url = make_url(connection_string)
+        label = url.render_as_string(hide_password=True)
+        engine = self.engines.acquire(
+            self._key(connection_string),
+            lambda: create_engine(url, **pool_options(url, PROBE_POOL_SETTINGS)),
+            label=f"probe {label}"
+        )
+        try:
+            with engine.connect() as connection:
+                result = connection.execute(statement, params or {})
+                rows = [dict(row) for row in result.mappings()]
+        except Exception as e:
+            self.engines.release(engine, discard=True)
+            logger.warning(f"Probe of {label} failed: {str(e)}")
+            raise RuntimeError(str(e))
+        self.engines.release(engine)
+        return rows
+
+
+# Shared by every UI session
+server_discovery = ServerDiscovery(
+    engine_registry,
+    ttl=SERVER_DISCOVERY_SETTINGS["ttl_seconds"],
+    max_servers=SERVER_DISCOVERY_SETTINGS["max_servers"]
+)
+
+def get_server_discovery() -> ServerDiscovery:
+    """Get the global server discovery instance."""
+    return server_discovery
@@ -0,0 +1,143 @@
+"""
+Single-flight execution of identical in-flight queries.
+
+When several callers run the same statement with the same parameters at the
+same time, only the first (the leader) executes it; the others wait for the
+leader's result and share it. Each waiting caller still honours its own
+deadline and cancel handle. A follower whose leader was cancelled or timed
+out runs the query itself rather than inheriting a cancellation or deadline
+it did not ask for.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from app.services.query_control import CancelHandle, QueryCancelledError, QueryTimeoutError
+
+# Seconds between deadline / cancel checks of a waiting follower
+FOLLOWER_POLL_INTERVAL = 0.05
+
+
+class SingleFlight:
+    """Deduplicates concurrent executions by key and counts how many were coalesced."""
+
+    def __init__(self):
+        self.executions = 0
+        self.coalesced = 0
+        self._calls: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def _join(self, key: str) -> Tuple[Future, bool]:
+        """Shared future for ``key`` and whether the caller is its leader."""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = self._calls[key] = Future()
+            self.executions += 1
+            return future, True
+
+    def _finish(self, key: str, future: Future, result: Any = None, error: Optional[BaseException] = None):
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+        if error is None:
+            future.set_result(result)
+        elif isinstance(error, Exception):
+            future.set_exception(error)
+        else:
+            # Task cancellation or interpreter shutdown in the leader
+            future.set_exception(QueryCancelledError("Query was cancelled"))
+
+    @staticmethod
+    def _share(result: Any) -> Any:
+        # Followers get their own list and row dictionaries; column values are shared
+        if isinstance(result, list):
+            return [dict(row) if isinstance(row, dict) else row for row in result]
+        return result
+
+    def do(self, key: str, execute: Callable[[], Any], cancel_handle: Optional[CancelHandle] = None) -> Any:
+        """
+        Run ``execute`` unless an identical call is in flight, then share its result.
+
+        Args:
+            key (str): Identity of the execution (statement, parameters, connection)
+            execute (Callable[[], Any]): Runs the query
+            cancel_handle (Optional[CancelHandle]): Deadline and cancel switch of this caller
+
+        Returns:
+            Any: Result of the leader's execution
+        """
+        while True:
+            future, leader = self._join(key)
+            if leader:
+                try:
+                    result = execute()
+                except BaseException as e:
+                    self._finish(key, future, error=e)
+                    raise
+                self._finish(key, future, result)
+                return result
+            try:
+                return self._share(self._wait(future, cancel_handle))
+            except (QueryCancelledError, QueryTimeoutError):
+                if cancel_handle is not None and (cancel_handle.cancelled or cancel_handle.expired()):
+                    raise
+                # The leader was cancelled or ran out of time, not this caller: run the query itself
+
+    async def do_async(self, key: str, execute: Callable[[], Awaitable[Any]],
+                       cancel_handle: Optional[CancelHandle] = None) -> Any:
+        """Async version of ``do()``; leaders and followers may mix threads and event loops."""
+        while True:
+            future, leader = self._join(key)
+            if leader:
+                try:
+                    result = await execute()
+                except BaseException as e:
+                    self._finish(key, future, error=e)
+                    raise
+                self._finish(key, future, result)
+                return result
+            try:
+                return self._share(await self._wait_async(future, cancel_handle))
+            except (QueryCancelledError, QueryTimeoutError):
+                if cancel_handle is not None and (cancel_handle.cancelled or cancel_handle.expired()):
+                    raise
+                # The leader was cancelled or ran out of time, not this caller: run the query itself
+
+    @staticmethod
+    def _wait(future: Future, cancel_handle: Optional[CancelHandle]) -> Any:
+        if cancel_handle is None:
+            return future.result()
+        cancel_handle.start()
+        while True:
+            cancel_handle.check()
+            try:
+                return future.result(timeout=FOLLOWER_POLL_INTERVAL)
+            except FutureTimeoutError:
+                continue
+
+    @staticmethod
+    async def _wait_async(future: Future, cancel_handle: Optional[CancelHandle]) -> Any:
+        waiter = asyncio.wrap_future(future)
+        if cancel_handle is None:
+            return await waiter
+        cancel_handle.start()
+        while True:
+            cancel_handle.check()
+            done, _ = await asyncio.wait({waiter}, timeout=FOLLOWER_POLL_INTERVAL)
+            if done:
+                return waiter.result()
+
+    def stats(self) -> Dict[str, Any]:
+        """Leader executions, coalesced callers and the share of callers that were coalesced."""
+        with self._lock:
+            callers = self.executions + self.coalesced
+            return {
+                "in_flight": len(self._calls),
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "coalescing_ratio": self.coalesced / callers if callers else 0.0,
+            }
@@ -0,0 +1,171 @@
+"""
+Disk spill space for query results that exceed their memory budget.
+
+A ``SpillStore`` is a private temporary directory holding the column files of
+one result. It is deleted when the result is closed, garbage collected or the
+process exits. ``BufferRegistry`` keeps spill-backed results alive between
+page requests and drops them once their time-to-live expires.
+"""
+
+import atexit
+import logging
+import os
+import secrets
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_live_stores: "weakref.WeakSet[SpillStore]" = weakref.WeakSet()
+
+
+class ResultTooLargeError(RuntimeError):
+    """Raised when a result exceeds its memory budget and cannot be spilled, or its disk budget."""
+
+
+def _remove_directory(path: str):
+    shutil.rmtree(path, ignore_errors=True)
+
+
+class SpillStore:
+    """
+    Temporary directory for the spilled columns of one result.
+
+    Args:
+        root (Optional[str]): Parent directory; defaults to the system temp directory
+        max_bytes (int): Disk budget for this result; 0 for no limit
+    """
+
+    def __init__(self, root: Optional[str] = None, max_bytes: int = 0):
+        if root:
+            os.makedirs(root, exist_ok=True)
+        self.path = tempfile.mkdtemp(prefix="nlsql-spill-", dir=root or None)
+        self.max_bytes = max_bytes
+        self.bytes_written = 0
+        self._finalizer = weakref.finalize(self, _remove_directory, self.path)
+        _live_stores.add(self)
+
+    def file(self, name: str) -> str:
+        """Path of a file inside the store."""
+        return os.path.join(self.path, name)
+
+    def add_bytes(self, count: int):
+        """Account for ``count`` bytes written, enforcing the disk budget."""
+        self.bytes_written += count
+        if self.max_bytes and self.bytes_written > self.max_bytes:
+            raise ResultTooLargeError(
+                f"Result exceeds its {self.max_bytes:,} byte spill limit; narrow the query or add a LIMIT"
+            )
+
+    @property
+    def closed(self) -> bool:
+        return not self._finalizer.alive
+
+    def close(self):
+        """Delete the spill files. Open memory maps stay readable until released on POSIX."""
+        self._finalizer()
+
+
+@atexit.register
+def _close_live_stores():
+    for store in list(_live_stores):
+        store.close()
+
+
+def estimate_rows_bytes(rows: List[Dict]) -> int:
+    """Approximate memory held by a batch of row dictionaries, sampled from its first row."""
+    if not rows:
+        return 0
+    sample = rows[0]
+    row_bytes = sys.getsizeof(sample) + sum(sys.getsizeof(value) for value in sample.values())
+    return row_bytes * len(rows)
+
+
+class BufferRegistry:
+    """
+    Results kept between page requests, keyed by an unguessable token.
+
+    Entries expire ``ttl`` seconds after their last access; expired and evicted
+    results are closed, which deletes their spill files.
+
+    Args:
+        ttl (float): Seconds an unused buffer is kept
+        max_entries (int): Maximum number of buffered results
+    """
+
+    def __init__(self, ttl: float = 600.0, max_entries: int = 32):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, List[Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def register(self, result: Any) -> str:
+        """Keep ``result`` and return the token to fetch it with."""
+        token = secrets.token_urlsafe(16)
+        with self._lock:
+            self._entries[token] = [result, time.monotonic() + self.ttl]
+            evicted = self._expire_locked()
+            while len(self._entries) > self.max_entries:
+                evicted.append(self._entries.popitem(last=False)[1][0])
+        self._close_all(evicted)
+        return token
+
+    def get(self, token: str) -> Optional[Any]:
+        """The result registered under ``token``, or None if it expired."""
+        with self._lock:
+            evicted = self._expire_locked()
+            entry = self._entries.get(token)
+            if entry is not None:
+                entry[1] = time.monotonic() + self.ttl
+                self._entries.move_to_end(token)
+        self._close_all(evicted)
+        return entry[0] if entry is not None else None
+
+    def release(self, token: str):
+        """Drop a result before it expires."""
+        with self._lock:
+            entry = self._entries.pop(token, None)
+        if entry is not None:
+            self._close_all([entry[0]])
+
+    def clear(self):
+        with self._lock:
+            results = [entry[0] for entry in self._entries.values()]
+            self._entries.clear()
+        self._close_all(results)
+
+    def sweep(self):
+        """Close results whose time-to-live has passed."""
+        with self._lock:
+            evicted = self._expire_locked()
+        self._close_all(evicted)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            results = [entry[0] for entry in self._entries.values()]
+        return {
+            "entries": len(results),
+            "spilled": sum(1 for result in results if getattr(result, "spilled", False)),
+            "memory_bytes": sum(getattr(result, "nbytes", 0) for result in results),
+        }
+
+    def _expire_locked(self) -> List[Any]:
+        now = time.monotonic()
+        expired = [token for token, (_, expires_at) in self._entries.items() if expires_at <= now]
+        return [self._entries.pop(token)[0] for token in expired]
+
+    @staticmethod
+    def _close_all(results: List[Any]):
+        for result in results:
+            close = getattr(result, "close", None)
+            if close is not None:
+                try:
+                    close()
+                except Exception as e:
+                    logger.warning(f"Failed to release buffered result: {str(e)}")
@@ -0,0 +1,180 @@
+"""
+Single-pass read-only SQL classifier.
+
+The statement is tokenized once, skipping string literals, quoted identifiers
+and comments, so column names such as ``updated_at`` or text like
+``'DROP TABLE'`` inside a literal are not mistaken for write operations.
+Verdicts are cached per statement, making repeat checks constant-cost.
+"""
+
+import re
+from functools import lru_cache
+from typing import Optional
+from config.database_config import (
+    DANGEROUS_SQL_KEYWORDS, DANGEROUS_SQL_PREFIXES, PRAGMAS_WITH_NAME_ARGUMENT, READ_ONLY_PRAGMAS,
+    READ_ONLY_STATEMENT_TYPES
+)
+
+# Number of distinct (statement, dialect) verdicts kept in memory
+VERDICT_CACHE_SIZE = 4096
+
+
+def _token_pattern(string: str, quoted: str, extra: str = "", opening: str = "['\"`]",
+                   line_comment: str = r"--[^\n]*") -> "re.Pattern":
+    return re.compile(r"""
+        (?P<ws>\s+)
+    """ + extra + r"""
+      | (?P<comment>""" + line_comment + r"""|/\*.*?\*/)
+      | (?P<unterminated_comment>/\*)
+      | (?P<string>""" + string + r""")
+      | (?P<quoted>""" + quoted + r""")
+      | (?P<word>[A-Za-z_][\w$#@]*)
+      | (?P<semicolon>;)
+      | (?P<unterminated>""" + opening + r""")
+      | (?P<other>.)
+    """, re.DOTALL | re.VERBOSE)
+
+
+# ANSI quoting (SQLite, SQL Server, Oracle): backslashes have no special meaning
+_ANSI_TOKEN = _token_pattern(
+    string=r"'(?:[^']|'')*'",
+    quoted=r'"(?:[^"]|"")*"|`(?:[^`]|``)*`|\[[^\]]*\]',
+    opening=r"['\"`\[]"
+)
+
+# PostgreSQL adds dollar quoting and E'' strings with backslash escapes
+_POSTGRES_TOKEN = _token_pattern(
+    string=r"[eE]'(?:[^'\\]|\\.|'')*'|'(?:[^']|'')*'",
+    quoted=r'"(?:[^"]|"")*"',
+    extra=r"""
+      | (?P<dollar>\$(?P<tag>[A-Za-z_]*)\$.*?\$(?P=tag)\$)""",
+    opening=r"['\"]|\$[A-Za-z_]*\$"
+)
+
+# MySQL: backslash escapes in both quote styles, # comments, "--" comments only
+# when followed by whitespace, and /*! */ comments whose contents the server executes
+_MYSQL_TOKEN = _token_pattern(
+    string=r"'(?:[^'\\]|\\.|'')*'" + "|" + r'"(?:[^"\\]|\\.|"")*"',
+    quoted=r"`(?:[^`]|``)*`",
+    line_comment=r"--(?=\s|$)[^\n]*",
+    extra=r"""
+      | (?P<executable_comment>/\*!)
+      | (?P<hash_comment>\#[^\n]*)"""
+)
+
+_DIALECT_TOKENS = {
+    "postgresql": _POSTGRES_TOKEN,
+    "mysql": _MYSQL_TOKEN,
+}
+
+
+class SQLVerdict:
+    """Outcome of classifying one SQL statement."""
+
+    __slots__ = ("statement_type", "read_only", "multi_statement", "reason")
+
+    def __init__(self, statement_type: Optional[str], read_only: bool,
+                 multi_statement: bool = False, reason: Optional[str] = None):
+        self.statement_type = statement_type
+        self.read_only = read_only
+        self.multi_statement = multi_statement
+        self.reason = reason
+
+    @property
+    def allowed(self) -> bool:
+        """Whether the statement may be executed by the read-only query path."""
+        return self.read_only and not self.multi_statement
+
+    def __repr__(self) -> str:
+        return (f"SQLVerdict(statement_type={self.statement_type!r}, read_only={self.read_only}, "
+                f"multi_statement={self.multi_statement}, reason={self.reason!r})")
+
+
+@lru_cache(maxsize=VERDICT_CACHE_SIZE)
+def classify(sql: str, dialect: Optional[str] = None) -> SQLVerdict:
+    """
+    Classify a SQL string in a single pass over its tokens.
+
+    Args:
+        sql (str): SQL text
+        dialect (Optional[str]): SQLAlchemy dialect name; selects the quoting
+            and comment rules (ANSI when unknown)
+
+    Returns:
+        SQLVerdict: Statement type, read-only flag and rejection reason
+    """
+    pattern = _DIALECT_TOKENS.get(dialect, _ANSI_TOKEN)
+    statement_type = None
+    statement_ended = False
+    # PRAGMA name (after an optional schema), and what follows it
+    pragma_name = None
+    pragma_qualified = False
+    pragma_argument = False
+    pragma_assignment = False
+
+    for match in pattern.finditer(sql):
+        kind = match.lastgroup
+        if kind in ("ws", "comment", "hash_comment"):
+            continue
+        if kind in ("unterminated", "unterminated_comment"):
+            return SQLVerdict(statement_type, False, reason="Unterminated string literal, identifier or comment")
+        if kind == "executable_comment":
+            return SQLVerdict(statement_type, False, reason="Executable comments are not allowed")
+        if kind == "string" and dialect is None and "\\" in match.group():
+            # MySQL would treat the backslash as an escape and end the literal elsewhere
+            return SQLVerdict(statement_type, False,
+                              reason="Backslashes in string literals are ambiguous without a dialect")
+        if kind == "semicolon":
+            statement_ended = statement_type is not None
+            continue
+        if statement_ended:
+            return SQLVerdict(statement_type, False, multi_statement=True,
+                              reason="Multiple statements are not allowed")
+        if statement_type == "PRAGMA" and not pragma_argument:
+            if kind == "other" and match.group() == "=":
+                pragma_assignment = True
+            elif kind == "other" and match.group() == "(":
+                pragma_argument = True
+            elif kind == "other" and match.group() == ".":
+                pragma_qualified = True
+            elif kind in ("word", "quoted") and (pragma_name is None or pragma_qualified):
+                pragma_name = match.group().strip('"`[]').lower()
+                pragma_qualified = False
+                continue
+        if kind != "word":
+            continue
+
+        word = match.group().upper()
+        if statement_type is None:
+            statement_type = word
+            if word not in READ_ONLY_STATEMENT_TYPES:
+                return SQLVerdict(statement_type, False, reason=f"{word} statements are not allowed")
+            continue
+        if word in DANGEROUS_SQL_KEYWORDS:
+            return SQLVerdict(statement_type, False, reason=f"{word} is not allowed in a read-only query")
+        if word.lower().startswith(DANGEROUS_SQL_PREFIXES):
+            return SQLVerdict(statement_type, False, reason=f"Calls to {match.group()} are not allowed")
+
+    if statement_type is None:
+        return SQLVerdict(None, False, reason="Empty query")
+    if statement_type == "PRAGMA":
+        if pragma_assignment:
+            return SQLVerdict(statement_type, False, reason="PRAGMA assignments are not allowed")
+        if pragma_name not in READ_ONLY_PRAGMAS:
+            return SQLVerdict(statement_type, False, reason=f"PRAGMA {pragma_name or '(none)'} is not allowed")
+        if pragma_argument and pragma_name not in PRAGMAS_WITH_NAME_ARGUMENT:
+            return SQLVerdict(statement_type, False, reason=f"PRAGMA {pragma_name} takes no argument")
+    return SQLVerdict(statement_type, True)
+
+
+def ensure_read_only(sql: str, dialect: Optional[str] = None) -> SQLVerdict:
+    """
+    Raise unless ``sql`` is a single read-only statement.
+
+    Raises:
+        ValueError: If the statement writes, calls procedures or stacks several statements
+    """
+    verdict = classify(sql, dialect)
+    if not verdict.allowed:
+        raise ValueError(f"Query contains dangerous operations that are not allowed: {verdict.reason}")
+    return verdict
@@ -1,14 +1,53 @@
-from typing import Dict, Optional, Tuple
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 from app.models.mistral_model import get_model
 from app.services.schema_reader import SchemaReader
-from app.services.database_manager import get_db_manager
+from app.services.database_manager import (
+    get_db_manager, AsyncRowStream, DatabaseManager, RowStream, DEFAULT_STREAM_BATCH_SIZE
+)
+from app.services.pagination import Page
+from app.services.query_control import CancelHandle, QueryCancelledError, QueryTimeoutError
+from app.services.cost_gate import QueryCostError
+from app.services.metrics import metrics
+from app.services.spill import ResultTooLargeError
+from app.services.sql_normalizer import parameterize
+from config.database_config import MULTI_QUERY_SETTINGS, PREVIEW_SETTINGS, STATEMENT_CACHE_SETTINGS
+import asyncio
+import time
 import sqlparse
 
+
+class QueryOutcome:
+    """Result of one question in a batch: its first page, or the error it raised."""
+
+    def __init__(self, index: int, question: str, sql: Optional[str] = None, page: Optional[Page] = None,
+                 error: Optional[Exception] = None, execution_time: float = 0.0):
+        self.index = index
+        self.question = question
+        self.sql = sql
+        self.page = page
+        self.error = error
+        self.execution_time = execution_time
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class ResultPhase:
+    """One phase of a progressive answer: a sampled preview or the full first page."""
+
+    def __init__(self, sql: str, page: Page, preview: bool, execution_time: float):
+        self.sql = sql
+        self.page = page
+        self.preview = preview
+        self.execution_time = execution_time
+
+
 class SQLGenerator:
-    def __init__(self):
+    def __init__(self, db_manager: Optional[DatabaseManager] = None):
         self.model = get_model()
-        self.schema_reader = SchemaReader()
-        self.db_manager = get_db_manager()
+        self.db_manager = db_manager or get_db_manager()
+        self.schema_reader = SchemaReader(self.db_manager)
 
     def _load_prompt_template(self) -> str:
         """Load the prompt template for SQL generation."""
@@ -40,44 +79,309 @@ SQL:"""
         schema = self.schema_reader.get_formatted_schema()
         return template.format(schema=schema, question=question)
 
-    def generate_and_execute(self, question: str) -> Tuple[str, Dict]:
+    def generate_sql(self, question: str) -> str:
+        """
+        Generate and format SQL for a natural language question without executing it.
+        
+        Args:
+            question (str): Natural language question
+            
+        Returns:
+            str: Formatted SQL query
+        """
+        # Check if database is connected
+        if not self.db_manager.is_connected():
+            raise Exception("No database connected. Please connect to a database first.")
+        
+        # Get schema information
+        schema_info = self.schema_reader.get_formatted_schema()
+        
+        # Generate SQL
+        started = time.perf_counter()
+        generated_sql = self.model.generate_sql(question, schema_info)
+        metrics.histogram("model_generation_seconds", "Time the model takes to write SQL").observe(
+            time.perf_counter() - started
+        )
+        
+        # Format and validate SQL
+        return sqlparse.format(
+            generated_sql,
+            keyword_case='upper',
+            identifier_case='lower',
+            reindent=True,
+            strip_comments=True
+        )
+
+    def prepare_statement(self, question: str) -> Tuple[str, str, Dict]:
+        """
+        Generate SQL, lift its literals into bind parameters and pass it through the cost gate.
+        
+        Args:
+            question (str): Natural language question
+            
+        Returns:
+            Tuple[str, str, Dict]: SQL to show the user, the canonical statement
+            to execute and its parameters
+        """
+        formatted_sql = self.generate_sql(question)
+        statement, params = self._parameterize(formatted_sql)
+        gated = self.db_manager.apply_cost_gate(statement, params)
+        return self._display_sql(formatted_sql, statement, gated), gated, params
+
+    async def prepare_statement_async(self, question: str) -> Tuple[str, str, Dict]:
+        """Async version of ``prepare_statement()``; the model runs on a worker thread."""
+        formatted_sql = await asyncio.to_thread(self.generate_sql, question)
+        statement, params = self._parameterize(formatted_sql)
+        gated = await self.db_manager.apply_cost_gate_async(statement, params)
+        return self._display_sql(formatted_sql, statement, gated), gated, params
+
+    def _parameterize(self, formatted_sql: str) -> Tuple[str, Dict]:
+        if not STATEMENT_CACHE_SETTINGS["parameterize_literals"]:
+            return formatted_sql, {}
+        return parameterize(formatted_sql, self.db_manager.current_engine.dialect.name)
+
+    @staticmethod
+    def _display_sql(formatted_sql: str, statement: str, gated: str) -> str:
+        # Show the SQL with its literals unless the cost gate rewrote it
+        return formatted_sql if gated == statement else gated
+
+    def generate_and_execute(self, question: str,
+                             cancel_handle: Optional[CancelHandle] = None) -> Tuple[str, Dict]:
         """
         Generate SQL from natural language and execute it.
         
         Args:
             question (str): Natural language question
+            cancel_handle (Optional[CancelHandle]): Deadline and cancel switch for the query
             
         Returns:
             Tuple[str, Dict]: Generated SQL query and query results
         """
         try:
-            # Check if database is connected
-            if not self.db_manager.is_connected():
-                raise Exception("No database connected. Please connect to a database first.")
+            formatted_sql, statement, params = self.prepare_statement(question)
             
-            # Get schema information
-            schema_info = self.schema_reader.get_formatted_schema()
+            # Execute query using database manager
+            results = self.db_manager.execute_query(statement, params, cancel_handle=cancel_handle)
             
-            # Generate SQL
-            generated_sql = self.model.generate_sql(question, schema_info)
+            return formatted_sql, results
             
-            # Format and validate SQL
-            formatted_sql = sqlparse.format(
-                generated_sql,
-                keyword_case='upper',
-                identifier_case='lower',
-                reindent=True,
-                strip_comments=True
-            )
+        except (QueryTimeoutError, QueryCancelledError, QueryCostError, ResultTooLargeError):
+            raise
+        except Exception as e:
+            raise Exception(f"Error in SQL generation/execution: {str(e)}")
+
+    def generate_and_execute_page(self, question: str, page_size: Optional[int] = None,
+                                  cancel_handle: Optional[CancelHandle] = None) -> Page:
+        """
+        Generate SQL from natural language and execute it, returning the first page.
+        
+        Args:
+            question (str): Natural language question
+            page_size (Optional[int]): Rows per page; defaults to the configured page size
+            cancel_handle (Optional[CancelHandle]): Deadline and cancel switch for the query
             
-            # Execute query using database manager
-            results = self.db_manager.execute_query(formatted_sql)
+        Returns:
+            Page: Generated SQL with its first page of results and a cursor for the next
+        """
+        try:
+            formatted_sql, statement, params = self.prepare_statement(question)
+            page = self.db_manager.execute_page(statement, page_size=page_size, params=params,
+                                                cancel_handle=cancel_handle)
+            page.sql = formatted_sql
+            return page
+        except (QueryTimeoutError, QueryCancelledError, QueryCostError, ResultTooLargeError):
+            raise
+        except Exception as e:
+            raise Exception(f"Error in SQL generation/execution: {str(e)}")
+
+    def generate_and_stream(self, question: str,
+                            batch_size: int = DEFAULT_STREAM_BATCH_SIZE,
+                            cancel_handle: Optional[CancelHandle] = None) -> Tuple[str, RowStream]:
+        """
+        Generate SQL from natural language and stream its results in batches.
+        
+        Args:
+            question (str): Natural language question
+            batch_size (int): Number of rows per batch
+            cancel_handle (Optional[CancelHandle]): Deadline and cancel switch for the query
             
-            return formatted_sql, results
+        Returns:
+            Tuple[str, RowStream]: Generated SQL query and a stream of row batches
+        """
+        try:
+            formatted_sql, statement, params = self.prepare_statement(question)
+            stream = self.db_manager.stream_query(statement, params, batch_size=batch_size,
+                                                  cancel_handle=cancel_handle)
+            return formatted_sql, stream
+        except (QueryTimeoutError, QueryCancelledError, QueryCostError, ResultTooLargeError):
+            raise
+        except Exception as e:
+            raise Exception(f"Error in SQL generation/execution: {str(e)}")
+
+    async def generate_and_execute_page_async(self, question: str, page_size: Optional[int] = None,
+                                              cancel_handle: Optional[CancelHandle] = None) -> Page:
+        """
+        Async version of ``generate_and_execute_page()``.
+        
+        The model runs on a worker thread; the query itself is awaited on the
+        database manager's asyncio engine.
+        
+        Args:
+            question (str): Natural language question
+            page_size (Optional[int]): Rows per page; defaults to the configured page size
+            cancel_handle (Optional[CancelHandle]): Deadline and cancel switch for the query
             
+        Returns:
+            Page: Generated SQL with its first page of results and a cursor for the next
+        """
+        try:
+            formatted_sql, statement, params = await self.prepare_statement_async(question)
+            page = await self.db_manager.execute_page_async(
+                statement, page_size=page_size, params=params, cancel_handle=cancel_handle
+            )
+            page.sql = formatted_sql
+            return page
+        except (QueryTimeoutError, QueryCancelledError, QueryCostError, ResultTooLargeError):
+            raise
         except Exception as e:
             raise Exception(f"Error in SQL generation/execution: {str(e)}")
 
+    async def generate_and_stream_async(self, question: str,
+                                        batch_size: int = DEFAULT_STREAM_BATCH_SIZE,
+                                        cancel_handle: Optional[CancelHandle] = None) -> Tuple[str, AsyncRowStream]:
+        """
+        Async version of ``generate_and_stream()``.
+        
+        Args:
+            question (str): Natural language question
+            batch_size (int): Number of rows per batch
+            cancel_handle (Optional[CancelHandle]): Deadline and cancel switch for the query
+            
+        Returns:
+            Tuple[str, AsyncRowStream]: Generated SQL query and an async stream of row batches
+        """
+        try:
+            formatted_sql, statement, params = await self.prepare_statement_async(question)
+            stream = await self.db_manager.stream_query_async(
+                statement, params, batch_size=batch_size, cancel_handle=cancel_handle
+            )
+            return formatted_sql, stream
+        except (QueryTimeoutError, QueryCancelledError, QueryCostError, ResultTooLargeError):
+            raise
+        except Exception as e:
+            raise Exception(f"Error in SQL generation/execution: {str(e)}")
+
+    async def generate_and_execute_progressive_async(self, question: str, page_size: Optional[int] = None,
+                                                     cancel_handle: Optional[CancelHandle] = None
+                                                     ) -> AsyncIterator[ResultPhase]:
+        """
+        Generate SQL and answer it progressively: a quick preview, then the full result.
+        
+        The full query and a preview over sampled tables start together. If
+        the preview finishes first it is yielded, flagged as a preview, and
+        the full first page follows once the real query completes. When the
+        full query wins, or the query cannot be previewed, only the full page
+        is yielded.
+        
+        Args:
+            question (str): Natural language question
+            page_size (Optional[int]): Rows per page; defaults to the configured page size
+            cancel_handle (Optional[CancelHandle]): Deadline and cancel switch for the full query
+            
+        Yields:
+            ResultPhase: The preview (at most once), then the full first page
+        """
+        try:
+            formatted_sql, statement, params = await self.prepare_statement_async(question)
+        except (QueryTimeoutError, QueryCancelledError, QueryCostError, ResultTooLargeError):
+            raise
+        except Exception as e:
+            raise Exception(f"Error in SQL generation/execution: {str(e)}")
+        
+        start_time = time.monotonic()
+        cancel_handle = cancel_handle or self.db_manager.new_cancel_handle()
+        preview_handle = self.db_manager.new_cancel_handle(timeout=PREVIEW_SETTINGS["timeout"])
+        full = asyncio.create_task(self.db_manager.execute_page_async(
+            statement, page_size=page_size, params=params, cancel_handle=cancel_handle
+        ))
+        preview = asyncio.create_task(self.db_manager.execute_preview_async(
+            statement, page_size=page_size, params=params, cancel_handle=preview_handle
+        ))
+        try:
+            await asyncio.wait({full, preview}, return_when=asyncio.FIRST_COMPLETED)
+            if not full.done() and preview.exception() is None and preview.result() is not None:
+                yield ResultPhase(preview.result().sql, preview.result(), True, time.monotonic() - start_time)
+            try:
+                page = await full
+            except (QueryTimeoutError, QueryCancelledError, QueryCostError, ResultTooLargeError):
+                raise
+            except Exception as e:
+                raise Exception(f"Error in SQL generation/execution: {str(e)}")
+            yield ResultPhase(formatted_sql, page, False, time.monotonic() - start_time)
+        finally:
+            # Stop the queries through their handles so drivers release their
+            # connections cleanly, then wait for the tasks to wind down
+            for handle, task in ((preview_handle, preview), (cancel_handle, full)):
+                if not task.done():
+                    handle.cancel()
+            await asyncio.gather(preview, full, return_exceptions=True)
+
+    async def generate_and_execute_many_async(self, questions: List[str], page_size: Optional[int] = None,
+                                              timeout: Optional[float] = None) -> AsyncIterator[QueryOutcome]:
+        """
+        Generate and execute independent questions concurrently.
+        
+        SQL generation is limited to the configured model concurrency and query
+        execution to the database pool size, so a batch never queues on the
+        pool behind itself. Outcomes are yielded as each question completes;
+        a failing question yields its error without affecting the others.
+        Closing the iterator early cancels the questions still running.
+        
+        Args:
+            questions (List[str]): Natural language questions
+            page_size (Optional[int]): Rows per page; defaults to the configured page size
+            timeout (Optional[float]): Per-query timeout in seconds; defaults to the configured timeout
+            
+        Yields:
+            QueryOutcome: One per question, in completion order
+        """
+        if len(questions) > MULTI_QUERY_SETTINGS["max_questions"]:
+            raise ValueError(f"At most {MULTI_QUERY_SETTINGS['max_questions']} questions can run in one batch")
+        
+        model_slots = asyncio.Semaphore(max(1, MULTI_QUERY_SETTINGS["model_concurrency"]))
+        query_slots = asyncio.Semaphore(self.db_manager.query_concurrency())
+        handles = [self.db_manager.new_cancel_handle(timeout=timeout) for _ in questions]
+        
+        async def run(index: int, question: str) -> QueryOutcome:
+            start_time = time.monotonic()
+            outcome = QueryOutcome(index, question)
+            try:
+                async with model_slots:
+                    handles[index].check()
+                    formatted_sql = await asyncio.to_thread(self.generate_sql, question)
+                    outcome.sql = formatted_sql
+                statement, params = self._parameterize(formatted_sql)
+                async with query_slots:
+                    gated = await self.db_manager.apply_cost_gate_async(statement, params)
+                    outcome.sql = self._display_sql(formatted_sql, statement, gated)
+                    outcome.page = await self.db_manager.execute_page_async(
+                        gated, page_size=page_size, params=params, cancel_handle=handles[index]
+                    )
+            except Exception as e:
+                outcome.error = e
+            outcome.execution_time = time.monotonic() - start_time
+            return outcome
+        
+        tasks = [asyncio.create_task(run(index, question)) for index, question in enumerate(questions)]
+        try:
+            for completed in asyncio.as_completed(tasks):
+                yield await completed
+        finally:
+            for handle, task in zip(handles, tasks):
+                if not task.done():
+                    handle.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
     def validate_sql(self, sql: str) -> bool:
         """
         Validate SQL query syntax.
@@ -0,0 +1,128 @@
+"""
+Literal extraction for generated SQL.
+
+Generated statements embed their values inline (``WHERE city = 'Boston'``),
+so every variation of a question is a distinct statement to the database's
+plan cache and to our own statement and result caches. ``parameterize``
+lifts the literals of WHERE, HAVING and ON predicates into bind parameters,
+giving one canonical statement shape per query template plus a params dict.
+
+Literals whose position changes meaning when bound are left inline: LIMIT /
+OFFSET / TOP counts, positional GROUP BY / ORDER BY references, typed
+literals such as ``DATE '2024-01-01'`` or ``INTERVAL '1 day'``, and values
+followed by a PostgreSQL ``::`` cast. Select-list literals are left alone
+too, since an untyped parameter there cannot be resolved by every backend.
+"""
+
+import sqlparse
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Dict, Tuple
+from sqlparse import tokens as T
+
+# Prefix of generated parameter names; pagination reserves "_k"
+PARAM_PREFIX = "_v"
+
+# Number of distinct (statement, dialect) normalizations kept in memory
+NORMALIZE_CACHE_SIZE = 2048
+
+# Clause keywords that change which part of the statement tokens belong to
+_CLAUSES = {
+    "SELECT": "select", "FROM": "from", "WHERE": "where", "HAVING": "having", "ON": "on",
+    "GROUP BY": "positional", "ORDER BY": "positional", "PARTITION BY": "positional",
+    "LIMIT": "limit", "OFFSET": "limit", "FETCH": "limit", "TOP": "limit",
+    "UNION": "select", "UNION ALL": "select", "EXCEPT": "select", "INTERSECT": "select",
+    "WINDOW": "from", "USING": "from", "RETURNING": "select",
+}
+_CLAUSE_SUFFIXES = ("JOIN",)
+_PREDICATE_CLAUSES = {"where", "having", "on"}
+
+# Keywords introducing a typed literal, which must stay a constant
+_TYPED_LITERAL_PREFIXES = {"DATE", "TIME", "TIMESTAMP", "INTERVAL", "TIMESTAMPTZ", "DATETIME"}
+
+# PostgreSQL drivers that bind parameters server-side (asyncpg) infer each
+# parameter's type from the column it is compared with and reject values of
+# another Python type, so only integers are lifted there
+_LIFTED_TYPES = {
+    "postgresql": {"integer"},
+}
+_DEFAULT_LIFTED_TYPES = {"integer", "float", "string"}
+
+
+def _literal_kind(token) -> str:
+    if token.ttype in T.Literal.Number.Integer:
+        return "integer"
+    if token.ttype in T.Literal.Number.Float:
+        return "float"
+    if token.ttype in T.Literal.String.Single and token.value.startswith("'"):
+        return "string"
+    return ""
+
+
+def _literal_value(token, kind: str, dialect: str) -> Any:
+    if kind == "integer":
+        return int(token.value)
+    if kind == "float":
+        # sqlite3 cannot bind Decimal; elsewhere keep exact numeric semantics
+        return float(token.value) if dialect == "sqlite" else Decimal(token.value)
+    return token.value[1:-1].replace("''", "'")
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _parameterize(sql: str, dialect: str) -> Tuple[str, Tuple[Tuple[str, Any], ...]]:
+    lifted_types = _LIFTED_TYPES.get(dialect, _DEFAULT_LIFTED_TYPES)
+    tokens = list(sqlparse.parse(sql)[0].flatten()) if sql.strip() else []
+    clauses = ["select"]
+    params = []
+    parts = []
+    previous = None
+    for index, token in enumerate(tokens):
+        value = token.value
+        if token.ttype in T.Punctuation and value == "(":
+            clauses.append(clauses[-1])
+        elif token.ttype in T.Punctuation and value == ")" and len(clauses) > 1:
+            clauses.pop()
+        elif token.is_keyword:
+            keyword = " ".join(token.normalized.upper().split())
+            if keyword in _CLAUSES:
+                clauses[-1] = _CLAUSES[keyword]
+            elif keyword.endswith(_CLAUSE_SUFFIXES):
+                clauses[-1] = "from"
+
+        kind = _literal_kind(token)
+        if (kind in lifted_types and clauses[-1] in _PREDICATE_CLAUSES
+                and not (previous is not None and previous.value.upper() in _TYPED_LITERAL_PREFIXES)
+                and not _followed_by_cast(tokens, index)
+                and not (kind == "string" and dialect == "mysql" and "\\" in value)):
+            name = f"{PARAM_PREFIX}{len(params)}"
+            params.append((name, _literal_value(token, kind, dialect)))
+            value = f":{name}"
+
+        parts.append(value)
+        if not token.is_whitespace and token.ttype not in T.Comment:
+            previous = token
+    return "".join(parts), tuple(params)
+
+
+def _followed_by_cast(tokens, index: int) -> bool:
+    for token in tokens[index + 1:]:
+        if token.is_whitespace:
+            continue
+        return token.value == "::"
+    return False
+
+
+def parameterize(sql: str, dialect: str) -> Tuple[str, Dict[str, Any]]:
+    """
+    Lift predicate literals of ``sql`` into bind parameters.
+
+    Args:
+        sql (str): Formatted SQL statement with inline literals
+        dialect (str): SQLAlchemy dialect name of the target database
+
+    Returns:
+        Tuple[str, Dict[str, Any]]: Canonical statement using ``:_v0``-style
+        placeholders, and the values to bind to them
+    """
+    canonical, params = _parameterize(sql, dialect)
+    return canonical, dict(params)
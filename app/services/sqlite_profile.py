@@ -0,0 +1,120 @@
+"""
+SQLite tuning profile for analytical files.
+
+Every pooled connection gets its PRAGMAs from a ``connect`` event:
+
+- ``journal_mode`` (opt-in, e.g. ``WAL`` to let readers run alongside a
+  writer) is persistent and rewrites the file header, so it is only set on
+  files opened for writing and the file's own mode is kept by default
+- ``mmap_size`` reads pages through a memory map instead of read() calls
+- ``cache_size`` sizes the per-connection page cache
+- ``temp_store=MEMORY`` keeps sort and GROUP BY temporaries off disk
+- ``query_only`` rejects writes on the connection
+
+Files that are only read can be opened as ``mode=ro`` URIs, and files that
+never change while open as ``immutable=1``, which skips file locking and
+change detection entirely.
+"""
+
+import logging
+import os
+from typing import Any, Dict, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from app.services.pool_policy import is_memory_sqlite
+
+logger = logging.getLogger(__name__)
+
+
+def sqlite_url(db_path: str, read_only: bool = False, immutable: bool = False) -> str:
+    """
+    SQLAlchemy URL for an SQLite file, in URI form when opened read-only.
+
+    Args:
+        db_path (str): Database file path
+        read_only (bool): Open with ``mode=ro``
+        immutable (bool): Also declare the file unchanging (``immutable=1``); implies read-only
+
+    Returns:
+        str: Connection string
+    """
+    if not (read_only or immutable) or db_path in ("", ":memory:") or db_path.startswith("file:"):
+        return f"sqlite:///{db_path}"
+    options = "mode=ro&immutable=1" if immutable else "mode=ro"
+    # Only the characters that end or escape a URI path need encoding
+    path = os.path.abspath(db_path).replace("%", "%25").replace("?", "%3f").replace("#", "%23")
+    return f"sqlite:///file:{path}?{options}&uri=true"
+
+
+def is_read_only_url(url) -> bool:
+    """Whether an SQLite URL opens its file read-only."""
+    url = make_url(url)
+    return url.query.get("mode") == "ro" or url.query.get("immutable") == "1"
+
+
+def profile_pragmas(settings: Dict[str, Any], read_only: bool = False,
+                    memory: bool = False) -> Dict[str, Any]:
+    """
+    PRAGMAs to run on each new connection, in order.
+
+    The journal mode is a persistent property of the file, so it is only set
+    when configured and on files opened for writing (neither read-only,
+    immutable nor ``query_only``); in-memory databases have neither a journal
+    to change nor a file to map, and stay writable since they start out empty.
+
+    Args:
+        settings (Dict[str, Any]): ``SQLITE_SETTINGS``-style profile
+        read_only (bool): The file is opened read-only
+        memory (bool): The database lives in memory
+
+    Returns:
+        Dict[str, Any]: PRAGMA name to value
+    """
+    pragmas: Dict[str, Any] = {}
+    if not memory and not read_only and not settings.get("query_only") and settings.get("journal_mode"):
+        pragmas["journal_mode"] = settings["journal_mode"]
+    if not memory and settings.get("mmap_size"):
+        pragmas["mmap_size"] = int(settings["mmap_size"])
+    if settings.get("cache_size_kib"):
+        # Negative sizes are in KiB rather than pages
+        pragmas["cache_size"] = -int(settings["cache_size_kib"])
+    if settings.get("temp_store"):
+        pragmas["temp_store"] = settings["temp_store"]
+    if not memory and (read_only or settings.get("query_only")):
+        pragmas["query_only"] = "ON"
+    return pragmas
+
+
+def install_sqlite_profile(engine, settings: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Apply the profile to every connection ``engine`` opens.
+
+    Args:
+        engine: SQLite engine (or the ``sync_engine`` of an asyncio one)
+        settings (Dict[str, Any]): ``SQLITE_SETTINGS``-style profile
+
+    Returns:
+        Optional[Dict[str, Any]]: The PRAGMAs installed, or None for other dialects
+    """
+    if engine.dialect.name != "sqlite":
+        return None
+    pragmas = profile_pragmas(settings, read_only=is_read_only_url(engine.url), memory=is_memory_sqlite(engine.url))
+    if not pragmas:
+        return pragmas
+
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                try:
+                    cursor.execute(f"PRAGMA {name}={value}")
+                    # journal_mode reports the mode actually in effect
+                    cursor.fetchall()
+                except Exception as e:
+                    # e.g. WAL on a read-only directory; the connection stays usable
+                    logger.warning(f"Could not set SQLite PRAGMA {name}={value}: {str(e)}")
+        finally:
+            cursor.close()
+
+    return pragmas
@@ -0,0 +1,94 @@
+"""
+Reusable statement objects and driver-level prepared statement caches.
+
+``text()`` clauses are cached per SQL string and dialect so repeated
+executions skip re-parsing bind parameters and hit SQLAlchemy's compiled
+cache with the same construct. Drivers that keep their own prepared
+statement cache are configured to do so.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Tuple
+from sqlalchemy import event, text
+from sqlalchemy.sql.elements import TextClause
+
+
+class StatementCache:
+    """
+    Thread-safe LRU of ``TextClause`` objects keyed by SQL text and dialect.
+
+    Args:
+        max_size (int): Maximum number of cached statements
+    """
+
+    def __init__(self, max_size: int = 512):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._statements: "OrderedDict[Tuple[str, str], TextClause]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, sql: str, dialect: str = "") -> TextClause:
+        """Return the cached ``text()`` clause for ``sql``, creating it on a miss."""
+        key = (sql, dialect)
+        with self._lock:
+            statement = self._statements.get(key)
+            if statement is not None:
+                self._statements.move_to_end(key)
+                self.hits += 1
+                return statement
+            self.misses += 1
+
+        statement = text(sql)
+        with self._lock:
+            self._statements[key] = statement
+            if len(self._statements) > self.max_size:
+                self._statements.popitem(last=False)
+        return statement
+
+    def clear(self):
+        """Drop every cached statement."""
+        with self._lock:
+            self._statements.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._statements),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+def driver_statement_cache_args(db_type: str, cache_size: int) -> Dict[str, Any]:
+    """
+    ``connect_args`` enabling the driver's prepared statement cache, where it has one.
+
+    sqlite3 keeps ``cached_statements`` prepared statements per connection.
+    """
+    if db_type.lower() == "sqlite":
+        return {"cached_statements": cache_size}
+    return {}
+
+
+def install_driver_statement_cache(engine, db_type: str, cache_size: int):
+    """
+    Size prepared statement caches that are set on the DBAPI connection.
+
+    cx_Oracle / oracledb cache parsed statements per connection via
+    ``stmtcachesize``; pyodbc re-uses the prepared plan when a cursor repeats
+    the same SQL, and psycopg2 / pymysql have no client-side prepare, so those
+    rely on the shared ``text()`` clauses and SQLAlchemy's compiled cache.
+    """
+    if db_type.lower() != "oracle":
+        return
+
+    @event.listens_for(engine, "connect")
+    def _set_statement_cache_size(dbapi_connection, connection_record):
+        if hasattr(dbapi_connection, "stmtcachesize"):
+            dbapi_connection.stmtcachesize = cache_size
@@ -0,0 +1,661 @@
+"""
+Read-through mirror of hot remote tables.
+
+Over a slow link the same few dimension and fact tables are read again and
+again. A ``TableMirror`` counts the tables each query reads, copies the
+hottest into a local SQLite database and keeps them current in the
+background:
+
+- full copies stream into a staging table and are swapped in with a rename,
+  so queries keep using the previous copy while a table is re-copied
+- the first copy of a table streams all of its rows; later rounds fetch only
+  rows whose watermark column (e.g. ``updated_at`` or ``created_at``) is at or
+  past the highest value copied, upserted by primary key
+- tables without a watermark column are re-copied in full every round, and
+  every table is re-copied every ``full_resync`` seconds
+- an insert-only watermark (e.g. ``created_at``) does not reveal updates, so
+  those tables are also re-copied in full at least every ``max_staleness``
+  seconds and are only as fresh as their last full copy
+- deletes are caught up at least every ``max_staleness`` seconds: by
+  comparing primary keys with the remote table, or by a full copy for tables
+  without a primary key
+- hit counts halve every round, so the mirror follows recent usage and
+  drops tables that cool off
+
+A read-only query is answered locally when every table it reads is mirrored
+and was synced, deletes included, at most ``max_staleness`` seconds ago. It
+runs under the caller's cancel handle and deadline. Everything else,
+including statements SQLite cannot run (dialect-specific SQL), goes to the
+remote database as before. SQLite has no exact decimal, temporal or boolean
+storage, so a query that mentions a column holding such values (or selects
+``*`` from its table) always goes to the remote database; mirrored answers
+carry the same Python types and precision as remote ones.
+
+SQL that SQLite runs can still mean something else on the remote, e.g. ``/``
+on integers or ``||`` with NULL on MySQL, SQL Server and Oracle, so
+``DatabaseManager`` only mirrors remotes listed in
+``TABLE_MIRROR_SETTINGS["dialects"]`` (PostgreSQL and SQLite by default).
+Text comparisons follow the remote's case rules (case-sensitive LIKE for
+PostgreSQL and Oracle, case-insensitive columns for MySQL and SQL Server).
+
+``MirrorRegistry`` shares one mirror per remote database among every
+connection to it.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from datetime import date, datetime, time as time_of_day, timedelta
+from decimal import Decimal
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Sequence, Set, Tuple
+import sqlparse
+from sqlparse import tokens as T
+from sqlalchemy import String, and_, bindparam, column, create_engine, event, inspect, select, table, text
+from sqlalchemy.exc import SQLAlchemyError
+from app.services.pool_policy import pool_options
+from app.services.query_control import CancelHandle, enforce_deadline
+from app.services.result_cache import table_references
+from app.services.sqlite_profile import install_sqlite_profile, sqlite_url
+from config.database_config import SQLITE_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+# LIKE is case-sensitive on these remotes, unlike SQLite's default
+_CASE_SENSITIVE_LIKE = {"postgresql", "oracle"}
+
+# Default collations of these remotes compare text case-insensitively, unlike SQLite's
+_CASE_INSENSITIVE_TEXT = {"mysql", "mssql"}
+
+# Statements SQLite failed to run, remembered so they go straight to the remote database
+MAX_UNSUPPORTED_STATEMENTS = 1024
+
+# Python types SQLite stores and returns unchanged
+_EXACT_TYPES = (int, float, str, bytes)
+
+
+class _ReadWriteLock:
+    """Shared readers and one exclusive writer; readers never wait for the writer."""
+
+    def __init__(self):
+        self._readers = 0
+        self._writing = False
+        self._condition = threading.Condition()
+
+    def try_acquire_read(self) -> bool:
+        with self._condition:
+            if self._writing:
+                return False
+            self._readers += 1
+            return True
+
+    def release_read(self):
+        with self._condition:
+            self._readers -= 1
+            if not self._readers:
+                self._condition.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._condition:
+            while self._writing:
+                self._condition.wait()
+            # New readers go to the remote database from here on
+            self._writing = True
+            while self._readers:
+                self._condition.wait()
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writing = False
+                self._condition.notify_all()
+
+
+class _MirroredTable:
+    """Copy state of one remote table."""
+
+    def __init__(self, name: str, columns: List[str], primary_key: List[str], watermark_column: Optional[str],
+                 tracks_updates: bool = True):
+        self.name = name
+        self.columns = columns
+        self.primary_key = primary_key
+        self.watermark_column = watermark_column
+        # Whether rows move past the watermark when they are updated, not only when inserted
+        self.tracks_updates = tracks_updates
+        self.watermark: Any = None
+        self.rows_copied = 0
+        # Wall-clock time up to which inserts and updates are copied
+        self.synced_at: Optional[float] = None
+        self.full_synced_at = 0.0
+        # Wall-clock time up to which deletes are applied
+        self.deletes_synced_at = 0.0
+        # Lower-cased columns holding values SQLite cannot return unchanged (Decimal, datetime, bool, ...)
+        self.inexact_columns: FrozenSet[str] = frozenset()
+
+    @property
+    def current_at(self) -> Optional[float]:
+        """Wall-clock time up to which the copy is complete."""
+        if self.synced_at is None:
+            return None
+        # Catch-ups past an insert-only watermark bring new rows but miss updates
+        synced_at = self.synced_at if self.tracks_updates else self.full_synced_at
+        return min(synced_at, self.deletes_synced_at)
+
+
+class _TableTooLarge(Exception):
+    pass
+
+
+class TableMirror:
+    """
+    Local SQLite copy of the most read tables of one remote database.
+
+    Args:
+        remote: Engine of the remote database
+        path (str): SQLite file of the mirror; empty for a temporary file removed
+            on close (an in-memory database has one connection, which readers
+            and a copy in progress cannot share)
+        label (str): Description for logs; must not contain credentials
+        max_tables (int): Tables mirrored at once
+        min_hits (int): Reads (halved every round) that make a table hot
+        max_table_rows (int): Larger tables are not mirrored
+        watermark_columns (Sequence[str]): Candidate watermark columns, in order of preference
+        insert_watermark_columns (Sequence[str]): Watermark columns set on insert
+            only, which cannot reveal updates
+        max_staleness (float): Seconds a table, deletes included, may lag behind
+            and still serve queries
+        sync_interval (float): Seconds between sync rounds; 0 syncs only when ``sync()`` is called
+        full_resync (float): Seconds between full copies of each table
+        batch_size (int): Rows copied per round trip
+    """
+
+    def __init__(self, remote, path: str = "", label: str = "", max_tables: int = 8, min_hits: int = 3,
+                 max_table_rows: int = 1_000_000, watermark_columns: Sequence[str] = ("updated_at", "created_at"),
+                 insert_watermark_columns: Sequence[str] = ("created_at",),
+                 max_staleness: float = 300.0, sync_interval: float = 60.0, full_resync: float = 3600.0,
+                 batch_size: int = 5000):
+        self.remote = remote
+        self._temporary = not path
+        if self._temporary:
+            descriptor, path = tempfile.mkstemp(prefix="table-mirror-", suffix=".db")
+            os.close(descriptor)
+        self.path = path
+        self.label = label
+        self.max_tables = max_tables
+        self.min_hits = min_hits
+        self.max_table_rows = max_table_rows
+        self.watermark_columns = [name.lower() for name in watermark_columns]
+        self.insert_watermark_columns = {name.lower() for name in insert_watermark_columns}
+        self.max_staleness = max_staleness
+        self.sync_interval = sync_interval
+        self.full_resync = full_resync
+        self.batch_size = batch_size
+        self.local = _local_engine(path, case_sensitive_like=remote.dialect.name in _CASE_SENSITIVE_LIKE)
+        self.tables: Dict[str, _MirroredTable] = {}
+        self.hits = 0
+        self.fallbacks = 0
+        self.syncs = 0
+        self.sync_errors = 0
+        self._heat: Counter = Counter()
+        self._heat_lock = threading.Lock()
+        self._too_large: Dict[str, float] = {}
+        self._unsupported: "OrderedDict[str, None]" = OrderedDict()
+        self._unsupported_lock = threading.Lock()
+        self._rw_lock = _ReadWriteLock()
+        self._sync_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def record(self, query: str):
+        """Count the tables ``query`` reads towards choosing the hot ones."""
+        names = {name.split(".")[-1].lower() for name in table_references(query) or ()}
+        with self._heat_lock:
+            self._heat.update(names)
+
+    def query(self, query: str, params: Optional[Dict] = None,
+              consume: Optional[Callable[[List[str], List[Any]], List[Dict]]] = None,
+              cancel_handle: Optional[CancelHandle] = None) -> Optional[List[Dict]]:
+        """
+        Run a read-only ``query`` on the mirror if it can answer it fresh enough.
+
+        Args:
+            query (str): Validated read-only SQL
+            params (Optional[Dict]): Query parameters
+            consume (Optional[Callable]): Converts each batch of row tuples to
+                dictionaries, e.g. under a memory budget
+            cancel_handle (Optional[CancelHandle]): Deadline and cancel switch of the query
+
+        Returns:
+            Optional[List[Dict]]: Rows, or None when the query has to go to the remote database
+
+        Raises:
+            QueryTimeoutError: If the query runs past its deadline
+            QueryCancelledError: If the query is cancelled through its handle
+        """
+        if not self._eligible(query):
+            return None
+        if not self._rw_lock.try_acquire_read():
+            # A sync is writing; do not wait for it
+            self.fallbacks += 1
+            return None
+        try:
+            rows: List[Dict] = []
+            with self.local.connect() as connection:
+                try:
+                    with enforce_deadline(connection, cancel_handle or CancelHandle()):
+                        result = connection.execute(text(query), params or {})
+                        columns = list(result.keys())
+                        while True:
+                            batch = result.fetchmany(self.batch_size)
+                            if not batch:
+                                break
+                            rows.extend(
+                                consume(columns, batch) if consume else [dict(zip(columns, row)) for row in batch]
+                            )
+                except SQLAlchemyError as e:
+                    logger.info(f"Mirror cannot run the query, using the remote database: {str(e)}")
+                    with self._unsupported_lock:
+                        self._unsupported[query] = None
+                        while len(self._unsupported) > MAX_UNSUPPORTED_STATEMENTS:
+                            self._unsupported.popitem(last=False)
+                    self.fallbacks += 1
+                    return None
+        finally:
+            self._rw_lock.release_read()
+        self.hits += 1
+        return rows
+
+    def _eligible(self, query: str) -> bool:
+        # Every table the query reads, comma joins and subqueries included; None if not all are known
+        references = table_references(query)
+        # Only unqualified names of the default schema are mirrored
+        if not references or any("." in name for name in references):
+            return False
+        with self._unsupported_lock:
+            if query in self._unsupported:
+                return False
+        now = time.time()
+        mentioned = None
+        for name in {name.lower() for name in references}:
+            state = self.tables.get(name)
+            if state is None or state.current_at is None or now - state.current_at > self.max_staleness:
+                return False
+            if state.inexact_columns:
+                if mentioned is None:
+                    mentioned = _mentions(query)
+                names, selects_all = mentioned
+                if selects_all or names & state.inexact_columns:
+                    return False
+        return True
+
+    def sync(self) -> int:
+        """
+        One round: pick the hot tables, drop cooled ones and bring the rest up to date.
+
+        Returns:
+            int: Tables synced successfully
+        """
+        with self._sync_lock:
+            hot = self._hot_tables()
+            for name in [name for name in self.tables if name not in hot]:
+                self._drop(name)
+            synced = 0
+            for key, name in hot.items():
+                if self._stop.is_set():
+                    break
+                try:
+                    state = self.tables.get(key)
+                    if (state is None or state.watermark is None
+                            or time.time() - state.full_synced_at > self.full_resync
+                            or self._full_copy_due(state)):
+                        self._copy(key, name)
+                    else:
+                        self._catch_up(state)
+                        if self._deletes_due(state):
+                            self._sweep_deletes(state)
+                    synced += 1
+                except _TableTooLarge:
+                    logger.info(f"Not mirroring {name}: more than {self.max_table_rows:,} rows")
+                    self._too_large[key] = time.time() + self.full_resync
+                    self._drop(key)
+                except Exception as e:
+                    self.sync_errors += 1
+                    logger.warning(f"Mirror sync of {name} from {self.label} failed: {str(e)}")
+            self.syncs += 1
+            return synced
+
+    def _hot_tables(self) -> Dict[str, str]:
+        """Lower-cased name to remote name of the tables to mirror this round."""
+        with self._heat_lock:
+            ranked = [name for name, hits in self._heat.most_common() if hits >= self.min_hits]
+            for name in list(self._heat):
+                self._heat[name] //= 2
+                if not self._heat[name]:
+                    del self._heat[name]
+        if not ranked:
+            return {}
+        remote_names = {name.lower(): name for name in inspect(self.remote).get_table_names()}
+        now = time.time()
+        hot = {}
+        for name in ranked:
+            if name in remote_names and self._too_large.get(name, 0.0) <= now:
+                hot[name] = remote_names[name]
+                if len(hot) == self.max_tables:
+                    break
+        return hot
+
+    def _copy(self, key: str, name: str):
+        """Full copy of a table, replacing the local one."""
+        inspector = inspect(self.remote)
+        reflected = inspector.get_columns(name)
+        columns = [info["name"] for info in reflected]
+        primary_key = inspector.get_pk_constraint(name).get("constrained_columns") or []
+        by_lower = {column_name.lower(): column_name for column_name in columns}
+        watermark_column = next(
+            (by_lower[candidate] for candidate in self.watermark_columns if candidate in by_lower), None
+        )
+        tracks_updates = watermark_column is None or watermark_column.lower() not in self.insert_watermark_columns
+        state = _MirroredTable(name, columns, primary_key, watermark_column, tracks_updates)
+        source = _table(name, columns)
+        started = time.time()
+
+        quote = self.local.dialect.identifier_preparer.quote
+        nocase = self.remote.dialect.name in _CASE_INSENSITIVE_TEXT
+        definition = ", ".join(
+            quote(info["name"]) + (" COLLATE NOCASE" if nocase and isinstance(info["type"], String) else "")
+            for info in reflected
+        )
+        if primary_key:
+            definition += f", PRIMARY KEY ({', '.join(quote(column_name) for column_name in primary_key)})"
+        staging = f"_mirror_staging_{name}"
+        target = _table(staging, columns)
+        insert = target.insert().prefix_with("OR REPLACE") if primary_key else target.insert()
+        try:
+            # Loaded without the lock: queries keep reading the current copy meanwhile
+            with self.local.begin() as local:
+                local.exec_driver_sql(f"DROP TABLE IF EXISTS {quote(staging)}")
+                local.exec_driver_sql(f"CREATE TABLE {quote(staging)} ({definition})")
+                with self.remote.connect() as remote:
+                    result = remote.execution_options(stream_results=True).execute(select(source))
+                    for batch in result.mappings().partitions(self.batch_size):
+                        state.rows_copied += len(batch)
+                        if state.rows_copied > self.max_table_rows:
+                            raise _TableTooLarge()
+                        state.inexact_columns |= _inexact_columns(batch)
+                        local.execute(insert, [_local_row(row) for row in batch])
+                        state.watermark = _max_watermark(state.watermark, batch, watermark_column)
+            state.synced_at = state.full_synced_at = state.deletes_synced_at = started
+            with self._rw_lock.write(), self.local.begin() as local:
+                local.exec_driver_sql(f"DROP TABLE IF EXISTS {quote(name)}")
+                local.exec_driver_sql(f"ALTER TABLE {quote(staging)} RENAME TO {quote(name)}")
+                self.tables[key] = state
+        except BaseException:
+            with self.local.begin() as local:
+                local.exec_driver_sql(f"DROP TABLE IF EXISTS {quote(staging)}")
+            raise
+        logger.info(f"Mirrored {state.rows_copied:,} rows of {name} from {self.label}")
+
+    def _catch_up(self, state: _MirroredTable):
+        """Copy rows at or past the watermark (past it for tables without a primary key)."""
+        source = _table(state.name, state.columns)
+        watermark = source.c[state.watermark_column]
+        # Rows sharing the last watermark may have been committed after the previous
+        # round; with a primary key they are safely upserted again
+        condition = watermark >= state.watermark if state.primary_key else watermark > state.watermark
+        started = time.time()
+        with self.remote.connect() as remote:
+            rows = remote.execute(select(source).where(condition).order_by(watermark)).mappings().all()
+        if rows:
+            insert = source.insert().prefix_with("OR REPLACE") if state.primary_key else source.insert()
+            with self._rw_lock.write(), self.local.begin() as local:
+                state.inexact_columns |= _inexact_columns(rows)
+                local.execute(insert, [_local_row(row) for row in rows])
+            state.rows_copied += len(rows)
+            state.watermark = _max_watermark(state.watermark, rows, state.watermark_column)
+        state.synced_at = started
+
+    def _deletes_due(self, state: _MirroredTable) -> bool:
+        # Early enough that the next round still finds the table within max_staleness
+        return time.time() - state.deletes_synced_at > max(self.max_staleness - self.sync_interval, 0.0)
+
+    def _full_copy_due(self, state: _MirroredTable) -> bool:
+        """Whether only a full copy keeps ``state`` within ``max_staleness``."""
+        if state.primary_key and state.tracks_updates:
+            return False
+        # Without a primary key deletes cannot be swept; without an update watermark updates cannot be seen
+        return time.time() - state.full_synced_at > max(self.max_staleness - self.sync_interval, 0.0)
+
+    def _sweep_deletes(self, state: _MirroredTable):
+        """Delete local rows whose primary key no longer exists in the remote table."""
+        source = _table(state.name, state.columns)
+        key_columns = [source.c[column_name] for column_name in state.primary_key]
+        started = time.time()
+        with self.remote.connect() as remote:
+            result = remote.execution_options(stream_results=True).execute(select(*key_columns))
+            remote_keys = {tuple(_local_value(value) for value in row) for row in result}
+        # Only this round writes the local table, so nothing lands between the two reads
+        with self.local.connect() as local:
+            deleted = {tuple(row) for row in local.execute(select(*key_columns))} - remote_keys
+        if deleted:
+            condition = and_(*[key_column == bindparam(f"_key{i}") for i, key_column in enumerate(key_columns)])
+            with self._rw_lock.write(), self.local.begin() as local:
+                local.execute(
+                    source.delete().where(condition),
+                    [{f"_key{i}": value for i, value in enumerate(key)} for key in deleted]
+                )
+            logger.info(f"Removed {len(deleted):,} deleted rows of {state.name} from the mirror of {self.label}")
+        state.deletes_synced_at = started
+
+    def _drop(self, key: str):
+        state = self.tables.get(key)
+        with self._rw_lock.write():
+            self.tables.pop(key, None)
+            if state is not None:
+                with self.local.begin() as local:
+                    local.exec_driver_sql(
+                        f"DROP TABLE IF EXISTS {self.local.dialect.identifier_preparer.quote(state.name)}"
+                    )
+
+    def start(self):
+        """Sync in a background thread every ``sync_interval`` seconds."""
+        if self.sync_interval <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="table-mirror", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        """Stop syncing and drop the local copy; a round in progress finishes its current table first."""
+        self._stop.set()
+        if self._thread is None:
+            self._dispose()
+
+    def _run(self):
+        try:
+            while not self._stop.wait(self.sync_interval):
+                self.sync()
+        finally:
+            self._dispose()
+
+    def _dispose(self):
+        self.local.dispose()
+        if self._temporary:
+            for suffix in ("", "-wal", "-shm"):
+                try:
+                    os.remove(self.path + suffix)
+                except OSError:
+                    pass
+
+    def _unsupported_count(self) -> int:
+        with self._unsupported_lock:
+            return len(self._unsupported)
+
+    def stats(self) -> Dict[str, Any]:
+        """Mirrored tables with their staleness, and how many queries were served locally."""
+        now = time.time()
+        return {
+            "tables": {
+                state.name: {
+                    "rows_copied": state.rows_copied,
+                    "watermark_column": state.watermark_column,
+                    "staleness_seconds": round(now - state.current_at, 1) if state.current_at else None,
+                }
+                for state in list(self.tables.values())
+            },
+            "hits": self.hits,
+            "fallbacks": self.fallbacks,
+            "unsupported_statements": self._unsupported_count(),
+            "syncs": self.syncs,
+            "sync_errors": self.sync_errors,
+        }
+
+
+def _local_engine(path: str, case_sensitive_like: bool = False):
+    url = sqlite_url(path) if path else "sqlite://"
+    kwargs = pool_options(url)
+    kwargs["connect_args"]["check_same_thread"] = False
+    engine = create_engine(url, **kwargs)
+    # The mirror is written by its sync rounds while queries read it
+    install_sqlite_profile(engine, dict(SQLITE_SETTINGS, query_only=False, journal_mode="WAL"))
+
+    if case_sensitive_like:
+        @event.listens_for(engine, "connect")
+        def _case_sensitive_like(dbapi_connection, connection_record):
+            dbapi_connection.execute("PRAGMA case_sensitive_like=ON")
+
+    return engine
+
+
+def _table(name: str, columns: List[str]):
+    return table(name, *[column(column_name) for column_name in columns])
+
+
+def _local_value(value: Any) -> Any:
+    """``value`` as a type SQLite stores natively."""
+    if value is None or isinstance(value, (int, float, str, bytes)):
+        return value
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    if isinstance(value, (date, time_of_day)):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    if isinstance(value, (bytearray, memoryview)):
+        return bytes(value)
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str)
+    return str(value)
+
+
+def _local_row(row) -> Dict[str, Any]:
+    return {name: _local_value(value) for name, value in row.items()}
+
+
+def _inexact_columns(rows) -> FrozenSet[str]:
+    """Lower-cased columns of ``rows`` with values ``_local_value()`` has to convert."""
+    return frozenset(
+        name.lower() for row in rows for name, value in row.items()
+        if value is not None and type(value) not in _EXACT_TYPES
+    )
+
+
+def _mentions(query: str) -> Tuple[Set[str], bool]:
+    """Lower-cased words a query may name columns with, and whether it selects ``*`` (not ``COUNT(*)``)."""
+    names = set()
+    selects_all = False
+    previous = None
+    for token in sqlparse.parse(query)[0].flatten():
+        if token.is_whitespace or token.ttype in T.Comment:
+            continue
+        if token.ttype in T.Name or token.ttype in T.Literal.String.Symbol or token.ttype in T.Keyword:
+            # Column names such as "date" are tokenized as keywords
+            names.add(token.value.strip('"`[]').lower())
+        elif token.ttype in T.Wildcard and not (previous is not None and previous.match(T.Punctuation, "(")):
+            selects_all = True
+        previous = token
+    return names, selects_all
+
+
+def _max_watermark(current: Any, rows, watermark_column: Optional[str]) -> Any:
+    if watermark_column is None:
+        return current
+    values = [row[watermark_column] for row in rows if row[watermark_column] is not None]
+    if current is not None:
+        values.append(current)
+    return max(values) if values else None
+
+
+class MirrorRegistry:
+    """
+    One ``TableMirror`` per remote database, shared by every connection to it.
+
+    Args:
+        settings (Dict[str, Any]): ``TABLE_MIRROR_SETTINGS``-style options
+    """
+
+    def __init__(self, settings: Dict[str, Any]):
+        self.settings = settings
+        self._mirrors: Dict[str, List[Any]] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str, engine, label: str = "") -> Tuple[TableMirror, Callable[[], None]]:
+        """
+        Mirror of the remote database ``key``, created and started on first use.
+
+        Args:
+            key (str): Connection identity from ``EngineRegistry.make_key``
+            engine: Engine of the remote database
+            label (str): Description for logs; must not contain credentials
+
+        Returns:
+            Tuple[TableMirror, Callable[[], None]]: The mirror and a function
+            releasing it (once); the last release closes the mirror
+        """
+        with self._lock:
+            entry = self._mirrors.get(key)
+            if entry is None:
+                entry = self._mirrors[key] = [self._create(key, engine, label), 0]
+                entry[0].start()
+            entry[1] += 1
+            mirror = entry[0]
+        released = threading.Event()
+
+        def release():
+            if released.is_set():
+                return
+            released.set()
+            with self._lock:
+                entry[1] -= 1
+                unused = entry[1] == 0 and self._mirrors.get(key) is entry
+                if unused:
+                    del self._mirrors[key]
+            if unused:
+                mirror.close()
+
+        return mirror, release
+
+    def _create(self, key: str, engine, label: str) -> TableMirror:
+        settings = self.settings
+        path = ""
+        if settings["directory"]:
+            os.makedirs(settings["directory"], exist_ok=True)
+            path = os.path.join(settings["directory"], f"mirror-{key[:16]}.db")
+        return TableMirror(
+            engine,
+            path=path,
+            label=label,
+            max_tables=settings["max_tables"],
+            min_hits=settings["min_hits"],
+            max_table_rows=settings["max_table_rows"],
+            watermark_columns=settings["watermark_columns"],
+            insert_watermark_columns=settings["insert_watermark_columns"],
+            max_staleness=settings["max_staleness_seconds"],
+            sync_interval=settings["sync_interval"],
+            full_resync=settings["full_resync_seconds"]
+        )
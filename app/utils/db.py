@@ -4,6 +4,8 @@ from sqlalchemy.ext.declarative import declarative_base
 from typing import Dict, List, Optional, Any
 import os
 from dotenv import load_dotenv
+from app.services.pool_policy import pool_options
+from app.services.sql_classifier import ensure_read_only
 
 # Load environment variables
 load_dotenv()
@@ -11,15 +13,11 @@ load_dotenv()
 # Database configuration
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///data/sample.db")
 
-# Create SQLAlchemy engine and session with connection pooling
-engine = create_engine(
-    DATABASE_URL,
-    pool_size=5,
-    max_overflow=10,
-    pool_timeout=30,
-    pool_recycle=1800,  # Recycle connections after 30 minutes
-    connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
-)
+# Create SQLAlchemy engine and session with the pool policy of its dialect
+_engine_kwargs = pool_options(DATABASE_URL)
+if DATABASE_URL.startswith("sqlite"):
+    _engine_kwargs["connect_args"]["check_same_thread"] = False
+engine = create_engine(DATABASE_URL, **_engine_kwargs)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -72,15 +70,8 @@ def execute_query(query: str, params: Optional[Dict] = None) -> List[Dict]:
         ValueError: If the query is invalid or contains dangerous operations
         RuntimeError: If there's a database error
     """
-    # Basic SQL injection prevention
-    dangerous_operations = [
-        "DROP DATABASE", "DROP TABLE", "TRUNCATE", "DELETE FROM",
-        "UPDATE", "INSERT INTO", "CREATE TABLE", "ALTER TABLE"
-    ]
-    
-    query_upper = query.upper()
-    if any(op in query_upper for op in dangerous_operations):
-        raise ValueError("Query contains dangerous operations that are not allowed")
+    # Only single read-only statements may run through this path
+    ensure_read_only(query, engine.dialect.name)
     
     try:
         with engine.connect() as connection:
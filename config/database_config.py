@@ -88,27 +88,237 @@ CONNECTION_VALIDATION = {
     }
 }
 
-# Default connection timeout and pool settings
+# Pool sizing defaults per workload. Interactive use keeps a few hot
+# connections; batch use (dashboards, many questions at once) holds more
+# connections and waits longer for one. POOL_* variables override either.
+POOL_WORKLOADS = {
+    "interactive": {"pool_size": 5, "max_overflow": 10, "pool_timeout": 30, "pool_use_lifo": True},
+    "batch": {"pool_size": 10, "max_overflow": 20, "pool_timeout": 60, "pool_use_lifo": False}
+}
+_pool_workload = POOL_WORKLOADS.get(os.getenv("POOL_WORKLOAD", "interactive"), POOL_WORKLOADS["interactive"])
+
+# Default connection timeout and pool settings. The pool class is chosen per
+# dialect (see app/services/pool_policy.py) unless POOL_CLASS forces one of
+# "queue", "null", "static" or "singleton"
 DEFAULT_CONNECTION_SETTINGS = {
-    "pool_size": 5,
-    "max_overflow": 10,
-    "pool_timeout": 30,
-    "pool_recycle": 1800,  # 30 minutes
-    "connect_timeout": 10
-}
-
-# SQL injection prevention patterns
-DANGEROUS_SQL_PATTERNS = [
-    "DROP DATABASE",
-    "DROP TABLE", 
-    "TRUNCATE",
-    "DELETE FROM",
-    "UPDATE",
-    "INSERT INTO",
-    "CREATE TABLE",
-    "ALTER TABLE",
-    "EXEC",
-    "EXECUTE",
-    "xp_",
-    "sp_"
-]
+    "pool_size": int(os.getenv("POOL_SIZE", str(_pool_workload["pool_size"]))),
+    "max_overflow": int(os.getenv("POOL_MAX_OVERFLOW", str(_pool_workload["max_overflow"]))),
+    "pool_timeout": float(os.getenv("POOL_TIMEOUT", str(_pool_workload["pool_timeout"]))),
+    "pool_recycle": int(os.getenv("POOL_RECYCLE", "1800")),  # 30 minutes
+    "connect_timeout": int(os.getenv("CONNECT_TIMEOUT", "10")),
+    # Test each connection with a cheap round trip before handing it out
+    "pool_pre_ping": os.getenv("POOL_PRE_PING", "true").lower() == "true",
+    # Reuse the most recently returned connection so surplus ones go idle and are recycled
+    "pool_use_lifo": os.getenv("POOL_USE_LIFO", str(_pool_workload["pool_use_lifo"])).lower() == "true",
+    "pool_class": os.getenv("POOL_CLASS", "")
+}
+
+# SQLite profile applied to every pooled connection. read_only opens files
+# with mode=ro; immutable additionally tells SQLite the file never changes
+# while open, so readers skip locking entirely (only for files nothing writes to)
+SQLITE_SETTINGS = {
+    # Persistent and written to the file header; empty keeps each file's own mode
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", ""),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "cache_size_kib": int(os.getenv("SQLITE_CACHE_SIZE_KIB", str(64 * 1024))),
+    "temp_store": os.getenv("SQLITE_TEMP_STORE", "MEMORY"),
+    "query_only": os.getenv("SQLITE_QUERY_ONLY", "true").lower() == "true",
+    "read_only": os.getenv("SQLITE_READ_ONLY", "false").lower() == "true",
+    "immutable": os.getenv("SQLITE_IMMUTABLE", "false").lower() == "true"
+}
+
+# Result pagination for generated queries
+QUERY_PAGINATION_SETTINGS = {
+    "default_page_size": int(os.getenv("QUERY_PAGE_SIZE", "1000")),
+    "max_page_size": int(os.getenv("QUERY_MAX_PAGE_SIZE", "10000"))
+}
+
+# Per-query statement timeout in seconds (0 disables the deadline)
+QUERY_TIMEOUT_SETTINGS = {
+    "default_timeout": float(os.getenv("QUERY_TIMEOUT_SECONDS", "60"))
+}
+
+# Concurrent execution of question batches (e.g. dashboards). Queries are also
+# bounded by the pool size of the connected database.
+MULTI_QUERY_SETTINGS = {
+    "max_questions": int(os.getenv("MULTI_QUERY_MAX_QUESTIONS", "20")),
+    # SQL generations allowed to run on the model at once
+    "model_concurrency": int(os.getenv("MODEL_CONCURRENCY", "2"))
+}
+
+# Progressive results: a preview of the generated query reads a table sample
+# (TABLESAMPLE on PostgreSQL, the first table_rows rows of each table elsewhere)
+# and is shown while the full query is still running
+PREVIEW_SETTINGS = {
+    "sample_percent": float(os.getenv("PREVIEW_SAMPLE_PERCENT", "1")),
+    "table_rows": int(os.getenv("PREVIEW_TABLE_ROWS", "10000")),
+    # Previews slower than this are abandoned
+    "timeout": float(os.getenv("PREVIEW_TIMEOUT_SECONDS", "5"))
+}
+
+# Engines shared by every connection (and every UI session) to the same
+# database. Released engines stay warm until more than max_idle_engines are
+# idle (least recently used are disposed first), one has been idle for
+# idle_ttl_seconds (0: no limit), or the pooled connections of all engines are
+# estimated at more than max_memory_bytes (0: no limit)
+ENGINE_REGISTRY_SETTINGS = {
+    "max_idle_engines": int(os.getenv("ENGINE_MAX_IDLE", "8")),
+    "idle_ttl_seconds": float(os.getenv("ENGINE_IDLE_TTL", "900")),
+    "max_memory_bytes": int(os.getenv("ENGINE_CACHE_MAX_MEMORY", str(512 * 1024 * 1024))),
+    "connection_memory_bytes": int(os.getenv("ENGINE_CONNECTION_MEMORY", str(4 * 1024 * 1024)))
+}
+
+# Pool pre-warming: connect() opens min_idle connections per engine in
+# parallel before reporting ready, and a background keeper restores that idle
+# floor (and disposes expired idle engines) every keeper_interval seconds
+# (0 disables the keeper)
+POOL_PREWARM_SETTINGS = {
+    "min_idle": int(os.getenv("POOL_MIN_IDLE", "2")),
+    "timeout": float(os.getenv("POOL_PREWARM_TIMEOUT", "10")),
+    "keeper_interval": float(os.getenv("POOL_KEEPER_INTERVAL", "30"))
+}
+
+# SQL Server discovery in the connection sidebar: database lists are cached
+# per server for ttl_seconds
+SERVER_DISCOVERY_SETTINGS = {
+    "ttl_seconds": float(os.getenv("SERVER_DISCOVERY_TTL", "300")),
+    "max_servers": int(os.getenv("SERVER_DISCOVERY_MAX_SERVERS", "32"))
+}
+
+# Read-through mirror of hot tables in a local SQLite database (directory
+# empty: in memory). Tables read by at least min_hits queries (counts halve
+# every round) are copied, at most max_tables of them, and synced every
+# sync_interval seconds through the first watermark column they have; deletes
+# are caught up by a full copy every full_resync_seconds. Read-only queries
+# reading only mirrored tables run locally while those are at most
+# max_staleness_seconds behind.
+TABLE_MIRROR_SETTINGS = {
+    "enabled": os.getenv("TABLE_MIRROR_ENABLED", "false").lower() == "true",
+    # Remotes whose SQL means the same on SQLite; others (MySQL's and SQL Server's
+    # "/" on integers, Oracle's "||" with NULL) are never served from the mirror
+    "dialects": [
+        name.strip() for name in os.getenv("TABLE_MIRROR_DIALECTS", "postgresql,sqlite").split(",")
+        if name.strip()
+    ],
+    "directory": os.getenv("TABLE_MIRROR_DIR", ""),
+    "max_tables": int(os.getenv("TABLE_MIRROR_MAX_TABLES", "8")),
+    "min_hits": int(os.getenv("TABLE_MIRROR_MIN_HITS", "3")),
+    "max_table_rows": int(os.getenv("TABLE_MIRROR_MAX_TABLE_ROWS", "1000000")),
+    "watermark_columns": [
+        name.strip() for name in os.getenv("TABLE_MIRROR_WATERMARK_COLUMNS", "updated_at,created_at").split(",")
+        if name.strip()
+    ],
+    # Watermark columns set only on insert; tables using them are re-copied to see updates
+    "insert_watermark_columns": [
+        name.strip() for name in os.getenv("TABLE_MIRROR_INSERT_WATERMARK_COLUMNS", "created_at").split(",")
+        if name.strip()
+    ],
+    "sync_interval": float(os.getenv("TABLE_MIRROR_SYNC_INTERVAL", "60")),
+    "max_staleness_seconds": float(os.getenv("TABLE_MIRROR_MAX_STALENESS", "300")),
+    "full_resync_seconds": float(os.getenv("TABLE_MIRROR_FULL_RESYNC", "3600"))
+}
+
+# Pool and statement metrics of every engine, served by /stats and /metrics
+POOL_TELEMETRY_SETTINGS = {
+    "enabled": os.getenv("POOL_TELEMETRY_ENABLED", "true").lower() == "true"
+}
+
+# Read routing across replicas passed to DatabaseManager.connect(replicas=...)
+READ_ROUTING_SETTINGS = {
+    # Also send reads to the primary while replicas are healthy
+    "include_primary": os.getenv("READ_FROM_PRIMARY", "false").lower() == "true",
+    # Replicas further behind than this are skipped (0 disables the check)
+    "max_lag_seconds": float(os.getenv("REPLICA_MAX_LAG_SECONDS", "30")),
+    "lag_check_interval": float(os.getenv("REPLICA_LAG_CHECK_INTERVAL", "5")),
+    # A failing replica is ejected for this long, doubling per consecutive failure
+    "eject_seconds": float(os.getenv("REPLICA_EJECT_SECONDS", "30")),
+    "max_eject_seconds": float(os.getenv("REPLICA_MAX_EJECT_SECONDS", "300"))
+}
+
+# Per-query memory budget. Columnar results over budget spill to memory-mapped
+# files; list-of-dict results over budget are refused. Results paged from a
+# buffer are kept for buffer_ttl_seconds after their last page request.
+RESULT_BUFFER_SETTINGS = {
+    "memory_budget": int(os.getenv("RESULT_MEMORY_BUDGET", str(64 * 1024 * 1024))),
+    "spill_dir": os.getenv("RESULT_SPILL_DIR", ""),
+    "max_spill_bytes": int(os.getenv("RESULT_MAX_SPILL_BYTES", str(2 * 1024 * 1024 * 1024))),
+    "buffer_ttl_seconds": float(os.getenv("RESULT_BUFFER_TTL", "600")),
+    "max_buffered_results": int(os.getenv("RESULT_MAX_BUFFERS", "32"))
+}
+
+# Query result cache
+RESULT_CACHE_SETTINGS = {
+    "enabled": os.getenv("RESULT_CACHE_ENABLED", "true").lower() == "true",
+    "max_bytes": int(os.getenv("RESULT_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+    "max_entry_bytes": int(os.getenv("RESULT_CACHE_MAX_ENTRY_BYTES", str(8 * 1024 * 1024))),
+    # Lifetime of results from databases without an exact data-version token (0 disables caching them)
+    "ttl_seconds": float(os.getenv("RESULT_CACHE_TTL", "30")),
+    "probe_interval": float(os.getenv("RESULT_CACHE_PROBE_INTERVAL", "5")),
+    "compression_level": int(os.getenv("RESULT_CACHE_COMPRESSION_LEVEL", "1"))
+}
+
+# Fetch batch sizing: rows per fetch round trip (cursor arraysize, psycopg2
+# itersize), rows Oracle returns with the execute round trip, and the expected
+# result size above which a server-side (unbuffered) cursor is used
+FETCH_TUNING_SETTINGS = {
+    "arraysize": int(os.getenv("FETCH_ARRAYSIZE", "1000")),
+    "prefetch_rows": int(os.getenv("FETCH_PREFETCH_ROWS", "1000")),
+    "server_side_threshold": int(os.getenv("FETCH_SERVER_SIDE_ROWS", "10000"))
+}
+
+# Concurrent executions of the same statement and parameters share one
+# database execution and its result
+SINGLE_FLIGHT_SETTINGS = {
+    "enabled": os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+}
+
+# Statement caches: shared text() clauses, SQLAlchemy's compiled cache and the
+# driver's own prepared statement cache (sqlite3, cx_Oracle). Predicate literals
+# of generated SQL are lifted into bind parameters so value variations share
+# one cached statement.
+STATEMENT_CACHE_SETTINGS = {
+    "parameterize_literals": os.getenv("PARAMETERIZE_LITERALS", "true").lower() == "true",
+    "max_size": int(os.getenv("STATEMENT_CACHE_SIZE", "512")),
+    "compiled_cache_size": int(os.getenv("COMPILED_CACHE_SIZE", "500")),
+    "driver_cache_size": int(os.getenv("DRIVER_STATEMENT_CACHE_SIZE", "256"))
+}
+
+# Pre-flight EXPLAIN check for generated SQL. Thresholds of 0 are disabled;
+# the action is one of "reject", "limit" or "sample" (TABLESAMPLE on PostgreSQL,
+# a row cap elsewhere).
+QUERY_COST_SETTINGS = {
+    "enabled": os.getenv("QUERY_COST_GATE_ENABLED", "false").lower() == "true",
+    "max_estimated_rows": float(os.getenv("QUERY_COST_MAX_ROWS", "1000000")),
+    "max_estimated_cost": float(os.getenv("QUERY_COST_MAX_COST", "0")),
+    "max_scan_rows": float(os.getenv("QUERY_COST_MAX_SCAN_ROWS", "5000000")),
+    "action": os.getenv("QUERY_COST_ACTION", "reject").lower(),
+    "limit_rows": int(os.getenv("QUERY_COST_LIMIT_ROWS", "1000")),
+    "sample_percent": float(os.getenv("QUERY_COST_SAMPLE_PERCENT", "1")),
+    "plan_cache_size": int(os.getenv("QUERY_PLAN_CACHE_SIZE", "1024"))
+}
+
+# Read-only query policy used by app.services.sql_classifier.
+# Statements must start with one of the allowed types and may not contain any
+# of the write keywords or procedure prefixes as a bare word (string literals,
+# quoted identifiers and comments are ignored).
+READ_ONLY_STATEMENT_TYPES = {"SELECT", "WITH", "VALUES", "SHOW", "DESCRIBE", "DESC", "EXPLAIN", "PRAGMA"}
+
+DANGEROUS_SQL_KEYWORDS = {
+    "INSERT", "UPDATE", "DELETE", "MERGE", "UPSERT",
+    "DROP", "TRUNCATE", "ALTER", "CREATE", "RENAME",
+    "GRANT", "REVOKE", "EXEC", "EXECUTE", "CALL",
+    "INTO", "ATTACH", "DETACH", "COPY"
+}
+
+DANGEROUS_SQL_PREFIXES = ("xp_", "sp_")
+
+# SQLite PRAGMAs a read-only query may run. Any other PRAGMA, and any PRAGMA
+# assignment, is rejected: PRAGMA query_only(0) would lift the read-only
+# profile. Only the introspection PRAGMAs in PRAGMAS_WITH_NAME_ARGUMENT take an
+# argument, and it names a table or index rather than a setting.
+PRAGMAS_WITH_NAME_ARGUMENT = {
+    "table_info", "table_xinfo", "table_list", "index_list", "index_info", "index_xinfo", "foreign_key_list"
+}
+READ_ONLY_PRAGMAS = PRAGMAS_WITH_NAME_ARGUMENT | {
+    "database_list", "collation_list", "function_list", "module_list", "pragma_list", "compile_options"
+}
@@ -1,12 +1,14 @@
 import streamlit as st
-from app.services.database_manager import get_db_manager
+from gui.session import get_session_db_manager
+from app.services.server_discovery import get_server_discovery
+from config.database_config import SQLITE_SETTINGS
 import os
 from urllib.parse import quote_plus
 
 def render_database_connection():
     """Render the database connection configuration interface."""
     
-    db_manager = get_db_manager()
+    db_manager = get_session_db_manager()
     
     st.sidebar.header("🔌 Database Connection")
     
@@ -49,7 +51,7 @@ def render_database_connection():
         
         # Default SQLite connection
         if st.sidebar.button("📁 Connect to Default SQLite", type="primary"):
-            db_manager = get_db_manager()
+            db_manager = get_session_db_manager()
             if db_manager.connect("sqlite", db_path="data/sample.db"):
                 st.sidebar.success("✅ Connected to default SQLite database!")
                 st.rerun()
@@ -112,13 +114,34 @@ def render_sqlite_connection():
             db_path = save_path
             st.sidebar.success(f"File saved to: {save_path}")
     
+    replica_paths = st.sidebar.text_area(
+        "Read replica files (optional):",
+        value="",
+        help="One path per line to read-only copies of the database; queries are load-balanced across them"
+    )
+    
+    read_only = st.sidebar.checkbox(
+        "Open read-only",
+        value=SQLITE_SETTINGS["read_only"],
+        help="Open the files with mode=ro; nothing can be written through this connection"
+    )
+    immutable = st.sidebar.checkbox(
+        "Files never change (immutable)",
+        value=SQLITE_SETTINGS["immutable"],
+        help="Skip file locking entirely for the fastest concurrent reads; only for files nothing writes to"
+    )
+    
     if st.sidebar.button("🔗 Connect to SQLite"):
-        db_manager = get_db_manager()
+        db_manager = get_session_db_manager()
         
         # Create data directory if it doesn't exist
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
         
-        if db_manager.connect("sqlite", db_path=db_path):
+        replicas = [
+            {"db_path": path.strip(), "read_only": read_only, "immutable": immutable}
+            for path in replica_paths.splitlines() if path.strip()
+        ]
+        if db_manager.connect("sqlite", replicas=replicas, db_path=db_path, read_only=read_only, immutable=immutable):
             st.sidebar.success("✅ Connected to SQLite database!")
             st.rerun()
         else:
@@ -147,7 +170,7 @@ def render_postgresql_connection():
         timeout = st.number_input("Timeout (s):", value=10, min_value=1, max_value=60)
     
     if st.sidebar.button("🔗 Connect to PostgreSQL"):
-        db_manager = get_db_manager()
+        db_manager = get_session_db_manager()
         
         connection_params = {
             "host": host,
@@ -186,7 +209,7 @@ def render_mysql_connection():
         charset = st.selectbox("Charset:", ["utf8mb4", "utf8", "latin1"], key="mysql_charset")
     
     if st.sidebar.button("🔗 Connect to MySQL", key="mysql_connect"):
-        db_manager = get_db_manager()
+        db_manager = get_session_db_manager()
         
         if not host or not username or not database:
             st.sidebar.error("❌ Please fill in all required fields (Host, Username, Database)")
@@ -285,7 +308,7 @@ def render_sqlserver_connection():
         
         with col2:
             if st.button("🔗 Connect to SQL Server", type="primary"):
-                db_manager = get_db_manager()
+                db_manager = get_session_db_manager()
                 
                 # If discovering databases, connect to master first
                 target_database = "master" if discover_databases else database
@@ -403,7 +426,7 @@ def render_sqlserver_basic_connection():
     
     with col2:
         if st.button("🔗 Connect to SQL Server", type="primary"):
-            db_manager = get_db_manager()
+            db_manager = get_session_db_manager()
             
             # If discovering databases, connect to master first
             target_database = "master" if discover_databases else database
@@ -496,7 +519,7 @@ def render_sqlserver_advanced_connection():
         connection_retry_interval = st.number_input("Retry Interval (s):", value=10, min_value=1, max_value=60)
     
     if st.sidebar.button("🔗 Connect with Advanced Settings", type="primary"):
-        db_manager = get_db_manager()
+        db_manager = get_session_db_manager()
         
         # Build server name with instance
         server_name = host
@@ -602,7 +625,7 @@ def render_sqlserver_connection_string():
     
     # Connect using connection string
     if st.sidebar.button("🔗 Connect using Connection String", type="primary"):
-        db_manager = get_db_manager()
+        db_manager = get_session_db_manager()
         
         # Parse connection string and connect
         try:
@@ -633,7 +656,7 @@ def render_sqlserver_connection_string():
 
 def connect_sqlserver_preset(host, port, database, username, password, driver):
     """Connect to SQL Server using preset parameters."""
-    db_manager = get_db_manager()
+    db_manager = get_session_db_manager()
     
     connection_params = {
         "host": host,
@@ -673,7 +696,7 @@ def render_oracle_connection():
         encoding = st.selectbox("Encoding:", ["UTF-8", "AL32UTF8", "WE8ISO8859P1"])
     
     if st.sidebar.button("🔗 Connect to Oracle"):
-        db_manager = get_db_manager()
+        db_manager = get_session_db_manager()
         
         connection_params = {
             "host": host,
@@ -794,7 +817,7 @@ def render_connection_presets():
         
         # PostgreSQL presets
         if st.button("🐘 PostgreSQL (Docker)"):
-            db_manager = get_db_manager()
+            db_manager = get_session_db_manager()
             if db_manager.connect("postgresql", 
                                 host="localhost", port=5432, 
                                 database="postgres", username="postgres", password="postgres"):
@@ -803,7 +826,7 @@ def render_connection_presets():
         
         # MySQL presets  
         if st.button("🐬 MySQL (Docker)"):
-            db_manager = get_db_manager()
+            db_manager = get_session_db_manager()
             if db_manager.connect("mysql", 
                                 host="localhost", port=3306, 
                                 database="mysql", username="root", password=""):
@@ -812,7 +835,7 @@ def render_connection_presets():
 
 def initialize_default_connection():
     """Initialize with default SQLite connection if no connection exists."""
-    db_manager = get_db_manager()
+    db_manager = get_session_db_manager()
     
     if not db_manager.is_connected():
         # Try to connect to default SQLite database
@@ -822,11 +845,29 @@ def initialize_default_connection():
         except Exception:
             st.sidebar.warning("⚠️ Could not connect to default database")
 
+def sqlserver_connection_params(host, port, database, username, password, driver, auth_method, timeout, encrypt):
+    """Connection parameters of the SQL Server forms for ``DatabaseManager.connect``."""
+    return {
+        "host": host,
+        "port": port,
+        "database": database,
+        "username": username if auth_method == "SQL Server Authentication" else "",
+        "password": quote_plus(password) if auth_method == "SQL Server Authentication" and password else "",
+        "driver": driver,
+        "trusted_connection": auth_method == "Windows Authentication",
+        "timeout": timeout,
+        "encrypt": encrypt
+    }
+
 def show_database_discovery(db_manager, host, port, username, password, driver, auth_method, timeout, encrypt):
     """Show available databases for selection."""
     try:
-        # Get list of available databases
-        databases = db_manager.execute_query("SELECT name FROM sys.databases WHERE database_id > 4 ORDER BY name")
+        # Database list and details come from the per-server discovery cache
+        discovery = get_server_discovery()
+        server_connection_string = db_manager.get_connection_string("sqlserver", **sqlserver_connection_params(
+            host, port, "master", username, password, driver, auth_method, timeout, encrypt
+        ))
+        databases = discovery.list_databases(server_connection_string)
         
         if databases:
             st.sidebar.markdown("---")
@@ -841,17 +882,9 @@ def show_database_discovery(db_manager, host, port, username, password, driver,
             
             if st.sidebar.button("🔗 Connect to Selected Database"):
                 # Reconnect to the selected database
-                connection_params = {
-                    "host": host,
-                    "port": port,
-                    "database": selected_db,
-                    "username": username if auth_method == "SQL Server Authentication" else "",
-                    "password": quote_plus(password) if auth_method == "SQL Server Authentication" and password else "",
-                    "driver": driver,
-                    "trusted_connection": auth_method == "Windows Authentication",
-                    "timeout": timeout,
-                    "encrypt": encrypt
-                }
+                connection_params = sqlserver_connection_params(
+                    host, port, selected_db, username, password, driver, auth_method, timeout, encrypt
+                )
                 
                 if db_manager.connect("sqlserver", **connection_params):
                     st.sidebar.success(f"✅ Connected to database: {selected_db}")
@@ -862,15 +895,18 @@ def show_database_discovery(db_manager, host, port, username, password, driver,
             # Show database information
             with st.sidebar.expander("📊 Database Details"):
                 try:
-                    db_info = db_manager.execute_query(f"SELECT name, create_date, compatibility_level, recovery_model_desc FROM sys.databases WHERE name = '{selected_db}'")
-                    if db_info:
-                        info = db_info[0]
+                    info = discovery.database_details(server_connection_string, selected_db)
+                    if info:
                         st.write(f"**Name:** {info['name']}")
                         st.write(f"**Created:** {info['create_date']}")
                         st.write(f"**Compatibility:** {info['compatibility_level']}")
                         st.write(f"**Recovery Model:** {info['recovery_model_desc']}")
                 except Exception as e:
                     st.warning(f"Could not retrieve database details: {str(e)}")
+            
+            if st.sidebar.button("🔄 Refresh Database List"):
+                discovery.list_databases(server_connection_string, refresh=True)
+                st.rerun()
         else:
             st.sidebar.warning("No user databases found on this server.")
             
@@ -881,48 +917,23 @@ def show_database_discovery(db_manager, host, port, username, password, driver,
 def test_sqlserver_connection(host, port, database, username, password, driver, auth_method, timeout, encrypt):
     """Test SQL Server connection without establishing a full connection."""
     try:
-        # Create a temporary connection string for testing
-        if auth_method == "Windows Authentication":
-            connection_string = f"mssql+pyodbc://@{host}:{port}/{database}?driver={driver}"
-        elif password:
-            connection_string = f"mssql+pyodbc://{username}:{quote_plus(password)}@{host}:{port}/{database}?driver={driver}"
-        else:
-            connection_string = f"mssql+pyodbc://{username}@{host}:{port}/{database}?driver={driver}"
-        
-        # Add connection parameters
-        params = []
-        if timeout:
-            params.append(f"timeout={timeout}")
-        if encrypt is not None:
-            params.append(f"encrypt={'yes' if encrypt else 'no'}")
-        
-        if params:
-            connection_string += "&" + "&".join(params)
-        
-        # Test the connection
-        from sqlalchemy import create_engine, text
-        test_engine = create_engine(connection_string, echo=False)
-        
-        with test_engine.connect() as conn:
-            # Test basic connectivity
-            result = conn.execute(text("SELECT @@VERSION as version"))
-            version = result.fetchone()
-            
-            # Test server info
-            result = conn.execute(text("SELECT @@SERVERNAME as server_name, DB_NAME() as current_db"))
-            server_info = result.fetchone()
-            
-            st.sidebar.success("✅ Connection test successful!")
-            
-            # Show connection details
-            with st.sidebar.expander("📊 Connection Test Results"):
-                st.write(f"**Server Version:** {version[0] if version else 'Unknown'}")
-                st.write(f"**Server Name:** {server_info[0] if server_info else 'Unknown'}")
-                st.write(f"**Current Database:** {server_info[1] if server_info else 'Unknown'}")
-                st.write(f"**Connection String:** {connection_string}")
-            
-            # Clean up test engine
-            test_engine.dispose()
+        from sqlalchemy.engine import make_url
+        
+        connection_string = get_session_db_manager().get_connection_string("sqlserver", **sqlserver_connection_params(
+            host, port, database, username, password, driver, auth_method, timeout, encrypt
+        ))
+        
+        # Test through the server's probe engine, reused across clicks
+        server_info = get_server_discovery().test_connection(connection_string)
+        
+        st.sidebar.success("✅ Connection test successful!")
+        
+        # Show connection details
+        with st.sidebar.expander("📊 Connection Test Results"):
+            st.write(f"**Server Version:** {server_info.get('version', 'Unknown')}")
+            st.write(f"**Server Name:** {server_info.get('server_name', 'Unknown')}")
+            st.write(f"**Current Database:** {server_info.get('current_db', 'Unknown')}")
+            st.write(f"**Connection String:** {make_url(connection_string).render_as_string(hide_password=True)}")
             
     except Exception as e:
         st.sidebar.error(f"❌ Connection test failed: {str(e)}")
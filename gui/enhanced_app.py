@@ -12,20 +12,29 @@ import json
 from io import BytesIO
 import base64
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, wait
 import warnings
 warnings.filterwarnings('ignore')
 
 # Add the project root to Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.services.sql_generator import get_generator
-from app.services.schema_reader import SchemaReader
 from app.services.voice_service import get_voice_service
-from app.services.database_manager import get_db_manager
+from app.services.result_set import ColumnarResult
+from app.services.query_control import QueryTimeoutError
+from app.services.cost_gate import QueryCostError
+from app.services.spill import ResultTooLargeError
+from config.database_config import QUERY_TIMEOUT_SETTINGS
+from gui.session import get_session_db_manager, get_session_generator, get_session_schema_reader
 
-# Initialize services
-sql_generator = get_generator()
-schema_reader = SchemaReader()
+def close_abandoned_result(future):
+    """Delete the spill files of a background result the script stopped waiting for."""
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+# Initialize services; database access is per browser session
+sql_generator = get_session_generator()
+schema_reader = get_session_schema_reader()
 voice_service = get_voice_service()
 
 # Page config
@@ -76,7 +85,7 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Database Connection Status
-db_manager = get_db_manager()
+db_manager = get_session_db_manager()
 if db_manager.is_connected():
     conn_info = db_manager.get_connection_info()
     st.success(f"✅ Connected to {conn_info['type'].upper()} database")
@@ -96,6 +105,10 @@ if 'last_results' not in st.session_state:
     st.session_state.last_results = None
 if 'analysis_data' not in st.session_state:
     st.session_state.analysis_data = None
+if 'active_query' not in st.session_state:
+    st.session_state.active_query = None
+if 'result_buffer' not in st.session_state:
+    st.session_state.result_buffer = None
 
 # Create input area
 input_container = st.container()
@@ -150,10 +163,9 @@ with st.sidebar:
     # Database Schema Section
     with st.sidebar:
         st.header("📊 Database Schema")
-        db_manager = get_db_manager()
+        db_manager = get_session_db_manager()
         if db_manager.is_connected():
             try:
-                schema_reader = SchemaReader()
                 db_tables = schema_reader.get_all_databases_and_tables()
                 for db_name, tables in db_tables.items():
                     with st.expander(f"📋 {db_name}"):
@@ -185,6 +197,20 @@ with st.sidebar:
         "Export format:",
         ["CSV", "Excel", "JSON", "HTML"]
     )
+    
+    query_timeout = st.number_input(
+        "Query timeout (seconds):",
+        min_value=1,
+        max_value=3600,
+        value=int(QUERY_TIMEOUT_SETTINGS["default_timeout"]) or 60,
+        help="Queries running longer than this are aborted and their connection released"
+    )
+    
+    show_preview = st.checkbox(
+        "Show a quick preview while the full query runs",
+        value=True,
+        help="Runs the query on a sample of each table first; the full result replaces it when ready"
+    )
 
 # Process query
 if query and query != st.session_state.last_query:
@@ -192,27 +218,98 @@ if query and query != st.session_state.last_query:
     if not db_manager.is_connected():
         st.error("❌ No database connected. Please connect to a database first.")
     else:
+        # Abort anything this session still has in flight before starting a new query
+        if st.session_state.active_query is not None:
+            st.session_state.active_query.cancel()
+        cancel_handle = db_manager.new_cancel_handle(timeout=query_timeout)
+        st.session_state.active_query = cancel_handle
+        
         try:
             with st.spinner("🚀 Generating SQL and executing query..."):
-                # Generate and execute SQL
-                sql, results = sql_generator.generate_and_execute(query)
+                progress = st.empty()
+                if show_preview:
+                    sql, statement, params = sql_generator.prepare_statement(query)
+                    preview_area = st.empty()
+                    loaded = [0]
+                    
+                    # Run the full query in the background and show a sampled preview meanwhile
+                    executor = ThreadPoolExecutor(max_workers=1)
+                    full = executor.submit(
+                        db_manager.execute_query_columnar, statement, params,
+                        cancel_handle=cancel_handle,
+                        on_batch=lambda rows: loaded.__setitem__(0, rows)
+                    )
+                    try:
+                        preview = db_manager.execute_preview(statement, params=params)
+                        if preview is not None and preview.rows and not full.done():
+                            with preview_area.container():
+                                st.caption("⚡ Preview computed on a sample of the data; "
+                                           "the full result replaces it when ready")
+                                st.dataframe(pd.DataFrame(preview.rows), use_container_width=True)
+                        while not wait([full], timeout=0.25).done:
+                            progress.caption(f"📥 Loaded {loaded[0]:,} rows...")
+                        result = full.result()
+                    finally:
+                        if not full.done():
+                            # A rerun or stop is unwinding the script: abort the full
+                            # query instead of waiting for it, and drop its result
+                            cancel_handle.cancel()
+                            full.add_done_callback(close_abandoned_result)
+                        executor.shutdown(wait=False, cancel_futures=True)
+                    preview_area.empty()
+                else:
+                    # Generate SQL and stream the results batch by batch
+                    sql, stream = sql_generator.generate_and_stream(query, cancel_handle=cancel_handle)
+                    result = ColumnarResult.from_stream(
+                        stream,
+                        on_batch=lambda rows: progress.caption(f"📥 Loaded {rows:,} rows..."),
+                        **db_manager.spill_budget()
+                    )
+                progress.empty()
+                if result.spilled:
+                    st.caption("💾 Large result: columns past the memory budget are kept on disk")
+                
+                # Release the spill files of the previous result in this session
+                if st.session_state.result_buffer is not None:
+                    st.session_state.result_buffer.close()
+                st.session_state.result_buffer = result
                 
                 # Store results in session state
                 st.session_state.last_query = query
                 st.session_state.last_sql = sql
-                st.session_state.last_results = results
+                st.session_state.last_results = result.row_count
                 st.session_state.voice_query = None
                 
                 # Prepare data for analysis
-                if results:
-                    df = pd.DataFrame(results)
+                if result.row_count:
+                    df = result.to_pandas()
                     st.session_state.analysis_data = df
                     
+        except QueryTimeoutError:
+            st.error(f"⏱️ Query exceeded the {query_timeout}s timeout and was aborted. Try a narrower question.")
+            st.session_state.last_query = None
+            st.session_state.last_sql = None
+            st.session_state.last_results = None
+        except QueryCostError as e:
+            st.error(f"💸 {str(e)}. Try adding a filter or a narrower time range.")
+            st.session_state.last_query = None
+            st.session_state.last_sql = None
+            st.session_state.last_results = None
+        except ResultTooLargeError as e:
+            st.error(f"📦 {str(e)}")
+            st.session_state.last_query = None
+            st.session_state.last_sql = None
+            st.session_state.last_results = None
         except Exception as e:
             st.error(f"❌ Error: {str(e)}")
             st.session_state.last_query = None
             st.session_state.last_sql = None
             st.session_state.last_results = None
+        finally:
+            # A rerun or stop unwinds through here while the query may still be
+            # running; cancelling one that already finished is a no-op. The handle
+            # stays in the session so the next run cancels it again if needed.
+            cancel_handle.cancel()
 
 # Display results
 if st.session_state.last_sql and st.session_state.last_results and db_manager.is_connected():
@@ -236,7 +333,7 @@ if st.session_state.last_sql and st.session_state.last_results and db_manager.is
             total_rows = len(df)
             total_cols = len(df.columns)
             numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
-            categorical_cols = df.select_dtypes(include=['object']).columns.tolist()
+            categorical_cols = df.select_dtypes(include=['object', 'category']).columns.tolist()
             
             col1, col2, col3, col4 = st.columns(4)
             with col1:
@@ -0,0 +1,32 @@
+import streamlit as st
+from app.services.database_manager import DatabaseManager
+from app.services.schema_reader import SchemaReader
+from app.services.sql_generator import SQLGenerator
+
+
+def get_session_db_manager() -> DatabaseManager:
+    """
+    Database manager of the current browser session.
+
+    Each session connects and disconnects independently; engines, cached
+    results and in-flight queries for the same database are still shared
+    through the process-wide engine registry and query caches, and the
+    session's engines are released when its state is dropped.
+    """
+    if "db_manager" not in st.session_state:
+        st.session_state.db_manager = DatabaseManager()
+    return st.session_state.db_manager
+
+
+def get_session_generator() -> SQLGenerator:
+    """SQL generator bound to the current session's database manager."""
+    if "sql_generator" not in st.session_state:
+        st.session_state.sql_generator = SQLGenerator(get_session_db_manager())
+    return st.session_state.sql_generator
+
+
+def get_session_schema_reader() -> SchemaReader:
+    """Schema reader bound to the current session's database manager."""
+    if "schema_reader" not in st.session_state:
+        st.session_state.schema_reader = SchemaReader(get_session_db_manager())
+    return st.session_state.schema_reader
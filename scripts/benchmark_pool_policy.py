@@ -0,0 +1,99 @@
+"""
+Compare connection pool policies under concurrent query load.
+
+Each policy runs the same workload: --threads worker threads each executing
+--queries short read queries, checking a connection out for every query.
+Reports throughput, checkout-plus-query latency and how many connections the
+pool had to open.
+
+Usage:
+    python scripts/benchmark_pool_policy.py [--url sqlite:///data/sample.db]
+        [--threads 16] [--queries 500] [--query "SELECT 1"]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event, text
+
+from app.services.pool_policy import is_memory_sqlite, pool_options
+from config.database_config import DEFAULT_CONNECTION_SETTINGS
+
+
+def policies(url: str):
+    """Settings variants to compare, as (label, settings) pairs."""
+    base = dict(DEFAULT_CONNECTION_SETTINGS, pool_class="")
+    variants = [
+        ("dialect default", base),
+        ("queue fifo", dict(base, pool_class="queue", pool_use_lifo=False, pool_pre_ping=False)),
+        ("queue lifo", dict(base, pool_class="queue", pool_use_lifo=True, pool_pre_ping=False)),
+        ("queue lifo+ping", dict(base, pool_class="queue", pool_use_lifo=True, pool_pre_ping=True)),
+        ("null", dict(base, pool_class="null")),
+    ]
+    if is_memory_sqlite(url):
+        # Every new connection would be a separate, empty database
+        variants = [(label, settings) for label, settings in variants if label in ("dialect default",)]
+    return variants
+
+
+def run(url: str, settings, threads: int, queries: int, query: str):
+    kwargs = pool_options(url, settings)
+    if url.startswith("sqlite"):
+        kwargs["connect_args"]["check_same_thread"] = False
+    engine = create_engine(url, **kwargs)
+    opened = [0]
+
+    @event.listens_for(engine, "connect")
+    def count_connect(dbapi_connection, connection_record):
+        opened[0] += 1
+
+    latencies = [[] for _ in range(threads)]
+    start_barrier = threading.Barrier(threads + 1)
+
+    def worker(samples):
+        start_barrier.wait()
+        for _ in range(queries):
+            started = time.perf_counter()
+            with engine.connect() as connection:
+                connection.execute(text(query)).fetchall()
+            samples.append(time.perf_counter() - started)
+
+    workers = [threading.Thread(target=worker, args=(samples,)) for samples in latencies]
+    for thread in workers:
+        thread.start()
+    start_barrier.wait()
+    started = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    pool_class = type(engine.pool).__name__
+    engine.dispose()
+
+    samples = sorted(sample for thread_samples in latencies for sample in thread_samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    return pool_class, len(samples) / elapsed, statistics.median(samples), p95, opened[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="sqlite:///data/sample.db")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--query", default="SELECT 1")
+    args = parser.parse_args()
+
+    print(f"{args.threads} threads x {args.queries} queries against {args.url}")
+    print(f"{'policy':<16} {'pool':<18} {'queries/s':>10} {'p50 ms':>8} {'p95 ms':>8} {'opened':>7}")
+    for label, settings in policies(args.url):
+        pool_class, throughput, p50, p95, opened = run(args.url, settings, args.threads, args.queries, args.query)
+        print(f"{label:<16} {pool_class:<18} {throughput:>10.0f} {p50 * 1000:>8.2f} {p95 * 1000:>8.2f} {opened:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Measure the first burst of concurrent queries on a cold and a pre-warmed pool.
+
+Connecting to SQL Server or Oracle over a WAN costs a TCP, TLS and
+authentication handshake per connection. This simulates one with a
+``--handshake`` delay in the connection factory of an SQLite engine, then
+runs ``--burst`` queries at once right after "connecting" (one tested
+connection, as ``DatabaseManager.connect`` leaves it) with and without
+``prewarm``.
+
+Usage:
+    python scripts/benchmark_prewarm.py [--handshake 0.15] [--burst 8] [--min-idle 5]
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text
+
+from app.services.pool_policy import pool_options
+from app.services.pool_warmer import prewarm
+
+
+def make_engine(path: str, handshake: float):
+    def slow_connect():
+        time.sleep(handshake)
+        return sqlite3.connect(path, check_same_thread=False)
+
+    kwargs = pool_options(f"sqlite:///{path}")
+    kwargs.pop("connect_args")
+    engine = create_engine("sqlite://", creator=slow_connect, **kwargs)
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+    return engine
+
+
+def burst(engine, size: int) -> float:
+    barrier = threading.Barrier(size + 1)
+
+    def query():
+        barrier.wait()
+        with engine.connect() as connection:
+            connection.execute(text("SELECT COUNT(*) FROM t")).fetchall()
+
+    threads = [threading.Thread(target=query) for _ in range(size)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--handshake", type=float, default=0.15, help="Simulated seconds per new connection")
+    parser.add_argument("--burst", type=int, default=8, help="Concurrent queries right after connecting")
+    parser.add_argument("--min-idle", type=int, default=5)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="prewarm-bench-")
+    path = os.path.join(directory, "bench.db")
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE t (x INTEGER)")
+    connection.executemany("INSERT INTO t VALUES (?)", ((i,) for i in range(10_000)))
+    connection.commit()
+    connection.close()
+
+    print(f"{args.handshake * 1000:.0f} ms handshake, burst of {args.burst} queries")
+    cold = make_engine(path, args.handshake)
+    print(f"cold pool:        burst {burst(cold, args.burst) * 1000:8.1f} ms")
+    cold.dispose()
+
+    warm = make_engine(path, args.handshake)
+    started = time.perf_counter()
+    added = prewarm([warm], args.min_idle)[0]
+    warm_time = time.perf_counter() - started
+    print(f"pre-warmed pool:  burst {burst(warm, args.burst) * 1000:8.1f} ms "
+          f"(+{added} connections opened in {warm_time * 1000:.1f} ms at connect)")
+    warm.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Compare the memory footprint of list-of-dicts results with ColumnarResult.
+
+Usage:
+    python scripts/benchmark_result_memory.py [--rows 1000000]
+"""
+
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from datetime import date, timedelta
+from decimal import Decimal
+
+# Imported up front so the import itself is not counted against to_pandas()
+import pandas  # noqa: F401
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.result_set import ColumnarResult
+
+CITIES = ["New York", "Los Angeles", "Chicago", "Boston", "Miami", "Seattle", "Denver", "Austin"]
+PRODUCTS = ["Laptop", "Smartphone", "Tablet", "Monitor", "Keyboard"]
+COLUMNS = ["id", "product", "city", "amount", "date", "returned"]
+
+
+def generate_batches(rows: int, batch_size: int = 10000):
+    """Yield synthetic sales rows as tuples, the way a DB cursor returns them (amount as NUMERIC)."""
+    start = date(2023, 1, 1)
+    for offset in range(0, rows, batch_size):
+        yield [
+            (
+                i,
+                PRODUCTS[i % len(PRODUCTS)],
+                CITIES[i % len(CITIES)],
+                Decimal(i % 2000) + Decimal("0.99"),
+                start + timedelta(days=i % 365),
+                i % 17 == 0,
+            )
+            for i in range(offset, min(offset + batch_size, rows))
+        ]
+
+
+def measure(label: str, build):
+    # Timed without tracemalloc, which slows allocation-heavy code unevenly
+    gc.collect()
+    started = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - started
+    del result
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<16} retained={current / 2**20:9.1f} MiB  peak={peak / 2**20:9.1f} MiB  time={elapsed:6.2f}s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    print(f"Result with {args.rows:,} rows x {len(COLUMNS)} columns")
+
+    dicts = measure(
+        "list of dicts",
+        lambda: [dict(zip(COLUMNS, row)) for batch in generate_batches(args.rows) for row in batch]
+    )
+    del dicts
+
+    columnar = measure(
+        "columnar",
+        lambda: ColumnarResult.from_batches(COLUMNS, generate_batches(args.rows))
+    )
+    print(f"{'':<16} column buffers={columnar.nbytes / 2**20:.1f} MiB")
+
+    measure("to_pandas", columnar.to_pandas)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Compare SQLite connection defaults with the tuning profile under concurrent readers.
+
+Builds a synthetic sales table, copies it once per configuration (the journal
+mode is stored in the file) and runs --threads readers, each executing an
+analytical GROUP BY query and a range scan --queries times. With --writer a
+background thread keeps inserting rows into the writable configurations,
+which shows readers blocking on the rollback journal without WAL.
+
+Usage:
+    python scripts/benchmark_sqlite_profile.py [--rows 500000] [--threads 8]
+        [--queries 50] [--writer]
+"""
+
+import argparse
+import os
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text
+
+from app.services.pool_policy import pool_options
+from app.services.sqlite_profile import install_sqlite_profile, sqlite_url
+from config.database_config import SQLITE_SETTINGS
+
+CITIES = ["New York", "Los Angeles", "Chicago", "Boston", "Miami", "Seattle", "Denver", "Austin"]
+PRODUCTS = ["Laptop", "Smartphone", "Tablet", "Monitor", "Keyboard"]
+QUERIES = [
+    "SELECT city, product, COUNT(*), SUM(amount) FROM sales GROUP BY city, product ORDER BY 4 DESC",
+    "SELECT AVG(amount) FROM sales WHERE id BETWEEN 1000 AND 51000",
+]
+
+
+def build_database(path: str, rows: int):
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE sales (id INTEGER PRIMARY KEY, product TEXT, city TEXT, amount REAL)")
+    connection.executemany(
+        "INSERT INTO sales VALUES (?, ?, ?, ?)",
+        ((i, PRODUCTS[i % len(PRODUCTS)], CITIES[i % len(CITIES)], float(i % 2000) + 0.99) for i in range(rows))
+    )
+    connection.commit()
+    connection.close()
+
+
+def configurations(directory: str, source: str):
+    """(label, connection string, profile settings or None, writable) per configuration."""
+    configs = [
+        ("defaults", False, False, None),
+        ("profile", False, False, SQLITE_SETTINGS),
+        ("profile ro", True, False, SQLITE_SETTINGS),
+        ("profile immutable", True, True, SQLITE_SETTINGS),
+    ]
+    for label, read_only, immutable, settings in configs:
+        path = os.path.join(directory, label.replace(" ", "_") + ".db")
+        shutil.copyfile(source, path)
+        # The writer thread needs its own writable connection, so keep query_only off here
+        if settings is not None and not read_only:
+            settings = dict(settings, query_only=False)
+        yield label, sqlite_url(path, read_only=read_only, immutable=immutable), path, settings, not read_only
+
+
+def writer_loop(path: str, stop: threading.Event):
+    connection = sqlite3.connect(path, timeout=30)
+    next_id = 10 ** 9
+    while not stop.is_set():
+        connection.execute("INSERT INTO sales VALUES (?, 'Laptop', 'Boston', 1.0)", (next_id,))
+        connection.commit()
+        next_id += 1
+        time.sleep(0.005)
+    connection.close()
+
+
+def run(url: str, path: str, settings, threads: int, queries: int, writer: bool):
+    kwargs = pool_options(url)
+    kwargs["connect_args"].update(check_same_thread=False, timeout=30)
+    engine = create_engine(url, **kwargs)
+    if settings is not None:
+        install_sqlite_profile(engine, settings)
+
+    latencies = [[] for _ in range(threads)]
+    barrier = threading.Barrier(threads + 1)
+
+    def reader(samples):
+        barrier.wait()
+        for i in range(queries):
+            started = time.perf_counter()
+            with engine.connect() as connection:
+                connection.execute(text(QUERIES[i % len(QUERIES)])).fetchall()
+            samples.append(time.perf_counter() - started)
+
+    stop = threading.Event()
+    background = threading.Thread(target=writer_loop, args=(path, stop)) if writer else None
+    workers = [threading.Thread(target=reader, args=(samples,)) for samples in latencies]
+    for thread in workers:
+        thread.start()
+    if background is not None:
+        background.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    if background is not None:
+        background.join()
+    engine.dispose()
+
+    samples = sorted(sample for thread_samples in latencies for sample in thread_samples)
+    return len(samples) / elapsed, statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--writer", action="store_true", help="Insert rows concurrently into writable configurations")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="sqlite-profile-bench-")
+    try:
+        source = os.path.join(directory, "source.db")
+        build_database(source, args.rows)
+        print(f"{args.rows:,} rows, {args.threads} readers x {args.queries} queries"
+              f"{', concurrent writer' if args.writer else ''}")
+        print(f"{'configuration':<18} {'queries/s':>10} {'p50 ms':>9} {'p95 ms':>9}")
+        for label, url, path, settings, writable in configurations(directory, source):
+            throughput, p50, p95 = run(url, path, settings, args.threads, args.queries, args.writer and writable)
+            print(f"{label:<18} {throughput:>10.1f} {p50 * 1000:>9.2f} {p95 * 1000:>9.2f}")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from app.services.database_manager import DatabaseManager, QueryCaches
+from app.services.engine_registry import EngineRegistry
+
+
+@pytest.fixture
+def manager(tmp_path):
+    path = str(tmp_path / "shop.db")
+    with sqlite3.connect(path) as connection:
+        connection.execute("CREATE TABLE sales (id INTEGER PRIMARY KEY, city TEXT)")
+        connection.executemany("INSERT INTO sales VALUES (?, ?)", [(i, f"city{i % 3}") for i in range(1, 31)])
+    manager = DatabaseManager(engines=EngineRegistry(max_idle=0, idle_ttl=0), caches=QueryCaches())
+    assert manager.connect("sqlite", db_path=path)
+    yield manager
+    manager.disconnect()
+
+
+def test_file_databases_run_on_the_asyncio_engine(manager):
+    query = "SELECT city, COUNT(*) AS n FROM sales WHERE id > :id GROUP BY city ORDER BY city"
+
+    rows = asyncio.run(manager.execute_query_async(query, {"id": 3}))
+
+    assert manager._get_async_engine() is not None
+    assert manager._get_async_engine().url.drivername == "sqlite+aiosqlite"
+    assert rows == manager.execute_query(query, {"id": 3})
+
+
+def test_async_path_rejects_writes(manager):
+    with pytest.raises(ValueError):
+        asyncio.run(manager.execute_query_async("DELETE FROM sales"))
+
+    assert manager.execute_query("SELECT COUNT(*) AS n FROM sales") == [{"n": 30}]
+
+
+def test_in_memory_databases_fall_back_to_worker_threads():
+    manager = DatabaseManager(engines=EngineRegistry(max_idle=0, idle_ttl=0), caches=QueryCaches())
+    assert manager.connect("sqlite", db_path=":memory:")
+    try:
+        assert manager._get_async_engine() is None
+        assert asyncio.run(manager.execute_query_async("SELECT 1 AS one")) == [{"one": 1}]
+    finally:
+        manager.disconnect()
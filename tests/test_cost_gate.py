@@ -0,0 +1,95 @@
+import sqlite3
+
+import pytest
+
+from app.services.cost_gate import (
+    CostPolicy, QueryCostError, QueryPlan, add_table_sample, limit_table_reads, parse_plan, table_aliases
+)
+from app.services.database_manager import DatabaseManager, QueryCaches
+from app.services.engine_registry import EngineRegistry
+
+
+@pytest.fixture
+def manager(tmp_path):
+    path = str(tmp_path / "shop.db")
+    with sqlite3.connect(path) as connection:
+        connection.execute("CREATE TABLE sales (id INTEGER PRIMARY KEY, city TEXT, amount INTEGER)")
+        connection.executemany("INSERT INTO sales VALUES (?, ?, ?)", [(i, f"city{i % 5}", i) for i in range(1, 101)])
+        connection.execute("CREATE INDEX sales_city ON sales (city)")
+    manager = DatabaseManager(engines=EngineRegistry(max_idle=0, idle_ttl=0), caches=QueryCaches())
+    assert manager.connect("sqlite", db_path=path)
+    yield manager
+    manager.disconnect()
+
+
+def test_plans_are_reused_only_for_the_same_parameter_values(manager, monkeypatch):
+    explained = []
+    explain = manager._explain
+    monkeypatch.setattr(manager, "_explain",
+                        lambda query, params: explained.append(params) or explain(query, params))
+    query = "SELECT * FROM sales WHERE city = :p1"
+
+    manager.check_query_cost(query, {"p1": "city1"})
+    manager.check_query_cost(query, {"p1": "city1"})
+    manager.check_query_cost(query, {"p1": "city2"})
+
+    assert explained == [{"p1": "city1"}, {"p1": "city2"}]
+
+
+JOIN_SQL = ("SELECT s.city, SUM(s.amount) FROM public.sales AS s JOIN regions r ON r.id = s.region_id "
+            "WHERE s.amount > 3 GROUP BY s.city")
+
+
+def test_aliases_map_to_their_tables():
+    assert table_aliases(JOIN_SQL) == {"sales": "sales", "s": "sales", "regions": "regions", "r": "regions"}
+
+
+def test_table_sample_follows_the_aliased_reference():
+    assert add_table_sample(JOIN_SQL, ["sales"], 2.5) == (
+        "SELECT s.city, SUM(s.amount) FROM public.sales AS s TABLESAMPLE SYSTEM (2.5) "
+        "JOIN regions r ON r.id = s.region_id WHERE s.amount > 3 GROUP BY s.city"
+    )
+    assert add_table_sample(JOIN_SQL, ["orders"], 2.5) is None
+
+
+@pytest.mark.parametrize("dialect, capped", [
+    ("sqlite", "(SELECT * FROM public.sales LIMIT 1000) s"),
+    ("mssql", "(SELECT TOP 1000 * FROM public.sales) s"),
+])
+def test_limited_reads_keep_the_alias(dialect, capped):
+    assert limit_table_reads(JOIN_SQL, ["sales"], dialect, 1000) == (
+        f"SELECT s.city, SUM(s.amount) FROM {capped} JOIN regions r ON r.id = s.region_id "
+        "WHERE s.amount > 3 GROUP BY s.city"
+    )
+
+
+def test_unaliased_table_is_limited_under_its_own_name():
+    assert limit_table_reads("SELECT * FROM sales WHERE id > 1", ["sales"], "sqlite", 10) == \
+        "SELECT * FROM (SELECT * FROM sales LIMIT 10) sales WHERE id > 1"
+
+
+def test_sqlite_scans_are_reported_by_table_name():
+    plan = parse_plan(JOIN_SQL, "sqlite", [(2, 0, 0, "SCAN s"), (3, 0, 0, "SEARCH r USING INTEGER PRIMARY KEY (rowid=?)")])
+
+    assert plan.full_scans == {"sales": None}
+
+
+def test_policy_caps_or_rejects_plans_over_budget():
+    plan = QueryPlan(estimated_rows=5000, full_scans={"sales": 1e6})
+
+    assert CostPolicy(max_estimated_rows=1000).evaluate("SELECT * FROM sales", plan, "sqlite").rejected
+    limited = CostPolicy(max_scan_rows=1000, action="limit", limit_rows=50).evaluate("SELECT * FROM sales", plan,
+                                                                                     "sqlite")
+    assert (limited.action, limited.sql) == ("limit", "SELECT * FROM sales LIMIT 50")
+    sampled = CostPolicy(max_scan_rows=1000, action="sample").evaluate("SELECT * FROM sales", plan, "postgresql")
+    assert (sampled.action, sampled.sql) == ("sample", "SELECT * FROM sales TABLESAMPLE SYSTEM (1)")
+    assert CostPolicy(max_scan_rows=1e7).evaluate("SELECT * FROM sales", plan, "sqlite").action is None
+
+
+def test_full_scans_of_large_tables_are_rejected(manager):
+    manager.cost_policy = CostPolicy(max_scan_rows=50)
+
+    with pytest.raises(QueryCostError):
+        manager.apply_cost_gate("SELECT * FROM sales WHERE amount > 3")
+    assert manager.apply_cost_gate("SELECT * FROM sales WHERE city = :city", {"city": "city1"}) == \
+        "SELECT * FROM sales WHERE city = :city"
@@ -0,0 +1,73 @@
+import sqlite3
+
+from sqlalchemy import create_engine, text
+
+from app.services.database_manager import DatabaseManager, QueryCaches
+from app.services.engine_registry import EngineRegistry
+
+
+def test_equivalent_urls_share_a_key(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    key = EngineRegistry.make_key
+
+    assert key("postgresql", "postgresql://app:pw@DB.example.com:5432/shop?sslmode=require&application_name=x") == \
+        key("PostgreSQL", "postgresql://app:pw@db.example.com:5432/shop?application_name=x&sslmode=require")
+    assert key("sqlite", "sqlite:///shop.db") == key("sqlite", f"sqlite:///{tmp_path}/shop.db")
+    assert key("postgresql", "postgresql://app:pw@db/shop") != key("postgresql", "postgresql://app:other@db/shop")
+
+
+def test_released_engine_is_reused_until_evicted():
+    registry = EngineRegistry(max_idle=1)
+    created = []
+
+    def factory():
+        created.append(create_engine("sqlite://"))
+        return created[-1]
+
+    first = registry.acquire("a", factory)
+    registry.release(first)
+    assert registry.acquire("a", factory) is first
+    registry.release(first)
+
+    registry.release(registry.acquire("b", factory))
+
+    assert registry.stats()["created"] == 2 and registry.stats()["reused"] == 1
+    assert registry.stats()["evicted"] == 1
+    assert [entry["label"] for entry in registry.stats()["engines"]] == [""]
+    assert registry.acquire("a", factory) is not first
+
+
+def test_engine_in_use_or_with_checked_out_connections_is_kept(tmp_path):
+    registry = EngineRegistry(max_idle=0)
+    url = f"sqlite:///{tmp_path}/shop.db"
+    engine = registry.acquire("a", lambda: create_engine(url))
+    other = registry.acquire("a", lambda: create_engine(url))
+
+    registry.release(engine)
+    assert registry.in_use() == [engine] and other is engine
+
+    with engine.connect() as connection:
+        registry.release(other)
+        registry.sweep()
+        assert registry.stats()["engines"][0]["users"] == 0
+        connection.execute(text("SELECT 1"))
+    registry.sweep()
+
+    assert registry.stats()["engines"] == []
+
+
+def test_reconnecting_to_the_same_database_reuses_the_engine(tmp_path):
+    path = str(tmp_path / "shop.db")
+    sqlite3.connect(path).close()
+    registry = EngineRegistry()
+    manager = DatabaseManager(engines=registry, caches=QueryCaches())
+    try:
+        assert manager.connect("sqlite", db_path=path)
+        engine = manager.current_engine
+        assert manager.connect("sqlite", db_path=path)
+
+        assert manager.current_engine is engine
+        assert registry.stats()["created"] == 1
+    finally:
+        manager.disconnect()
+        registry.clear()
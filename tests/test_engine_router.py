@@ -0,0 +1,129 @@
+import os
+import shutil
+import sqlite3
+import time
+
+from sqlalchemy import create_engine
+
+from app.services.database_manager import DatabaseManager, QueryCaches
+from app.services.engine_registry import EngineRegistry
+from app.services.engine_router import SERVED_BY, EngineGroup, measure_lag
+
+
+def make_primary(path):
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("CREATE TABLE sales (id INTEGER PRIMARY KEY, amount INTEGER)")
+    connection.executemany("INSERT INTO sales VALUES (?, ?)", [(i, i) for i in range(1, 11)])
+    connection.commit()
+    connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    return connection
+
+
+def copies(tmp_path, names):
+    paths = [str(tmp_path / f"{name}.db") for name in names]
+    make_primary(paths[0]).close()
+    for path in paths[1:]:
+        shutil.copy(paths[0], path)
+    return [create_engine(f"sqlite:///{path}") for path in paths]
+
+
+def served_by(group):
+    with group.connect() as connection:
+        return connection.info[SERVED_BY]
+
+
+def test_reads_go_to_the_least_loaded_replica(tmp_path):
+    primary, first, second = copies(tmp_path, ["primary", "a", "b"])
+    group = EngineGroup(primary, {"a": first, "b": second})
+    try:
+        with group.connect() as outer:
+            with group.connect() as inner:
+                assert {outer.info[SERVED_BY], inner.info[SERVED_BY]} == {"a", "b"}
+        assert group.stats()["primary"]["served"] == 0
+    finally:
+        group.dispose()
+
+
+def test_failing_replica_is_ejected_and_the_primary_serves(tmp_path):
+    primary, = copies(tmp_path, ["primary"])
+    missing = create_engine(f"sqlite:///file:{tmp_path}/missing/replica.db?mode=ro&uri=true")
+    group = EngineGroup(primary, {"broken": missing}, max_lag_seconds=0, eject_seconds=60)
+    try:
+        assert served_by(group) == "primary"
+        stats = group.stats()["broken"]
+        assert stats["consecutive_failures"] == 1 and stats["ejected_for"] > 0
+        assert served_by(group) == "primary"
+        assert group.stats()["broken"]["served"] == 1
+    finally:
+        group.dispose()
+
+
+def test_replica_behind_the_lag_bound_is_skipped(tmp_path):
+    primary, replica = copies(tmp_path, ["primary", "replica"])
+    with sqlite3.connect(str(tmp_path / "primary.db")) as connection:
+        connection.execute("INSERT INTO sales VALUES (11, 11)")
+    stale = time.time() - 120
+    os.utime(str(tmp_path / "replica.db"), (stale, stale))
+    group = EngineGroup(primary, {"replica": replica}, max_lag_seconds=30)
+    try:
+        assert served_by(group) == "primary"
+        assert group.stats()["replica"]["lag_seconds"] >= 120
+    finally:
+        group.dispose()
+
+
+def test_identical_copies_do_not_lag(tmp_path):
+    primary_path, replica_path = str(tmp_path / "primary.db"), str(tmp_path / "replica.db")
+    make_primary(primary_path).close()
+    shutil.copy(primary_path, replica_path)
+    stale = time.time() - 600
+    os.utime(replica_path, (stale, stale))
+    primary, replica = create_engine(f"sqlite:///{primary_path}"), create_engine(f"sqlite:///{replica_path}")
+    try:
+        assert measure_lag(primary, replica) == 0.0
+    finally:
+        primary.dispose()
+        replica.dispose()
+
+
+def test_commits_still_in_the_primary_wal_count_as_lag(tmp_path):
+    primary_path, replica_path = str(tmp_path / "primary.db"), str(tmp_path / "replica.db")
+    writer = make_primary(primary_path)
+    shutil.copy(primary_path, replica_path)
+    copied_at = time.time() - 60
+    os.utime(replica_path, (copied_at, copied_at))
+    # The commit lands in the -wal file; the main file keeps an older mtime
+    writer.execute("INSERT INTO sales VALUES (11, 11)")
+    writer.commit()
+    os.utime(primary_path, (copied_at - 60, copied_at - 60))
+    primary, replica = create_engine(f"sqlite:///{primary_path}"), create_engine(f"sqlite:///{replica_path}")
+    try:
+        assert measure_lag(primary, replica) >= 60
+    finally:
+        primary.dispose()
+        replica.dispose()
+        writer.close()
+
+
+def test_results_served_by_a_replica_are_not_reused_for_the_primary(tmp_path):
+    primary_path, replica_path = str(tmp_path / "primary.db"), str(tmp_path / "replica.db")
+    make_primary(primary_path).close()
+    shutil.copy(primary_path, replica_path)
+    with sqlite3.connect(primary_path) as connection:
+        connection.execute("INSERT INTO sales VALUES (11, 11)")
+    query = "SELECT COUNT(*) AS n FROM sales"
+    manager = DatabaseManager(engines=EngineRegistry(max_idle=0, idle_ttl=0), caches=QueryCaches())
+    assert manager.connect("sqlite", db_path=primary_path, replicas=[{"db_path": replica_path}])
+    try:
+        group = manager.engine_group
+        group.max_lag_seconds = 0
+        assert manager.execute_query(query) == [{"n": 10}]
+        assert group.stats()["replica1"]["served"] == 1
+
+        group.replicas[0].ejected_until = time.monotonic() + 60
+        assert manager.execute_query(query) == [{"n": 11}]
+        assert manager.execute_query(query) == [{"n": 11}]
+        assert group.stats()["primary"]["served"] == 1
+    finally:
+        manager.disconnect()
@@ -0,0 +1,65 @@
+import sqlite3
+import threading
+
+from app.services.database_manager import DatabaseManager, QueryCaches
+from app.services.engine_registry import EngineRegistry
+
+
+def make_database(path, rows):
+    with sqlite3.connect(path) as connection:
+        connection.execute("CREATE TABLE sales (id INTEGER PRIMARY KEY)")
+        connection.executemany("INSERT INTO sales VALUES (?)", [(i,) for i in range(rows)])
+    return path
+
+
+def test_in_flight_query_finishes_on_the_connection_it_started_on(tmp_path, monkeypatch):
+    first = make_database(str(tmp_path / "first.db"), 3)
+    second = make_database(str(tmp_path / "second.db"), 5)
+    registry = EngineRegistry(max_idle=0, idle_ttl=0)
+    manager = DatabaseManager(engines=registry, caches=QueryCaches())
+    assert manager.connect("sqlite", db_path=first)
+    first_engine = manager.current_engine
+
+    started, resume = threading.Event(), threading.Event()
+    fetch_rows = manager._fetch_rows
+
+    def paused_fetch(*args, **kwargs):
+        started.set()
+        resume.wait()
+        return fetch_rows(*args, **kwargs)
+
+    monkeypatch.setattr(manager, "_fetch_rows", paused_fetch)
+    results = {}
+    query = threading.Thread(
+        target=lambda: results.setdefault("rows", manager.execute_query("SELECT COUNT(*) AS n FROM sales"))
+    )
+    query.start()
+    started.wait()
+    try:
+        assert manager.connect("sqlite", db_path=second)
+        assert manager.current_engine is not first_engine
+        # The replaced engine stays registered while the query still uses it
+        assert first_engine in registry.in_use()
+    finally:
+        resume.set()
+        query.join()
+
+    try:
+        assert results["rows"] == [{"n": 3}]
+        assert registry.in_use() == [manager.current_engine]
+        monkeypatch.undo()
+        assert manager.execute_query("SELECT COUNT(*) AS n FROM sales") == [{"n": 5}]
+    finally:
+        manager.disconnect()
+
+
+def test_disconnect_releases_every_engine(tmp_path):
+    path = make_database(str(tmp_path / "shop.db"), 1)
+    registry = EngineRegistry(max_idle=0, idle_ttl=0)
+    manager = DatabaseManager(engines=registry, caches=QueryCaches())
+    assert manager.connect("sqlite", db_path=path)
+
+    manager.disconnect()
+
+    assert not manager.is_connected()
+    assert registry.stats()["engines"] == []
@@ -0,0 +1,67 @@
+import sqlite3
+
+import pytest
+from sqlalchemy import create_engine, event, text
+
+from app.services.cost_gate import PlanCache, QueryPlan
+from app.services.database_manager import DatabaseManager, QueryCaches
+from app.services.engine_registry import EngineRegistry
+from app.services.fetch_tuning import FetchStats, estimate_roundtrips, expected_rows, install_fetch_tuning
+
+
+@pytest.mark.parametrize("dialect, server_side, expected", [
+    ("postgresql", False, 1),
+    ("mysql", False, 1),
+    ("postgresql", True, 3),
+    ("oracle", False, 3),
+])
+def test_roundtrips_follow_the_cursor_kind(dialect, server_side, expected):
+    assert estimate_roundtrips(dialect, 2500, server_side, 1000) == expected
+
+
+def test_stats_count_rows_per_roundtrip_except_for_sqlite():
+    stats = FetchStats()
+    stats.record("oracle", 2500, False, 1000)
+    stats.record("oracle", 500, True, 1000)
+    stats.record("sqlite", 100, False, 1000)
+
+    assert stats.stats() == {"oracle": {
+        "results": 2, "server_side": 1, "rows": 3000, "roundtrips": 4, "rows_per_roundtrip": 750.0
+    }}
+
+
+def test_limit_takes_precedence_over_the_planner_estimate():
+    assert expected_rows(50, QueryPlan(estimated_rows=1e6)) == 50
+    assert expected_rows(None, QueryPlan(estimated_rows=1e6)) == 1e6
+    assert expected_rows(None, None) is None
+
+
+def test_cursors_are_sized_before_they_execute(monkeypatch):
+    engine = create_engine("sqlite://")
+    # sqlite3 cursors have an arraysize; tuning is only skipped for the real SQLite dialect
+    monkeypatch.setattr(engine.dialect, "name", "mysql")
+    install_fetch_tuning(engine, 500, 100)
+    sizes = []
+    event.listen(engine, "after_cursor_execute", lambda conn, cursor, *args: sizes.append(cursor.arraysize))
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+    finally:
+        engine.dispose()
+
+    assert sizes == [500]
+
+
+def test_only_small_or_limited_results_use_buffered_cursors(tmp_path):
+    path = str(tmp_path / "shop.db")
+    sqlite3.connect(path).close()
+    manager = DatabaseManager(engines=EngineRegistry(max_idle=0, idle_ttl=0), caches=QueryCaches())
+    assert manager.connect("sqlite", db_path=path)
+    try:
+        assert not manager._use_server_side_cursor("SELECT * FROM sales LIMIT 50")
+        assert manager._use_server_side_cursor("SELECT * FROM sales")
+        manager.plan_cache.put(PlanCache.make_key("SELECT * FROM sales", manager._connection_id()),
+                               QueryPlan(estimated_rows=20))
+        assert not manager._use_server_side_cursor("SELECT * FROM sales")
+    finally:
+        manager.disconnect()
@@ -0,0 +1,71 @@
+import asyncio
+import shutil
+import sqlite3
+
+import pytest
+
+from app.services.database_manager import DatabaseManager, QueryCaches
+from app.services.engine_registry import EngineRegistry
+
+
+@pytest.fixture
+def database(tmp_path):
+    path = str(tmp_path / "shop.db")
+    with sqlite3.connect(path) as connection:
+        connection.execute("CREATE TABLE sales (id INTEGER PRIMARY KEY, city TEXT, amount INTEGER)")
+        connection.executemany("INSERT INTO sales VALUES (?, ?, ?)", [(i, f"city{i % 3}", i) for i in range(1, 31)])
+    return path
+
+
+@pytest.fixture
+def manager(database):
+    manager = DatabaseManager(engines=EngineRegistry(max_idle=0, idle_ttl=0), caches=QueryCaches())
+    assert manager.connect("sqlite", db_path=database)
+    yield manager
+    manager.disconnect()
+
+
+def test_batch_concurrency_is_the_pool_size_of_every_read_engine(manager, database):
+    assert manager.query_concurrency() == manager.current_engine.pool.size()
+
+    shutil.copy(database, database + ".replica")
+    assert manager.connect("sqlite", db_path=database, replicas=[{"db_path": database + ".replica"}])
+    assert manager.query_concurrency() == sum(target.engine.pool.size() for target in manager.engine_group.targets)
+
+
+def test_in_memory_databases_run_one_query_at_a_time():
+    manager = DatabaseManager(engines=EngineRegistry(max_idle=0, idle_ttl=0), caches=QueryCaches())
+    assert manager.connect("sqlite", db_path=":memory:")
+    try:
+        assert manager.query_concurrency() == 1
+    finally:
+        manager.disconnect()
+
+
+class ScriptedModel:
+    """Answers each question with the SQL it maps to."""
+
+    def __init__(self, answers):
+        self.answers = answers
+
+    def generate_sql(self, question, schema_info):
+        return self.answers[question]
+
+
+def test_batch_yields_every_outcome_and_isolates_errors(manager, monkeypatch):
+    sql_generator = pytest.importorskip("app.services.sql_generator")
+    monkeypatch.setattr(sql_generator, "get_model", lambda: ScriptedModel({
+        "total": "SELECT SUM(amount) AS total FROM sales",
+        "wipe": "DELETE FROM sales",
+        "cities": "SELECT city, COUNT(*) AS n FROM sales GROUP BY city ORDER BY city",
+    }))
+    generator = sql_generator.SQLGenerator(db_manager=manager)
+
+    async def collect():
+        return [outcome async for outcome in generator.generate_and_execute_many_async(["total", "wipe", "cities"])]
+
+    outcomes = {outcome.question: outcome for outcome in asyncio.run(collect())}
+
+    assert outcomes["total"].page.rows == [{"total": 465}]
+    assert isinstance(outcomes["wipe"].error, ValueError)
+    assert [row["n"] for row in outcomes["cities"].page.rows] == [10, 10, 10]
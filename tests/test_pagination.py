@@ -0,0 +1,146 @@
+import sqlite3
+from decimal import Decimal
+from uuid import UUID
+
+import pytest
+
+from app.services.database_manager import DatabaseManager
+from app.services.engine_registry import EngineRegistry
+from app.services.pagination import (
+    apply_row_cap, build_keyset_query, cursor_params, decode_cursor, make_cursor, parse_order_by, single_table
+)
+
+
+@pytest.fixture
+def manager(tmp_path):
+    path = str(tmp_path / "shop.db")
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE customers (id INTEGER PRIMARY KEY, city TEXT)")
+    connection.execute("CREATE TABLE orders (id INTEGER PRIMARY KEY, customer_id INTEGER, total REAL)")
+    connection.executemany(
+        "INSERT INTO customers VALUES (?, ?)",
+        [(i, None if i % 3 == 0 else f"city{i % 7}") for i in range(1, 501)]
+    )
+    connection.executemany(
+        "INSERT INTO orders VALUES (?, ?, ?)",
+        [(i, i % 500 + 1, i * 1.5) for i in range(1, 2001)]
+    )
+    connection.commit()
+    connection.close()
+
+    manager = DatabaseManager(engines=EngineRegistry(max_idle=0, idle_ttl=0))
+    assert manager.connect("sqlite", db_path=path)
+    yield manager
+    manager.disconnect()
+
+
+def read_all(manager, query, page_size=50):
+    page = manager.execute_page(query, page_size=page_size)
+    rows = list(page.rows)
+    while page.next_cursor:
+        page = manager.fetch_next_page(page.next_cursor)
+        rows.extend(page.rows)
+    return rows
+
+
+def test_join_ordered_by_a_primary_key_pages_every_row(manager):
+    rows = read_all(manager, "SELECT c.id, o.total FROM customers c JOIN orders o ON o.customer_id = c.id ORDER BY c.id")
+
+    assert len(rows) == 2000
+    assert sorted((row["id"], row["total"]) for row in rows) == sorted(
+        (i % 500 + 1, i * 1.5) for i in range(1, 2001)
+    )
+
+
+@pytest.mark.parametrize("direction", ["", " DESC"])
+def test_nullable_order_key_pages_every_row(manager, direction):
+    rows = read_all(manager, f"SELECT id, city FROM customers ORDER BY city{direction}, id")
+
+    assert len(rows) == 500
+    assert sorted(row["id"] for row in rows) == list(range(1, 501))
+
+
+def test_only_plain_single_table_selects_have_a_table():
+    assert single_table("SELECT * FROM dbo.customers AS c WHERE id > 3 ORDER BY id") == "customers"
+    assert single_table("SELECT * FROM customers c JOIN orders o ON o.customer_id = c.id") is None
+    assert single_table("SELECT * FROM customers, orders") is None
+    assert single_table("SELECT * FROM (SELECT * FROM customers) c") is None
+    assert single_table("SELECT id FROM customers UNION SELECT id FROM orders") is None
+    assert single_table("WITH c AS (SELECT * FROM customers) SELECT * FROM c") is None
+
+
+def test_explicit_null_ordering_is_not_keyset_paged():
+    assert parse_order_by("SELECT * FROM customers ORDER BY city NULLS FIRST, id") is None
+
+
+@pytest.mark.parametrize("dialect, expected", [
+    ("sqlite", "(_page.city IS NOT NULL) OR (_page.city IS NULL AND _page.id > :_k1)"),
+    ("postgresql", "(_page.city IS NULL AND (_page.id > :_k1 OR _page.id IS NULL))"),
+])
+def test_keyset_predicate_follows_the_dialect_null_ordering(dialect, expected):
+    sql = build_keyset_query("SELECT * FROM customers ORDER BY city, id", [("city", False), ("id", False)],
+                             dialect, 10, str, null_keys=[0])
+
+    assert f"WHERE {expected} ORDER BY" in sql
+
+
+def test_unordered_first_page_does_not_run_the_full_query(manager, monkeypatch):
+    full_runs = []
+    execute_query_columnar = manager.execute_query_columnar
+    monkeypatch.setattr(manager, "execute_query_columnar",
+                        lambda *args, **kwargs: full_runs.append(args) or execute_query_columnar(*args, **kwargs))
+
+    page = manager.execute_page("SELECT customer_id, total FROM orders", page_size=50)
+
+    assert len(page.rows) == 50 and page.has_more
+    assert full_runs == []
+
+    rows = list(page.rows)
+    while page.next_cursor:
+        page = manager.fetch_next_page(page.next_cursor)
+        rows.extend(page.rows)
+
+    assert len(full_runs) == 1
+    assert sorted(row["total"] for row in rows) == [i * 1.5 for i in range(1, 2001)]
+
+
+@pytest.mark.parametrize("sql, expected", [
+    ("SELECT id FROM customers UNION SELECT TOP 5 id FROM orders ORDER BY id DESC",
+     "SELECT TOP 100 * FROM (SELECT id FROM customers UNION SELECT TOP 5 id FROM orders) AS capped ORDER BY id DESC"),
+    ("WITH c AS (SELECT id FROM customers) SELECT id FROM c EXCEPT SELECT customer_id FROM orders",
+     "WITH c AS (SELECT id FROM customers) SELECT TOP 100 * FROM "
+     "(SELECT id FROM c EXCEPT SELECT customer_id FROM orders) AS capped"),
+    ("SELECT DISTINCT city FROM customers", "SELECT DISTINCT TOP 100 city FROM customers"),
+    ("SELECT TOP 500 id, city FROM customers", "SELECT TOP 100 id, city FROM customers"),
+    ("SELECT TOP (500) id FROM customers", "SELECT TOP (100) id FROM customers"),
+])
+def test_mssql_row_cap_covers_the_whole_statement(sql, expected):
+    assert apply_row_cap(sql, "mssql", 100) == expected
+
+
+def test_mysql_offset_limit_is_lowered():
+    assert apply_row_cap("SELECT id FROM customers LIMIT 10, 500", "mysql", 100) == \
+        "SELECT id FROM customers LIMIT 10, 100"
+
+
+def test_cursor_keeps_binary_uuid_and_decimal_keys():
+    key = (b"\x00\xff", UUID("12345678-1234-5678-1234-567812345678"), Decimal("10.25"))
+    cursor = make_cursor("SELECT * FROM t ORDER BY a, b, c", None, [("a", False), ("b", False), ("c", False)],
+                         dict(zip("abc", key)), 10, "conn")
+
+    assert tuple(cursor_params(decode_cursor(cursor)).values()) == key
+
+
+def test_binary_order_key_pages_every_row(tmp_path):
+    path = str(tmp_path / "files.db")
+    with sqlite3.connect(path) as connection:
+        connection.execute("CREATE TABLE files (digest BLOB PRIMARY KEY, size INTEGER)")
+        connection.executemany("INSERT INTO files VALUES (?, ?)", [(i.to_bytes(2, "big"), i) for i in range(120)])
+    manager = DatabaseManager(engines=EngineRegistry(max_idle=0, idle_ttl=0))
+    assert manager.connect("sqlite", db_path=path)
+    try:
+        rows = read_all(manager, "SELECT digest, size FROM files ORDER BY digest")
+    finally:
+        manager.disconnect()
+
+    assert [row["size"] for row in rows] == list(range(120))
@@ -0,0 +1,57 @@
+import pytest
+from sqlalchemy.pool import NullPool, QueuePool, StaticPool
+
+from app.services.pool_policy import is_memory_sqlite, pool_options
+
+SETTINGS = {
+    "pool_size": 4, "max_overflow": 2, "pool_timeout": 15, "pool_use_lifo": True,
+    "pool_pre_ping": True, "pool_recycle": 1800, "connect_timeout": 5, "pool_class": "",
+}
+
+
+@pytest.mark.parametrize("url, memory", [
+    ("sqlite://", True),
+    ("sqlite:///:memory:", True),
+    ("sqlite:///file::memory:?cache=shared", True),
+    ("sqlite:///file:shop?mode=memory&uri=true", True),
+    ("sqlite:///data/shop.db", False),
+    ("postgresql://db/shop", False),
+])
+def test_memory_sqlite_is_recognized(url, memory):
+    assert is_memory_sqlite(url) is memory
+
+
+def test_memory_sqlite_shares_one_connection():
+    assert pool_options("sqlite://", SETTINGS) == {"connect_args": {}, "poolclass": StaticPool}
+
+
+def test_file_sqlite_keeps_a_sized_pool_without_server_guards():
+    options = pool_options("sqlite:///data/shop.db", SETTINGS)
+
+    assert options["poolclass"] is QueuePool
+    assert (options["pool_size"], options["max_overflow"], options["pool_use_lifo"]) == (4, 2, True)
+    assert "pool_pre_ping" not in options and "pool_recycle" not in options
+
+
+@pytest.mark.parametrize("url, is_async, timeout_arg", [
+    ("postgresql://db/shop", False, "connect_timeout"),
+    ("postgresql://db/shop", True, "timeout"),
+    ("mysql://db/shop", False, "connect_timeout"),
+    ("mssql+pyodbc://db/shop", False, None),
+])
+def test_server_pools_pre_ping_recycle_and_time_out(url, is_async, timeout_arg):
+    options = pool_options(url, SETTINGS, is_async=is_async)
+
+    assert options["pool_pre_ping"] and options["pool_recycle"] == 1800
+    assert options["connect_args"] == ({timeout_arg: 5} if timeout_arg else {})
+    # asyncio engines pick their own queue pool class
+    assert ("poolclass" in options) is not is_async
+
+
+def test_forced_pool_class_applies_to_every_dialect():
+    settings = {**SETTINGS, "pool_class": "null"}
+
+    assert pool_options("postgresql://db/shop", settings)["poolclass"] is NullPool
+    assert pool_options("sqlite://", settings, is_async=True)["poolclass"] is NullPool
+    with pytest.raises(ValueError):
+        pool_options("postgresql://db/shop", {**SETTINGS, "pool_class": "bogus"})
@@ -0,0 +1,78 @@
+import gc
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.services.metrics import Histogram, MetricsRegistry
+from app.services.pool_telemetry import instrument_engine, pool_summary
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/shop.db", pool_size=2, max_overflow=0, pool_timeout=0.05)
+    yield engine
+    engine.dispose()
+
+
+def test_checkouts_statements_and_saturation_are_reported(engine):
+    registry = MetricsRegistry()
+    instrument_engine(engine, "shop", registry)
+
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+        during = pool_summary(registry)["shop"]
+    after = pool_summary(registry)["shop"]
+
+    assert (during["checked_out"], during["size"], during["saturation"]) == (1, 2, 0.5)
+    assert after["checked_out"] == 0 and after["checkouts"] == 1
+    assert after["checkout_p50_seconds"] is not None and after["statement_p95_seconds"] is not None
+
+
+def test_checkout_timeouts_are_counted(engine):
+    registry = MetricsRegistry()
+    instrument_engine(engine, "shop", registry)
+
+    with engine.connect(), engine.connect():
+        with pytest.raises(PoolTimeoutError):
+            engine.connect()
+
+    assert pool_summary(registry)["shop"]["checkout_timeouts"] == 1
+
+
+def test_pools_are_still_timed_after_dispose(engine):
+    registry = MetricsRegistry()
+    instrument_engine(engine, "shop", registry)
+    engine.dispose()
+
+    with engine.connect():
+        pass
+
+    assert pool_summary(registry)["shop"]["checkouts"] == 1
+    assert registry.snapshot()["db_pool_checkout_seconds"][0]["value"]["count"] == 1
+
+
+def test_gauges_of_collected_engines_disappear(tmp_path):
+    registry = MetricsRegistry()
+    engine = create_engine(f"sqlite:///{tmp_path}/shop.db")
+    instrument_engine(engine, "gone", registry)
+    engine.dispose()
+    del engine
+    gc.collect()
+
+    assert "db_pool_size" not in registry.snapshot()
+
+
+def test_histogram_quantiles_report_bucket_bounds():
+    histogram = Histogram(buckets=(0.01, 0.1, 1.0))
+    for value in (0.005, 0.05, 0.05, 0.5):
+        histogram.observe(value)
+
+    assert (histogram.quantile(0.5), histogram.quantile(0.95)) == (0.1, 0.5)
+
+
+def test_prometheus_output_escapes_labels():
+    registry = MetricsRegistry()
+    registry.counter("db_pool_checkouts_total", "Connections checked out", engine='a"b').inc(2)
+
+    assert 'db_pool_checkouts_total{engine="a\\"b"} 2.0' in registry.render_prometheus()
@@ -0,0 +1,106 @@
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool, QueuePool
+
+from app.services.engine_registry import EngineRegistry
+from app.services.pool_warmer import PoolKeeper, idle_deficit, prewarm
+
+
+def queue_engine(tmp_path, name="shop", pool_size=3):
+    return create_engine(f"sqlite:///{tmp_path / name}.db", poolclass=QueuePool, pool_size=pool_size, max_overflow=2)
+
+
+def test_prewarm_opens_the_missing_idle_connections(tmp_path):
+    first, second = queue_engine(tmp_path, "first"), queue_engine(tmp_path, "second")
+    try:
+        with first.connect():
+            pass
+        assert prewarm([first, second], min_idle=2) == [1, 2]
+        assert first.pool.checkedin() == 2 and second.pool.checkedin() == 2
+        assert first.pool.checkedout() == 0
+        assert prewarm([first, second], min_idle=2) == [0, 0]
+    finally:
+        first.dispose()
+        second.dispose()
+
+
+def test_idle_floor_is_capped_at_the_pool_size(tmp_path):
+    engine = queue_engine(tmp_path, pool_size=2)
+    try:
+        assert idle_deficit(engine, 5) == 2
+        assert prewarm([engine], min_idle=5) == [2]
+        assert engine.pool.checkedin() == 2
+    finally:
+        engine.dispose()
+
+
+def test_checked_out_connections_count_against_the_pool_size(tmp_path):
+    engine = queue_engine(tmp_path, pool_size=2)
+    try:
+        with engine.connect():
+            assert idle_deficit(engine, 2) == 1
+    finally:
+        engine.dispose()
+
+
+def test_other_pool_classes_are_left_alone(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'shop'}.db", poolclass=NullPool)
+    try:
+        assert idle_deficit(engine, 2) == 0
+        assert prewarm([engine], min_idle=2) == [0]
+    finally:
+        engine.dispose()
+
+
+def test_failed_connections_are_not_added(tmp_path):
+    engine = create_engine(f"sqlite:///file:{tmp_path}/missing/shop.db?mode=ro&uri=true", poolclass=QueuePool)
+    try:
+        assert prewarm([engine], min_idle=2) == [0]
+        assert engine.pool.checkedin() == 0
+    finally:
+        engine.dispose()
+
+
+def test_keeper_tops_up_engines_in_use_and_disposes_idle_ones(tmp_path):
+    registry = EngineRegistry(max_idle=0, idle_ttl=0)
+    used = registry.acquire("used", lambda: queue_engine(tmp_path, "used"), label="used")
+    idle = registry.acquire("idle", lambda: queue_engine(tmp_path, "idle"), label="idle")
+    with idle.connect():
+        # Still draining, so the release does not dispose it yet
+        registry.release(idle)
+    keeper = PoolKeeper(registry, min_idle=2, interval=0)
+    try:
+        assert keeper.run_once() == 2
+        assert used.pool.checkedin() == 2
+        assert idle.pool.checkedin() == 0
+        assert [engine["label"] for engine in registry.stats()["engines"]] == ["used"]
+        assert keeper.run_once() == 0
+        assert (keeper.rounds, keeper.opened) == (2, 2)
+    finally:
+        registry.clear()
+
+
+def test_keeper_thread_is_disabled_by_a_zero_interval():
+    keeper = PoolKeeper(EngineRegistry(), min_idle=1, interval=0)
+    keeper.start()
+    assert keeper._thread is None
+    keeper.stop()
+
+
+def test_keeper_thread_runs_rounds_until_stopped(tmp_path):
+    registry = EngineRegistry(max_idle=0, idle_ttl=0)
+    engine = registry.acquire("shop", lambda: queue_engine(tmp_path), label="shop")
+    keeper = PoolKeeper(registry, min_idle=1, interval=0.01)
+    keeper.start()
+    try:
+        for _ in range(500):
+            if keeper.rounds:
+                break
+            time.sleep(0.01)
+        assert keeper.rounds and engine.pool.checkedin() == 1
+    finally:
+        keeper.stop()
+        registry.clear()
+    assert keeper._thread is None
+
@@ -0,0 +1,71 @@
+import sqlite3
+
+import pytest
+
+from app.services.database_manager import DatabaseManager, QueryCaches
+from app.services.engine_registry import EngineRegistry
+from app.services.result_cache import ResultCache, referenced_tables, table_references
+
+
+@pytest.mark.parametrize("sql, expected", [
+    ("SELECT * FROM sales s, regions r WHERE s.region_id = r.id", {"sales", "regions"}),
+    ("SELECT * FROM dbo.sales JOIN [dbo].[regions] r ON 1 = 1", {"sales", "regions"}),
+    ("SELECT * FROM (SELECT * FROM sales) s, regions", {"sales", "regions"}),
+    ("SELECT id FROM sales WHERE region_id IN (SELECT id FROM regions)", {"sales", "regions"}),
+    ("WITH totals AS (SELECT * FROM sales) SELECT * FROM totals, regions", {"sales", "regions"}),
+    ("SELECT EXTRACT(YEAR FROM sold_at) FROM sales", {"sales"}),
+    ("SELECT * FROM events e, data WHERE e.id = data.event_id", {"events", "data"}),
+    ("SELECT COUNT(*) FROM events WHERE kind = 'closed'", {"events"}),
+    ("SELECT 1", set()),
+])
+def test_tables_of_joins_subqueries_and_ctes_are_found(sql, expected):
+    assert referenced_tables(sql) == expected
+
+
+def test_unresolvable_table_sources_are_reported():
+    assert table_references("SELECT * FROM generate_series(1, 3) g") is None
+    assert referenced_tables("SELECT * FROM sales, LATERAL (SELECT 1) x") is None
+    assert referenced_tables("SELECT * FROM sales s CROSS APPLY top_items(s.id)") is None
+
+
+def test_write_to_a_comma_joined_table_invalidates_the_result():
+    cache = ResultCache()
+    tables = referenced_tables("SELECT * FROM sales, regions")
+    cache.put("k", [{"n": 1}], None, tables)
+
+    assert cache.invalidate_table("regions") == 1
+    assert cache.get("k", None) is None
+
+
+def test_probes_are_scoped_to_their_connection():
+    cache = ResultCache()
+    cache.register_table_probe("db1", "sales", "SELECT MAX(id) FROM sales")
+    runs = []
+
+    def run(sql):
+        runs.append(sql)
+        return (len(runs),)
+
+    assert cache.has_probes("db1", {"sales"})
+    assert not cache.has_probes("db2", {"sales"})
+    assert cache.probe_version("db1", {"sales"}, run) == (("sales", (1,)),)
+    assert cache.probe_version("db2", {"sales"}, run) == ()
+    assert runs == ["SELECT MAX(id) FROM sales"]
+
+
+def test_manager_registers_probes_for_its_own_connection(tmp_path):
+    path = str(tmp_path / "shop.db")
+    with sqlite3.connect(path) as connection:
+        connection.execute("CREATE TABLE sales (id INTEGER PRIMARY KEY)")
+    caches = QueryCaches()
+    manager = DatabaseManager(engines=EngineRegistry(max_idle=0, idle_ttl=0), caches=caches)
+    assert manager.connect("sqlite", db_path=path)
+    try:
+        with pytest.raises(ValueError):
+            manager.register_table_probe("sales", "DELETE FROM sales")
+        manager.register_table_probe("sales", "SELECT MAX(id) FROM sales")
+
+        assert caches.result_cache.has_probes(manager._connection_id(), {"sales"})
+        assert not caches.result_cache.has_probes("another connection", {"sales"})
+    finally:
+        manager.disconnect()
@@ -0,0 +1,82 @@
+import warnings
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+from app.services.result_set import ColumnarResult
+
+
+def test_decimal_values_round_trip_exactly():
+    amounts = [Decimal("19.99"), None, Decimal("0.10"), Decimal("12345678901234.56"), 7]
+    result = ColumnarResult.from_batches(["amount"], [[(amount,) for amount in amounts]])
+
+    values = [row["amount"] for row in result.to_dicts()]
+
+    assert values == amounts
+    assert all(isinstance(value, Decimal) for value in values if value is not None)
+    assert str(values[0]) == "19.99"
+
+
+def test_decimal_column_survives_spilling(tmp_path):
+    batches = [[(Decimal(f"{i}.{i % 100:02d}"),) for i in range(start, start + 1000)] for start in range(0, 5000, 1000)]
+    result = ColumnarResult.from_batches(["amount"], batches, memory_budget=4096, spill_dir=str(tmp_path))
+    try:
+        assert result.spilled
+        assert [row["amount"] for row in result.to_dicts()] == [value for batch in batches for (value,) in batch]
+    finally:
+        result.close()
+
+
+def test_decimal_with_more_digits_than_the_column_scale_stays_exact():
+    amounts = [Decimal("1.5"), Decimal("2.125"), 1.25]
+    result = ColumnarResult.from_batches(["amount"], [[(amount,)] for amount in amounts])
+
+    assert [row["amount"] for row in result.to_dicts()] == amounts
+    assert list(result.to_pandas()["amount"]) == amounts
+
+
+def test_dates_stay_dates():
+    days = [date(2024, 1, 31), None, date(1999, 12, 1)]
+    result = ColumnarResult.from_batches(["day"], [[(day,)] for day in days])
+
+    values = [row["day"] for row in result.to_dicts()]
+
+    assert values == days
+    assert all(type(value) is date for value in values if value is not None)
+    assert list(result.to_pandas()["day"]) == days
+
+
+def test_dates_and_datetimes_in_one_column_keep_their_types():
+    values = [datetime(2024, 1, 31, 12, 30), date(2024, 2, 1)]
+    result = ColumnarResult.from_batches(["at"], [[(value,)] for value in values])
+
+    assert [type(row["at"]) for row in result.to_dicts()] == [datetime, date]
+
+
+def test_time_zone_aware_datetimes_keep_their_time_zone():
+    plus_two = timezone(timedelta(hours=2))
+    moments = [datetime(2024, 1, 31, 12, 30, tzinfo=plus_two), None, datetime(2024, 2, 1, tzinfo=timezone.utc)]
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        result = ColumnarResult.from_batches(["at"], [[(moment,)] for moment in moments])
+        values = [row["at"] for row in result.to_dicts()]
+
+    assert values == moments
+    assert [value.tzinfo for value in values if value is not None] == [plus_two, timezone.utc]
+
+
+def test_naive_column_with_a_later_aware_value_keeps_every_value():
+    moments = [datetime(2024, 1, 31, 12, 30), datetime(2024, 2, 1, tzinfo=timezone.utc)]
+    result = ColumnarResult.from_batches(["at"], [[(moment,)] for moment in moments])
+
+    assert [row["at"] for row in result.to_dicts()] == moments
+    assert result.to_dicts()[1]["at"].tzinfo is timezone.utc
+
+
+def test_integer_past_int64_widens_to_objects_not_floats():
+    numbers = [1, 2 ** 63 + 5, None, -(2 ** 70)]
+    result = ColumnarResult.from_batches(["n"], [[(number,)] for number in numbers])
+
+    values = [row["n"] for row in result.to_dicts()]
+
+    assert values == numbers
+    assert all(type(value) is int for value in values if value is not None)
@@ -0,0 +1,140 @@
+import sqlite3
+import threading
+
+import pytest
+from sqlalchemy import text
+
+from app.services import server_discovery
+from app.services.engine_registry import EngineRegistry
+from app.services.server_discovery import ServerDiscovery
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    path = str(tmp_path / "master.db")
+    with sqlite3.connect(path) as connection:
+        connection.execute("CREATE TABLE databases (name TEXT, database_id INTEGER)")
+        connection.executemany(
+            "INSERT INTO databases VALUES (?, ?)", [("master", 1), ("tempdb", 2), ("shop", 5), ("hr", 6)]
+        )
+    # SQLite stand-ins for the sys.databases and @@VERSION queries
+    monkeypatch.setattr(server_discovery, "DATABASES_QUERY", text(
+        "SELECT name, database_id FROM databases WHERE database_id > :first_user_id ORDER BY name"
+    ))
+    monkeypatch.setattr(server_discovery, "SERVER_INFO_QUERY", text(
+        "SELECT sqlite_version() AS version, 'local' AS server_name, 'main' AS current_db"
+    ))
+    return f"sqlite:///{path}", path
+
+
+@pytest.fixture
+def registry():
+    registry = EngineRegistry(max_idle=4, idle_ttl=0)
+    yield registry
+    registry.clear()
+
+
+def test_database_list_is_cached_per_server(server, registry):
+    url, path = server
+    discovery = ServerDiscovery(registry, ttl=60)
+
+    assert discovery.list_databases(url) == [{"name": "hr", "database_id": 6}, {"name": "shop", "database_id": 5}]
+    with sqlite3.connect(path) as connection:
+        connection.execute("INSERT INTO databases VALUES ('sales', 7)")
+    assert [database["name"] for database in discovery.list_databases(url)] == ["hr", "shop"]
+    assert discovery.database_details(url, "shop") == {"name": "shop", "database_id": 5}
+    assert discovery.database_details(url, "master") is None
+    assert discovery.stats() == {"hits": 3, "misses": 1, "servers": 1}
+
+    assert [database["name"] for database in discovery.list_databases(url, refresh=True)] == ["hr", "sales", "shop"]
+    discovery.invalidate(url)
+    assert discovery.stats()["servers"] == 0
+
+
+def test_cached_list_expires_after_the_ttl(server, registry):
+    url, _ = server
+    discovery = ServerDiscovery(registry, ttl=0)
+
+    discovery.list_databases(url)
+    discovery.list_databases(url)
+
+    assert discovery.stats()["misses"] == 2
+
+
+def test_callers_cannot_modify_the_cached_list(server, registry):
+    url, _ = server
+    discovery = ServerDiscovery(registry, ttl=60)
+
+    discovery.list_databases(url).clear()
+
+    assert len(discovery.list_databases(url)) == 2
+
+
+def test_least_recently_used_servers_are_dropped(server, registry):
+    url, _ = server
+    other = f"{url}?timeout=5"
+    discovery = ServerDiscovery(registry, ttl=60, max_servers=1)
+
+    discovery.list_databases(url)
+    discovery.list_databases(other)
+    discovery.list_databases(url)
+
+    assert discovery.stats() == {"hits": 0, "misses": 3, "servers": 1}
+
+
+def test_probes_reuse_one_engine_per_server(server, registry):
+    url, _ = server
+    discovery = ServerDiscovery(registry, ttl=60)
+
+    assert discovery.test_connection(url)["server_name"] == "local"
+    discovery.test_connection(url)
+    discovery.list_databases(url)
+
+    stats = registry.stats()
+    assert (stats["created"], stats["reused"]) == (1, 2)
+    assert stats["engines"][0]["label"].startswith("probe ")
+    assert registry.in_use() == []
+
+
+def test_probe_engines_do_not_share_the_full_connection_key(server):
+    url, _ = server
+
+    assert ServerDiscovery._key(url) != EngineRegistry.make_key("sqlite", url)
+
+
+def test_failed_probe_raises_and_discards_the_engine(tmp_path, registry):
+    url = f"sqlite:///file:{tmp_path}/missing/master.db?mode=ro&uri=true"
+    discovery = ServerDiscovery(registry, ttl=60)
+
+    with pytest.raises(RuntimeError):
+        discovery.test_connection(url)
+
+    assert registry.stats()["engines"] == []
+    assert discovery.stats()["servers"] == 0
+
+
+def test_concurrent_lookups_share_one_round_trip(server, registry, monkeypatch):
+    url, _ = server
+    discovery = ServerDiscovery(registry, ttl=60)
+    probe, entered, resume = discovery._probe, threading.Event(), threading.Event()
+    calls = []
+
+    def slow_probe(*args, **kwargs):
+        calls.append(args)
+        entered.set()
+        resume.wait()
+        return probe(*args, **kwargs)
+
+    monkeypatch.setattr(discovery, "_probe", slow_probe)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(discovery.list_databases(url))) for _ in range(4)]
+    threads[0].start()
+    entered.wait()
+    for thread in threads[1:]:
+        thread.start()
+    resume.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert all(len(databases) == 2 for databases in results)
@@ -0,0 +1,95 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.services.query_control import CancelHandle, QueryTimeoutError
+from app.services.single_flight import SingleFlight
+
+
+def test_follower_with_time_left_reruns_after_the_leader_times_out():
+    flight = SingleFlight()
+    leader_started = threading.Event()
+    outcomes = {}
+
+    def leader():
+        def execute():
+            leader_started.set()
+            time.sleep(0.2)
+            raise QueryTimeoutError("Query exceeded its 0.1s timeout")
+        try:
+            flight.do("q", execute, CancelHandle(timeout=0.1))
+        except QueryTimeoutError as e:
+            outcomes["leader"] = e
+
+    thread = threading.Thread(target=leader)
+    thread.start()
+    leader_started.wait()
+    outcomes["follower"] = flight.do("q", lambda: ["rows"], CancelHandle(timeout=60))
+    thread.join()
+
+    assert isinstance(outcomes["leader"], QueryTimeoutError)
+    assert outcomes["follower"] == ["rows"]
+
+
+def test_async_follower_with_time_left_reruns_after_the_leader_times_out():
+    flight = SingleFlight()
+
+    async def timed_out():
+        await asyncio.sleep(0.1)
+        raise QueryTimeoutError("Query exceeded its 0.05s timeout")
+
+    async def rows():
+        return ["rows"]
+
+    async def main():
+        leader = asyncio.create_task(flight.do_async("q", timed_out, CancelHandle(timeout=0.05)))
+        await asyncio.sleep(0.01)
+        follower = await flight.do_async("q", rows, CancelHandle(timeout=60))
+        with pytest.raises(QueryTimeoutError):
+            await leader
+        return follower
+
+    assert asyncio.run(main()) == ["rows"]
+
+
+def test_follower_past_its_own_deadline_times_out():
+    flight = SingleFlight()
+    release = threading.Event()
+    thread = threading.Thread(target=flight.do, args=("q", lambda: release.wait(5)))
+    thread.start()
+    time.sleep(0.05)
+    try:
+        with pytest.raises(QueryTimeoutError):
+            flight.do("q", lambda: ["rows"], CancelHandle(timeout=0.1))
+    finally:
+        release.set()
+        thread.join()
+
+
+def test_followers_get_their_own_row_dictionaries():
+    flight = SingleFlight()
+    leader_started, release = threading.Event(), threading.Event()
+    outcomes = {}
+
+    def leader():
+        def execute():
+            leader_started.set()
+            release.wait()
+            return [{"id": 1, "city": "Oslo"}]
+        outcomes["leader"] = flight.do("q", execute)
+
+    thread = threading.Thread(target=leader)
+    thread.start()
+    leader_started.wait()
+    follower = threading.Thread(target=lambda: outcomes.setdefault("follower", flight.do("q", lambda: [])))
+    follower.start()
+    while flight.stats()["coalesced"] == 0:
+        time.sleep(0.01)
+    release.set()
+    thread.join()
+    follower.join()
+
+    outcomes["follower"][0]["city"] = "Bergen"
+    assert outcomes["leader"] == [{"id": 1, "city": "Oslo"}]
@@ -0,0 +1,57 @@
+import os
+
+import pytest
+
+from app.services.result_set import ColumnarResult
+from app.services.spill import BufferRegistry, ResultTooLargeError
+
+
+def batches(count=5000, size=1000):
+    return [[(i, i * 0.5, f"name{i}") for i in range(start, start + size)] for start in range(0, count, size)]
+
+
+def test_result_over_its_memory_budget_spills_to_disk_and_reads_back(tmp_path):
+    result = ColumnarResult.from_batches(["id", "score", "name"], batches(), memory_budget=8192,
+                                         spill_dir=str(tmp_path))
+    try:
+        assert result.spilled and os.listdir(result.spill.path)
+        assert result.nbytes < 8192
+        assert result.slice_dicts(4998, 5000) == [
+            {"id": 4998, "score": 2499.0, "name": "name4998"},
+            {"id": 4999, "score": 2499.5, "name": "name4999"},
+        ]
+    finally:
+        result.close()
+
+    assert not os.path.exists(result.spill.path)
+
+
+def test_disk_budget_is_enforced_and_the_spill_files_removed(tmp_path):
+    with pytest.raises(ResultTooLargeError):
+        ColumnarResult.from_batches(["id", "score", "name"], batches(), memory_budget=8192,
+                                    spill_dir=str(tmp_path), max_spill_bytes=16384)
+
+    assert os.listdir(tmp_path) == []
+
+
+def test_expired_buffers_are_closed(tmp_path):
+    registry = BufferRegistry(ttl=0)
+    result = ColumnarResult.from_batches(["id", "score", "name"], batches(), memory_budget=8192,
+                                         spill_dir=str(tmp_path))
+    token = registry.register(result)
+
+    registry.sweep()
+
+    assert registry.get(token) is None
+    assert result.spill.closed and os.listdir(tmp_path) == []
+
+
+def test_evicted_buffers_are_closed(tmp_path):
+    registry = BufferRegistry(max_entries=1)
+    first = ColumnarResult.from_batches(["id", "score", "name"], batches(), memory_budget=8192,
+                                        spill_dir=str(tmp_path))
+    registry.register(first)
+    token = registry.register(ColumnarResult.from_records([{"id": 1}]))
+
+    assert first.spill.closed
+    assert registry.get(token).to_dicts() == [{"id": 1}]
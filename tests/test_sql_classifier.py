@@ -0,0 +1,69 @@
+import sqlite3
+
+import pytest
+from sqlalchemy import create_engine
+
+from app.services.sql_classifier import classify
+from app.utils import db
+
+
+@pytest.mark.parametrize("sql", [
+    "PRAGMA table_info(customers)",
+    "PRAGMA main.index_list('customers')",
+    "PRAGMA foreign_key_list(orders)",
+    "PRAGMA database_list",
+])
+def test_introspection_pragmas_are_read_only(sql):
+    assert classify(sql, "sqlite").allowed
+
+
+@pytest.mark.parametrize("sql", [
+    "PRAGMA query_only(0)",
+    "PRAGMA writable_schema(1)",
+    "PRAGMA main.query_only = 0",
+    "PRAGMA journal_mode",
+    "PRAGMA compile_options(1)",
+])
+def test_other_pragmas_are_rejected(sql):
+    assert not classify(sql, "sqlite").allowed
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT id, updated_at, created_by FROM sales",
+    "SELECT * FROM sales WHERE note = 'DROP TABLE sales'",
+    "SELECT id FROM sales -- DELETE FROM sales",
+    "SELECT /* UPDATE sales SET amount = 0 */ id FROM sales",
+    'SELECT "delete" FROM sales',
+    "SELECT id FROM sales;",
+])
+def test_keywords_in_names_literals_and_comments_are_ignored(sql):
+    assert classify(sql, "sqlite").allowed
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT 1; DROP TABLE sales",
+    "SELECT 1; SELECT 2",
+    "SELECT 1;\n-- trailing comment\nDELETE FROM sales",
+])
+def test_multiple_statements_are_rejected(sql):
+    verdict = classify(sql, "sqlite")
+
+    assert verdict.multi_statement and not verdict.allowed
+
+
+def test_utils_execute_query_goes_through_ensure_read_only(tmp_path, monkeypatch):
+    path = str(tmp_path / "shop.db")
+    with sqlite3.connect(path) as connection:
+        connection.execute("CREATE TABLE sales (id INTEGER PRIMARY KEY, updated_at TEXT)")
+        connection.execute("INSERT INTO sales VALUES (1, '2024-01-01')")
+    engine = create_engine(f"sqlite:///{path}")
+    monkeypatch.setattr(db, "engine", engine)
+    try:
+        assert db.execute_query("SELECT id, updated_at FROM sales") == [{"id": 1, "updated_at": "2024-01-01"}]
+        with pytest.raises(ValueError):
+            db.execute_query("DELETE FROM sales")
+        with pytest.raises(ValueError):
+            db.execute_query("SELECT 1; DELETE FROM sales")
+        assert db.execute_query("SELECT COUNT(*) AS n FROM sales") == [{"n": 1}]
+    finally:
+        engine.dispose()
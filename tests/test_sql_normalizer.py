@@ -0,0 +1,72 @@
+import sqlite3
+from decimal import Decimal
+
+import pytest
+
+from app.services.database_manager import DatabaseManager, QueryCaches
+from app.services.engine_registry import EngineRegistry
+from app.services.sql_normalizer import parameterize
+
+FILTERED = "SELECT city, 1 AS one FROM sales WHERE city = 'O''Brien' AND amount > 10.5 AND id < 3 ORDER BY 1 LIMIT 5"
+
+
+@pytest.mark.parametrize("dialect, params", [
+    ("sqlite", {"_v0": "O'Brien", "_v1": 10.5, "_v2": 3}),
+    ("mysql", {"_v0": "O'Brien", "_v1": Decimal("10.5"), "_v2": 3}),
+    ("mssql", {"_v0": "O'Brien", "_v1": Decimal("10.5"), "_v2": 3}),
+])
+def test_predicate_literals_are_lifted(dialect, params):
+    assert parameterize(FILTERED, dialect) == (
+        "SELECT city, 1 AS one FROM sales WHERE city = :_v0 AND amount > :_v1 AND id < :_v2 ORDER BY 1 LIMIT 5",
+        params
+    )
+
+
+def test_postgresql_lifts_only_integers():
+    assert parameterize(FILTERED, "postgresql") == (
+        "SELECT city, 1 AS one FROM sales WHERE city = 'O''Brien' AND amount > 10.5 AND id < :_v0 ORDER BY 1 LIMIT 5",
+        {"_v0": 3}
+    )
+
+
+@pytest.mark.parametrize("dialect", ["sqlite", "postgresql", "mysql", "mssql"])
+def test_typed_literals_casts_and_counts_stay_inline(dialect):
+    sql = "SELECT TOP 10 id FROM sales WHERE sold_at > DATE '2024-01-01' AND id = 7::bigint"
+
+    assert parameterize(sql, dialect) == (sql, {})
+
+
+def test_join_conditions_and_having_are_lifted():
+    sql = "SELECT r.code FROM sales s JOIN regions r ON r.id = s.region_id AND r.code = 'N' GROUP BY r.code HAVING COUNT(*) > 2"
+
+    assert parameterize(sql, "sqlite") == (
+        "SELECT r.code FROM sales s JOIN regions r ON r.id = s.region_id AND r.code = :_v0 GROUP BY r.code "
+        "HAVING COUNT(*) > :_v1",
+        {"_v0": "N", "_v1": 2}
+    )
+
+
+@pytest.mark.parametrize("dialect, lifted", [("mysql", False), ("mssql", True)])
+def test_backslashes_stay_inline_only_where_they_escape(dialect, lifted):
+    canonical, params = parameterize("SELECT id FROM files WHERE path = 'C:\\temp'", dialect)
+
+    assert (params == {"_v0": "C:\\temp"}) is lifted
+
+
+def test_questions_differing_in_values_share_one_statement(tmp_path):
+    path = str(tmp_path / "shop.db")
+    with sqlite3.connect(path) as connection:
+        connection.execute("CREATE TABLE sales (id INTEGER PRIMARY KEY, city TEXT, amount REAL)")
+        connection.executemany("INSERT INTO sales VALUES (?, ?, ?)", [(i, f"city{i % 3}", i * 1.5) for i in range(1, 31)])
+    manager = DatabaseManager(engines=EngineRegistry(max_idle=0, idle_ttl=0), caches=QueryCaches())
+    assert manager.connect("sqlite", db_path=path)
+    try:
+        results = []
+        for city in ("city1", "city2"):
+            literal = f"SELECT COUNT(*) AS n, SUM(amount) AS total FROM sales WHERE city = '{city}' AND amount > 4.5"
+            canonical, params = parameterize(literal, "sqlite")
+            assert manager.execute_query(canonical, params) == manager.execute_query(literal)
+            results.append(canonical)
+        assert results[0] == results[1]
+    finally:
+        manager.disconnect()
@@ -0,0 +1,83 @@
+import os
+import sqlite3
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+
+from app.services.database_manager import DatabaseManager
+from app.services.engine_registry import EngineRegistry
+from app.services.sqlite_profile import install_sqlite_profile, profile_pragmas, sqlite_url
+
+
+def test_connecting_keeps_the_file_journal_mode(tmp_path):
+    path = str(tmp_path / "shop.db")
+    with sqlite3.connect(path) as connection:
+        connection.execute("CREATE TABLE sales (id INTEGER PRIMARY KEY)")
+    manager = DatabaseManager(engines=EngineRegistry(max_idle=0, idle_ttl=0))
+    assert manager.connect("sqlite", db_path=path)
+    try:
+        assert manager.execute_query("SELECT COUNT(*) AS n FROM sales") == [{"n": 0}]
+    finally:
+        manager.disconnect()
+
+    with sqlite3.connect(path) as connection:
+        assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+    assert not os.path.exists(path + "-wal")
+
+
+@pytest.mark.parametrize("settings, read_only", [
+    ({"journal_mode": "WAL", "query_only": True}, False),
+    ({"journal_mode": "WAL", "query_only": False}, True),
+    ({"journal_mode": "", "query_only": False}, False),
+])
+def test_journal_mode_is_only_set_when_asked_for_on_writable_files(settings, read_only):
+    assert "journal_mode" not in profile_pragmas(settings, read_only=read_only)
+
+
+def test_journal_mode_is_set_when_configured_for_a_writable_file():
+    assert profile_pragmas({"journal_mode": "WAL", "query_only": False})["journal_mode"] == "WAL"
+
+
+def test_read_only_urls_open_the_file_in_uri_mode(tmp_path):
+    path = str(tmp_path / "shop.db")
+
+    assert sqlite_url(path) == f"sqlite:///{path}"
+    assert sqlite_url(path, read_only=True).endswith("?mode=ro&uri=true")
+    assert sqlite_url(path, immutable=True).endswith("?mode=ro&immutable=1&uri=true")
+
+
+def test_profile_pragmas_reach_every_pooled_connection(tmp_path):
+    path = str(tmp_path / "shop.db")
+    sqlite3.connect(path).close()
+    settings = {"mmap_size": 1 << 20, "cache_size_kib": 2048, "temp_store": "MEMORY", "query_only": True}
+    engine = create_engine(sqlite_url(path))
+    try:
+        assert install_sqlite_profile(engine, settings) == {
+            "mmap_size": 1 << 20, "cache_size": -2048, "temp_store": "MEMORY", "query_only": "ON"
+        }
+        with engine.connect() as connection:
+            values = [connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+                      for name in ("mmap_size", "cache_size", "temp_store", "query_only")]
+        assert values == [1 << 20, -2048, 2, 1]
+    finally:
+        engine.dispose()
+
+
+def test_in_memory_databases_stay_writable_and_unmapped():
+    assert profile_pragmas({"mmap_size": 1 << 20, "cache_size_kib": 2048, "query_only": True}, memory=True) == \
+        {"cache_size": -2048}
+
+
+def test_read_only_files_reject_writes(tmp_path):
+    path = str(tmp_path / "shop.db")
+    with sqlite3.connect(path) as connection:
+        connection.execute("CREATE TABLE sales (id INTEGER PRIMARY KEY)")
+    engine = create_engine(sqlite_url(path, read_only=True))
+    try:
+        install_sqlite_profile(engine, {"query_only": False})
+        with engine.connect() as connection:
+            with pytest.raises(OperationalError):
+                connection.exec_driver_sql("INSERT INTO sales VALUES (1)")
+    finally:
+        engine.dispose()
@@ -0,0 +1,33 @@
+import pytest
+
+from app.services.statement_cache import StatementCache, driver_statement_cache_args
+
+
+def test_repeated_sql_reuses_the_same_clause_per_dialect():
+    cache = StatementCache()
+
+    first = cache.get("SELECT * FROM sales WHERE id = :id", "sqlite")
+
+    assert cache.get("SELECT * FROM sales WHERE id = :id", "sqlite") is first
+    assert cache.get("SELECT * FROM sales WHERE id = :id", "postgresql") is not first
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+
+
+def test_least_recently_used_statement_is_evicted():
+    cache = StatementCache(max_size=2)
+    first = cache.get("SELECT 1")
+    cache.get("SELECT 2")
+    cache.get("SELECT 1")
+    cache.get("SELECT 3")
+
+    assert cache.get("SELECT 1") is first
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["misses"] == 3
+
+
+@pytest.mark.parametrize("db_type, expected", [
+    ("sqlite", {"cached_statements": 64}),
+    ("postgresql", {}),
+])
+def test_driver_cache_args_only_for_drivers_with_a_cache(db_type, expected):
+    assert driver_statement_cache_args(db_type, 64) == expected